@@ -5,6 +5,8 @@ from routes.hod_routes import hod_bp
 from routes.faculty_routes import faculty_bp
 from routes.exam_routes import exam_bp
 from routes.common_routes import common_bp
+from utils.http_cache import compress_response
+from storage import get_store
 
 
 
@@ -17,6 +19,12 @@ def create_app():
 
     # Enable CORS (frontend → backend)
     CORS(app)
+
+    # Storage backend, chosen once from STORAGE_BACKEND
+    get_store()
+
+    # ETag-aware gzip/brotli compression of JSON responses
+    app.after_request(compress_response)
     app.register_blueprint(common_bp, url_prefix="/api/common")
     app.register_blueprint(auth_bp, url_prefix="/api/auth")
     app.register_blueprint(hod_bp, url_prefix="/api/hod")
@@ -0,0 +1,22 @@
+"""
+Benchmarks for the timetable schedulers: synthetic department inputs and a
+runner recording build/solve time, peak memory, objective, fill rate and
+validation conflicts, with regression checks against a saved baseline.
+
+Usage (from the backend directory):
+    python -m benchmarks --sizes small,medium --json report.json --csv report.csv
+    python -m benchmarks --sizes small --baseline baseline.json
+"""
+from .generator import generate_department, generate_size, SIZES
+from .runner import run_benchmarks, write_report, load_report, compare_to_baseline, SCHEDULERS
+
+__all__ = [
+    "generate_department",
+    "generate_size",
+    "SIZES",
+    "run_benchmarks",
+    "write_report",
+    "load_report",
+    "compare_to_baseline",
+    "SCHEDULERS"
+]
@@ -0,0 +1,63 @@
+"""
+Command-line entry point: python -m benchmarks --help
+"""
+import argparse
+import sys
+
+from .generator import SIZES
+from .runner import (
+    SCHEDULERS, check_schedulers, run_benchmarks, write_report, load_report, compare_to_baseline
+)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the timetable schedulers")
+    parser.add_argument("--sizes", default="small",
+                        help=f"comma-separated sizes ({', '.join(SIZES)}) or class counts")
+    parser.add_argument("--schedulers", default=",".join(SCHEDULERS),
+                        help="comma-separated schedulers to run")
+    parser.add_argument("--seeds", default="0", help="comma-separated generator seeds")
+    parser.add_argument("--profile", help="CP-SAT solver profile (fast, balanced, thorough)")
+    parser.add_argument("--time-limit", type=float, help="override max_time_in_seconds")
+    parser.add_argument("--json", dest="json_path", help="write the report as JSON")
+    parser.add_argument("--csv", dest="csv_path", help="write the report as CSV")
+    parser.add_argument("--baseline", help="compare against this JSON report")
+    parser.add_argument("--save-baseline", help="write the report to this path as the new baseline")
+    args = parser.parse_args(argv)
+    schedulers = [name.strip() for name in args.schedulers.split(",") if name.strip()]
+    try:
+        check_schedulers(schedulers)
+    except ValueError as e:
+        parser.error(str(e))
+
+    config_overrides = {}
+    if args.profile:
+        config_overrides["solver_profile"] = args.profile
+    if args.time_limit is not None:
+        config_overrides["solver_options"] = {"max_time_in_seconds": args.time_limit}
+
+    report = run_benchmarks(
+        sizes=[size.strip() for size in args.sizes.split(",") if size.strip()],
+        schedulers=schedulers,
+        seeds=[int(seed) for seed in args.seeds.split(",") if seed.strip()],
+        config_overrides=config_overrides
+    )
+    write_report(report, args.json_path, args.csv_path)
+    if args.save_baseline:
+        write_report(report, args.save_baseline)
+        print(f"✅ Baseline saved to {args.save_baseline}")
+
+    if args.baseline:
+        regressions = compare_to_baseline(report, load_report(args.baseline))
+        if regressions:
+            print(f"❌ {len(regressions)} regression(s) against {args.baseline}:")
+            for r in regressions:
+                print(f"   {r['scheduler']} {r['size']} (seed {r['seed']}): "
+                      f"{r['metric']} {r['baseline']} -> {r['current']}")
+            return 1
+        print(f"✅ No regressions against {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,162 @@
+"""
+Synthetic department generator for scheduler benchmarks.
+
+Produces (data, config) in the exact shape the schedulers consume: classes
+across year groups, per-year subjects (lectures plus multi-slot labs),
+faculties with a bounded teaching load, faculty_choices covering every
+(class, subject), lesson_hours, classrooms, labs and lab batches. Inputs
+are deterministic for a given size and seed.
+"""
+import math
+import random
+
+
+DAYS_PER_WEEK = 5
+
+# Named sizes: number of classes (divisions across the year groups)
+SIZES = {
+    "small": 6,
+    "medium": 18,
+    "large": 48
+}
+
+YEARS = ["FE", "SE", "TE", "BE"]
+
+
+def generate_department(num_classes=6, seed=0, lectures_per_day=6, lectures_per_year=5,
+                        labs_per_year=2, lecture_hours=3, lab_hours=2, lab_duration=2,
+                        batches_per_class=3, max_faculty_hours=16):
+    """
+    Generate a synthetic department.
+
+    Args:
+        num_classes: number of classes (spread over the FE/SE/TE/BE years)
+        seed: random seed
+        lectures_per_day: slots per day
+        lectures_per_year, labs_per_year: subjects taught to each year
+        lecture_hours, lab_hours: weekly hours of each lecture / lab subject
+        lab_duration: slots per lab session
+        batches_per_class: lab batches per class (0 for none)
+        max_faculty_hours: weekly teaching load cap per faculty
+
+    Returns:
+        (data, config) for generate_timetable_csp / generate_timetable_heuristic
+    """
+    rng = random.Random(seed)
+
+    # Classes: "SE A", "SE B", ... spread evenly over the years
+    years = YEARS[:max(1, min(len(YEARS), num_classes))]
+    classes = []
+    for i in range(num_classes):
+        year = years[i % len(years)]
+        division = chr(ord("A") + i // len(years) % 26)
+        suffix = "" if i < 26 * len(years) else str(i // (26 * len(years)))
+        classes.append(f"{year} {division}{suffix}")
+
+    # Subjects per year
+    subjects = []
+    subjects_by_year = {}
+    for year in years:
+        year_subjects = []
+        for j in range(lectures_per_year):
+            year_subjects.append({
+                "name": f"{year} Subject {j + 1}",
+                "short": f"{year}S{j + 1}",
+                "type": "lecture"
+            })
+        for j in range(labs_per_year):
+            year_subjects.append({
+                "name": f"{year} Lab {j + 1}",
+                "short": f"{year}L{j + 1}",
+                "type": "lab",
+                "duration_slots": lab_duration
+            })
+        subjects_by_year[year] = year_subjects
+        subjects.extend(year_subjects)
+
+    subjects_by_class = {}
+    lesson_hours = {}
+    for class_name in classes:
+        year_subjects = subjects_by_year[class_name.split(" ")[0]]
+        subjects_by_class[class_name] = [dict(subject) for subject in year_subjects]
+        lesson_hours[class_name] = [
+            {
+                "subject": subject["name"],
+                "hours": lab_hours if subject["type"] == "lab" else lecture_hours
+            }
+            for subject in year_subjects
+        ]
+
+    # Faculties: enough for every (class, subject) under the load cap, with slack
+    teaching = [
+        (class_name, lesson["subject"], lesson["hours"])
+        for class_name in classes for lesson in lesson_hours[class_name]
+    ]
+    total_hours = sum(hours for _, _, hours in teaching)
+    num_faculties = max(2, math.ceil(total_hours / max_faculty_hours * 1.25))
+    faculties = [
+        {"name": f"Prof {i + 1:03d}", "short": f"P{i + 1:03d}"}
+        for i in range(num_faculties)
+    ]
+
+    # Each faculty specializes in a few subjects; assign the least loaded specialist
+    load = [0] * num_faculties
+    specialists = {}
+    for subject in subjects:
+        specialists[subject["name"]] = rng.sample(range(num_faculties), min(num_faculties, 3))
+
+    faculty_choices = {}
+    for class_name, subject_name, hours in teaching:
+        candidates = [f for f in specialists[subject_name] if load[f] + hours <= max_faculty_hours]
+        if not candidates:
+            candidates = sorted(range(num_faculties), key=lambda f: load[f])[:1]
+        f = min(candidates, key=lambda f: (load[f], f))
+        load[f] += hours
+        name = faculties[f]["name"]
+        faculty_choices.setdefault(name, {}).setdefault(class_name, []).append(subject_name)
+
+    # Rooms: a classroom per class, enough labs for every batch of every lab session
+    lab_demand = sum(
+        math.ceil(lab_hours / lab_duration) * lab_duration * max(1, batches_per_class) * labs_per_year
+        for _ in classes
+    )
+    num_labs = max(1, math.ceil(lab_demand / (DAYS_PER_WEEK * lectures_per_day) * 1.5)) if labs_per_year else 0
+    rooms = [{"room": f"{101 + i}", "type": "classroom"} for i in range(num_classes)]
+    rooms += [{"room": f"LAB {i + 1}", "type": "lab"} for i in range(num_labs)]
+
+    batches = {}
+    if batches_per_class:
+        batches = {
+            class_name: [f"{class_name}{i + 1}" for i in range(batches_per_class)]
+            for class_name in classes
+        }
+
+    data = {
+        "classes": classes,
+        "subjects": subjects,
+        "faculties": faculties,
+        "rooms": rooms,
+        "preferences": [],
+        "batches": batches
+    }
+    config = {
+        "lectures_per_day": lectures_per_day,
+        "lesson_hours": lesson_hours,
+        "faculty_choices": faculty_choices,
+        "subjects_by_class": subjects_by_class
+    }
+    return data, config
+
+
+def generate_size(size, seed=0, **overrides):
+    """
+    Generate a department for a named size ("small", "medium", "large") or
+    a number of classes.
+    """
+    if isinstance(size, str) and not size.isdigit():
+        if size not in SIZES:
+            raise ValueError(f"Unknown benchmark size '{size}', expected one of {sorted(SIZES)} or a number")
+        num_classes = SIZES[size]
+    else:
+        num_classes = int(size)
+    return generate_department(num_classes=num_classes, seed=seed, **overrides)
@@ -0,0 +1,226 @@
+"""
+Benchmark runner for the timetable schedulers.
+
+Each (scheduler, size) case runs in a fresh worker process so that peak
+memory is measured per run, including native CP-SAT allocations. Results
+are written as JSON and CSV and can be compared against a saved baseline.
+"""
+import csv
+import json
+import os
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+
+from .generator import generate_size
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+SCHEDULERS = ["csp", "heuristic", "local_search", "portfolio", "lns"]
+
+# Older names still accepted: the greedy scheduler was replaced by the DSatur heuristic
+SCHEDULER_ALIASES = {"greedy": "heuristic"}
+
+REPORT_FIELDS = [
+    "scheduler", "size", "seed", "classes", "faculties", "rooms", "status",
+    "build_time", "solve_time", "wall_time", "peak_memory_mb", "python_peak_memory_mb",
+    "objective", "best_bound", "num_variables", "fill_rate", "conflicts", "valid"
+]
+
+# Default regression thresholds (relative, plus an absolute floor for noisy small numbers)
+DEFAULT_TOLERANCE = {
+    "solve_time": (0.25, 0.5),
+    "build_time": (0.25, 0.2),
+    "peak_memory_mb": (0.2, 20.0)
+}
+
+
+def _peak_rss_mb():
+    """Peak resident set size of this process and its children, in MB"""
+    if resource is None:
+        return None
+    peak = max(
+        resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    )
+    # ru_maxrss is in kilobytes on Linux, bytes on macOS
+    divisor = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return round(peak / divisor, 1)
+
+
+def check_schedulers(schedulers):
+    """
+    Raises:
+        ValueError: some name is neither in SCHEDULERS nor in SCHEDULER_ALIASES
+    """
+    unknown = [name for name in schedulers if name not in SCHEDULERS and name not in SCHEDULER_ALIASES]
+    if unknown:
+        raise ValueError(
+            f"Unknown scheduler(s) {unknown}, expected some of {SCHEDULERS + sorted(SCHEDULER_ALIASES)}"
+        )
+
+
+def _run_case(scheduler, size, seed, config_overrides):
+    """Worker-process entry point: generate the input and run one scheduler"""
+    from scheduler import (
+        generate_timetable_csp, generate_timetable_heuristic, repair_timetable, solve_portfolio,
+        solve_lns, validate_timetable
+    )
+
+    data, config = generate_size(size, seed=seed)
+    config.update(config_overrides or {})
+
+    report = {}
+    tracemalloc.start()
+    start = time.perf_counter()
+    kind = SCHEDULER_ALIASES.get(scheduler, scheduler)
+    if kind == "csp":
+        timetable = generate_timetable_csp(data, config, report)
+    elif kind == "heuristic":
+        timetable = generate_timetable_heuristic(data, config, report)
+    elif kind == "local_search":
+        # From an empty timetable, so the search does all the work
+        timetable = repair_timetable({}, data, config, report)
+    elif kind == "portfolio":
+        timetable = solve_portfolio(data, config, report)
+    elif kind == "lns":
+        timetable = solve_lns(data, config, report)
+    else:
+        raise ValueError(f"Unknown scheduler '{scheduler}', expected one of {SCHEDULERS}")
+    wall_time = time.perf_counter() - start
+    _, python_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    validation = validate_timetable(timetable, data["faculties"], config.get("lesson_hours"))
+    build_time = report.get("build_time")
+
+    return {
+        "scheduler": scheduler,
+        "size": str(size),
+        "seed": seed,
+        "classes": len(data["classes"]),
+        "faculties": len(data["faculties"]),
+        "rooms": len(data["rooms"]),
+        "status": report.get("status", "DONE"),
+        "build_time": build_time,
+        "solve_time": round(report["wall_time"], 3) if "wall_time" in report else round(wall_time, 3),
+        "wall_time": round(wall_time, 3),
+        "peak_memory_mb": _peak_rss_mb(),
+        "python_peak_memory_mb": round(python_peak / (1024 * 1024), 1),
+        "objective": report.get("objective"),
+        "best_bound": report.get("best_bound"),
+        "num_variables": report.get("num_variables"),
+        "fill_rate": validation["stats"].get("fill_rate"),
+        "conflicts": len(validation["conflicts"]),
+        "valid": validation["valid"]
+    }
+
+
+def run_benchmarks(sizes=("small",), schedulers=SCHEDULERS, seeds=(0,), config_overrides=None):
+    """
+    Run every scheduler on every size and seed.
+
+    Args:
+        sizes: named sizes or class counts (see generator.SIZES)
+        schedulers: subset of SCHEDULERS (or SCHEDULER_ALIASES)
+        seeds: generator seeds
+        config_overrides: merged into each generated config, e.g.
+                          {"solver_profile": "fast"}
+
+    Returns:
+        dict: {"created_at", "python", "cpu_count", "results": [row, ...]}
+
+    Raises:
+        ValueError: unknown scheduler name (checked before any case runs)
+    """
+    check_schedulers(schedulers)
+    results = []
+    for size in sizes:
+        for seed in seeds:
+            for scheduler in schedulers:
+                print(f"⏱️  {scheduler} on {size} (seed {seed})...")
+                # A fresh process per case keeps peak memory per run
+                with ProcessPoolExecutor(max_workers=1) as executor:
+                    row = executor.submit(_run_case, scheduler, size, seed, config_overrides).result()
+                print(f"   {row['status']} in {row['wall_time']}s, "
+                      f"objective {row['objective']}, conflicts {row['conflicts']}")
+                results.append(row)
+
+    return {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": sys.version.split()[0],
+        "cpu_count": os.cpu_count(),
+        "config_overrides": config_overrides or {},
+        "results": results
+    }
+
+
+def write_report(report, json_path=None, csv_path=None):
+    """Write a benchmark report as JSON and/or CSV"""
+    if json_path:
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    if csv_path:
+        with open(csv_path, "w", encoding="utf-8", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=REPORT_FIELDS, extrasaction="ignore")
+            writer.writeheader()
+            writer.writerows(report["results"])
+
+
+def load_report(path):
+    """Load a JSON benchmark report (e.g. a saved baseline)"""
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def compare_to_baseline(report, baseline, tolerance=None):
+    """
+    Compare a benchmark report against a baseline report.
+
+    A case regresses when a timing or memory metric grows by more than its
+    relative tolerance (and by more than the absolute floor), when the
+    objective drops, or when validation finds more conflicts. Cases are
+    matched on (scheduler, size, seed).
+
+    Args:
+        tolerance: {metric: (relative, absolute)}, defaults to DEFAULT_TOLERANCE
+
+    Returns:
+        list: [{scheduler, size, seed, metric, baseline, current}, ...]
+    """
+    tolerance = dict(DEFAULT_TOLERANCE, **(tolerance or {}))
+    baseline_rows = {
+        (row["scheduler"], str(row["size"]), row["seed"]): row for row in baseline.get("results", [])
+    }
+
+    regressions = []
+    for row in report["results"]:
+        key = (row["scheduler"], str(row["size"]), row["seed"])
+        base = baseline_rows.get(key)
+        if base is None:
+            continue
+
+        def regressed(metric, previous, current):
+            regressions.append({
+                "scheduler": key[0], "size": key[1], "seed": key[2],
+                "metric": metric, "baseline": previous, "current": current
+            })
+
+        for metric, (relative, absolute) in tolerance.items():
+            previous, current = base.get(metric), row.get(metric)
+            if previous is None or current is None:
+                continue
+            if current > previous * (1 + relative) and current - previous > absolute:
+                regressed(metric, previous, current)
+
+        if base.get("objective") is not None and (row.get("objective") or 0) < base["objective"]:
+            regressed("objective", base["objective"], row.get("objective"))
+        if row.get("conflicts", 0) > base.get("conflicts", 0):
+            regressed("conflicts", base.get("conflicts"), row.get("conflicts"))
+
+    return regressions
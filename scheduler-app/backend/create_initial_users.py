@@ -1,25 +1,19 @@
 """
 Script to create initial users in the database.
-Run this after setting up the users table in Supabase.
+Run this after setting up the users table in Supabase, or with STORAGE_BACKEND=sqlite.
 """
-import os
 import sys
-from dotenv import load_dotenv
 
-load_dotenv()
+from services.auth_service import hash_password
+from storage import get_store
 
-# Check if Supabase is enabled
-USE_SUPABASE = os.getenv("USE_SUPABASE", "false").lower() == "true"
+store = get_store()
 
-if not USE_SUPABASE:
-    print("❌ USE_SUPABASE must be set to 'true' in .env file")
+# Users need a database backend
+if not store.supports_users:
+    print("❌ STORAGE_BACKEND must be set to 'sqlite' or 'supabase' in .env file")
     sys.exit(1)
 
-from services.auth_service import hash_password
-from storage.supabase_store import SupabaseStore
-
-store = SupabaseStore()
-
 # Initial users to create
 users = [
     {"username": "hod", "password": "hod123", "role": "hod", "email": None},
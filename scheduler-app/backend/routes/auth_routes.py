@@ -1,21 +1,6 @@
 from flask import Blueprint, request, jsonify
 from services.auth_service import hash_password, verify_password, generate_token
-import os
-from dotenv import load_dotenv
-
-load_dotenv()
-
-USE_SUPABASE = os.getenv("USE_SUPABASE", "false").lower() == "true"
-
-if USE_SUPABASE:
-    try:
-        from storage.supabase_store import SupabaseStore
-        STORE = SupabaseStore()
-    except Exception:
-        STORE = None
-        USE_SUPABASE = False
-else:
-    STORE = None
+from storage import get_store
 
 auth_bp = Blueprint("auth", __name__)
 
@@ -36,8 +21,9 @@ def login():
         }), 400
 
     # Get user from database
-    if USE_SUPABASE and STORE:
-        user = STORE.get_user_by_username(username)
+    store = get_store()
+    if store.supports_users:
+        user = store.get_user_by_username(username)
         
         if not user:
             return jsonify({
@@ -77,7 +63,7 @@ def login():
         # Fallback: In-memory storage not supported for auth
         return jsonify({
             "success": False,
-            "message": "Authentication requires database. Please enable Supabase."
+            "message": "Authentication requires database. Please set STORAGE_BACKEND=sqlite or supabase."
         }), 503
 
 
@@ -105,9 +91,10 @@ def register():
             "message": f"Invalid role. Must be one of: {', '.join(valid_roles)}"
         }), 400
 
-    if USE_SUPABASE and STORE:
+    store = get_store()
+    if store.supports_users:
         # Check if user already exists
-        existing_user = STORE.get_user_by_username(username)
+        existing_user = store.get_user_by_username(username)
         if existing_user:
             return jsonify({
                 "success": False,
@@ -118,7 +105,7 @@ def register():
         password_hash = hash_password(password)
 
         # Create user
-        user = STORE.create_user(username, password_hash, role, email)
+        user = store.create_user(username, password_hash, role, email)
 
         if user:
             # Generate token for immediate login
@@ -144,7 +131,7 @@ def register():
     else:
         return jsonify({
             "success": False,
-            "message": "Registration requires database. Please enable Supabase."
+            "message": "Registration requires database. Please set STORAGE_BACKEND=sqlite or supabase."
         }), 503
 
 
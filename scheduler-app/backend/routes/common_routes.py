@@ -1,12 +1,24 @@
 from flask import Blueprint, jsonify
-from services.timetable_service import get_timetable
+from services.timetable_service import (
+    get_timetable,
+    get_compact_timetable,
+    get_faculty_view,
+    get_room_view,
+    get_timetable_version
+)
 from services.data_service import get_timetable_config
-from scheduler.utils import validate_timetable, get_faculty_timetable
+from scheduler.utils import validate_timetable
+from utils.http_cache import conditional
 
 common_bp = Blueprint("common", __name__)
 
 
+def _timetable_version(*args, **kwargs):
+    return get_timetable_version()
+
+
 @common_bp.route("/timetable", methods=["GET"])
+@conditional(_timetable_version)
 def fetch_full_timetable():
     timetable = get_timetable()
 
@@ -23,6 +35,7 @@ def fetch_full_timetable():
 
 
 @common_bp.route("/timetable/classes", methods=["GET"])
+@conditional(_timetable_version)
 def get_available_classes():
     """Get list of classes that have timetables generated"""
     timetable = get_timetable()
@@ -46,7 +59,7 @@ def get_available_classes():
 @common_bp.route("/timetable/validate", methods=["GET"])
 def validate_current_timetable():
     """Validate the current timetable and return any conflicts/warnings"""
-    timetable = get_timetable()
+    timetable = get_compact_timetable()
 
     if not timetable:
         return jsonify({
@@ -54,7 +67,8 @@ def validate_current_timetable():
             "message": "No timetable generated yet"
         }), 404
 
-    validation = validate_timetable(timetable)
+    config = get_timetable_config() or {}
+    validation = validate_timetable(timetable, lesson_hours=config.get("lesson_hours"))
 
     return jsonify({
         "success": True,
@@ -63,18 +77,17 @@ def validate_current_timetable():
 
 
 @common_bp.route("/timetable/faculty/<faculty_name>", methods=["GET"])
+@conditional(_timetable_version)
 def get_faculty_schedule(faculty_name):
     """Get timetable for a specific faculty member"""
-    timetable = get_timetable()
+    faculty_timetable = get_faculty_view(faculty_name)
 
-    if not timetable:
+    if faculty_timetable is None:
         return jsonify({
             "success": False,
             "message": "No timetable generated yet"
         }), 404
 
-    faculty_timetable = get_faculty_timetable(timetable, faculty_name)
-
     return jsonify({
         "success": True,
         "faculty": faculty_name,
@@ -82,7 +95,27 @@ def get_faculty_schedule(faculty_name):
     })
 
 
+@common_bp.route("/timetable/room/<room_name>", methods=["GET"])
+@conditional(_timetable_version)
+def get_room_schedule(room_name):
+    """Get timetable for a specific room"""
+    room_timetable = get_room_view(room_name)
+
+    if room_timetable is None:
+        return jsonify({
+            "success": False,
+            "message": "No timetable generated yet"
+        }), 404
+
+    return jsonify({
+        "success": True,
+        "room": room_name,
+        "timetable": room_timetable
+    })
+
+
 @common_bp.route("/timetable/config", methods=["GET"])
+@conditional()
 def get_config():
     """Get timetable configuration (publicly accessible for grid rendering)"""
     config = get_timetable_config()
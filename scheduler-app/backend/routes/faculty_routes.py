@@ -1,5 +1,5 @@
 from flask import Blueprint, jsonify, request
-from services.timetable_service import get_timetable
+from services.timetable_service import get_faculty_view
 from utils.auth_middleware import role_required
 
 faculty_bp = Blueprint("faculty", __name__)
@@ -28,25 +28,21 @@ def get_faculty_timetable():
             "message": "Faculty identity not provided"
         }), 400
 
-    timetable = get_timetable()
+    timetable = get_faculty_view(faculty_name)
 
-    if not timetable:
+    if timetable is None:
         return jsonify({
             "success": False,
             "message": "No timetable available"
         }), 404
 
-    faculty_view = {}
-
-    for class_name, class_data in timetable.items():
-        for day, slots in class_data.items():
-            for slot, entry in slots.items():
-                if entry and entry.get("faculty", "").lower() == faculty_name.lower():
-                    faculty_view.setdefault(day, {})
-                    faculty_view[day][slot] = {
-                        "subject": entry.get("subject", ""),
-                        "class": class_name
-                    }
+    faculty_view = {
+        day: {
+            slot: {"subject": entry["subject"], "class": entry["class"]}
+            for slot, entry in slots.items()
+        }
+        for day, slots in timetable.items()
+    }
 
     return jsonify({
         "success": True,
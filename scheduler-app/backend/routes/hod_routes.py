@@ -1,25 +1,23 @@
-from services.auth_service import hash_password
-import os
-from dotenv import load_dotenv
-
-load_dotenv()
-
-USE_SUPABASE = os.getenv("USE_SUPABASE", "false").lower() == "true"
-
-if USE_SUPABASE:
-    try:
-        from storage.supabase_store import SupabaseStore
-        USER_STORE = SupabaseStore()
-    except Exception:
-        USER_STORE = None
-        USE_SUPABASE = False
-else:
-    USER_STORE = None
-
+import json
+import time
 
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, Response, stream_with_context
 from utils.auth_middleware import role_required
-from services.timetable_service import run_scheduler
+from services.auth_service import hash_password
+from storage import get_store
+from services.job_service import (
+    submit_generation_job,
+    get_job,
+    get_job_progress,
+    cancel_job,
+    accept_job,
+    get_latest_solution,
+    get_job_result
+)
+from services.timetable_service import (
+    preview_timetable, rollback_timetable, repair_current_timetable, check_timetable_config, check_lesson_hours
+)
+from services.timetable_history import list_versions, load_version, diff_versions
 
 from services.data_service import (
     save_classes,
@@ -29,7 +27,6 @@ from services.data_service import (
     save_timetable_config,
     get_timetable_config,
     save_batches,
-    get_batches_by_class,
     save_subjects
 )
 
@@ -41,7 +38,6 @@ hod_bp = Blueprint("hod", __name__)
 def get_hod_data():
     """Fetch all saved data (classes, subjects, faculties, rooms, subjects_by_class, batches)"""
     data = get_all_data()
-    batches_by_class = get_batches_by_class()
 
     return jsonify({
         "success": True,
@@ -51,7 +47,7 @@ def get_hod_data():
             "subjects_by_class": data.get("subjects_by_class", {}),
             "faculties": data.get("faculties", []),
             "rooms": data.get("rooms", []),
-            "batches": batches_by_class
+            "batches": data.get("batches", {})
         }
     })
 
@@ -80,9 +76,20 @@ def save_hod_data():
 @hod_bp.route("/save-timetable-config", methods=["POST"])
 @role_required("hod")
 def save_timetable_config_api():
-    """Save timetable configuration (settings, lessons, faculty choices)"""
+    """
+    Save timetable configuration (settings, lessons, faculty choices).
+    Lesson hours must be a multiple of the subject's duration_slots (400 otherwise).
+    """
     data = request.get_json()
 
+    issues = check_lesson_hours(data)
+    if issues:
+        return jsonify({
+            "success": False,
+            "message": "Lesson hours must fill whole sessions",
+            "issues": issues
+        }), 400
+
     save_timetable_config(data)
 
     return jsonify({
@@ -114,14 +121,25 @@ def save_subjects_for_class():
         for s in subjects if (s.get("name") or "").strip()
     ]
 
+    # Copies: nothing changes in the stored config if the check below fails
+    config = dict(get_timetable_config())
+    sb = dict(config.get("subjects_by_class") or {})
+    sb[class_name] = formatted_subjects
+    config["subjects_by_class"] = sb
+
+    # A new session length must still fit the class's lesson hours
+    issues = check_lesson_hours(config)
+    if issues:
+        return jsonify({
+            "success": False,
+            "message": "Lesson hours must fill whole sessions",
+            "issues": issues
+        }), 400
+
     # 1. Save to subjects table (for database storage with type/duration)
     save_subjects(formatted_subjects)
 
     # 2. Save to timetable_config.subjects_by_class (for scheduler usage)
-    config = get_timetable_config()
-    sb = config.get("subjects_by_class") or {}
-    sb[class_name] = formatted_subjects
-    config["subjects_by_class"] = sb
     save_timetable_config(config)
 
     return jsonify({"success": True, "message": "Subjects saved for class"})
@@ -142,10 +160,241 @@ def get_timetable_config_api():
 @hod_bp.route("/generate-timetable", methods=["POST"])
 @role_required("hod")
 def generate_timetable_api():
-    timetable = run_scheduler()
+    """
+    Start a timetable generation job and return its id immediately.
+    Optional body: {"solver_profile": "fast" | "balanced" | "thorough", "stream": true, "incremental": true,
+                    "portfolio": true, "lns": true}
+    With "stream", improving solutions are published on .../jobs/<job_id>/stream.
+    With "incremental", the stored timetable is re-solved, keeping untouched classes.
+    With "portfolio", CP-SAT races the heuristic and local search (see scheduler.portfolio).
+    With "lns", CP-SAT improves a heuristic timetable one neighborhood at a time (see scheduler.lns).
+    """
+    data = request.get_json(silent=True) or {}
+    job_id = submit_generation_job(
+        solver_profile=data.get("solver_profile"),
+        stream_solutions=bool(data.get("stream")),
+        incremental=bool(data.get("incremental")),
+        portfolio=data.get("portfolio"),
+        lns=data.get("lns")
+    )
+
+    return jsonify({
+        "success": True,
+        "job_id": job_id,
+        "status": "queued"
+    }), 202
+
+
+@hod_bp.route("/generate-timetable/preview", methods=["POST"])
+@role_required("hod")
+def preview_timetable_api():
+    """
+    Instant timetable from the heuristic scheduler (not saved).
+    Optional body: {"solver_profile": ...}
+    """
+    data = request.get_json(silent=True) or {}
+    report = {}
+    timetable = preview_timetable(solver_profile=data.get("solver_profile"), report=report)
 
     return jsonify({
         "success": True,
+        "timetable": timetable,
+        "solver": report
+    })
+
+
+@hod_bp.route("/generate-timetable/jobs/<job_id>", methods=["GET"])
+@role_required("hod")
+def get_generation_job_api(job_id):
+    """Get the status of a timetable generation job"""
+    job = get_job(job_id)
+    if job is None:
+        return jsonify({"success": False, "message": "Job not found"}), 404
+
+    return jsonify({"success": True, "job": job})
+
+
+@hod_bp.route("/generate-timetable/jobs/<job_id>/progress", methods=["GET"])
+@role_required("hod")
+def get_generation_job_progress_api(job_id):
+    """Get the objective progress (one point per improving solution) of a job"""
+    progress = get_job_progress(job_id)
+    if progress is None:
+        return jsonify({"success": False, "message": "Job not found"}), 404
+
+    return jsonify({"success": True, "job_id": job_id, "progress": progress})
+
+
+@hod_bp.route("/generate-timetable/jobs/<job_id>/cancel", methods=["POST"])
+@role_required("hod")
+def cancel_generation_job_api(job_id):
+    """Cancel a queued or running generation job"""
+    if not cancel_job(job_id):
+        return jsonify({"success": False, "message": "Job not found or already finished"}), 404
+
+    return jsonify({"success": True, "message": "Cancellation requested"})
+
+
+@hod_bp.route("/generate-timetable/jobs/<job_id>/accept", methods=["POST"])
+@role_required("hod")
+def accept_generation_job_api(job_id):
+    """Stop a running job and keep (and save) its best solution so far"""
+    if not accept_job(job_id):
+        return jsonify({
+            "success": False,
+            "message": "Job not found, already finished or no solution found yet"
+        }), 409
+
+    return jsonify({"success": True, "message": "Current solution accepted"})
+
+
+@hod_bp.route("/generate-timetable/jobs/<job_id>/stream", methods=["GET"])
+@role_required("hod")
+def stream_generation_job_api(job_id):
+    """
+    Server-sent events for a generation job:
+      event "solution": {solutions, objective, best_bound, elapsed, timetable (compact)}
+      event "status":   the final job status, sent once before the stream closes
+    Like every HOD route this needs the Authorization header, which the
+    browser's EventSource cannot send: read the stream with fetch and the
+    header instead (see streamGenerationJob in src/js/generate-timetable.js).
+    """
+    if get_job(job_id) is None:
+        return jsonify({"success": False, "message": "Job not found"}), 404
+
+    def events():
+        last_sent = 0
+        while True:
+            job = get_job(job_id)
+            solution = get_latest_solution(job_id)
+            if solution and solution["solutions"] > last_sent:
+                last_sent = solution["solutions"]
+                yield f"event: solution\ndata: {json.dumps(solution)}\n\n"
+            if job is None or job["finished_at"] is not None:
+                yield f"event: status\ndata: {json.dumps(job)}\n\n"
+                return
+            time.sleep(0.5)
+
+    return Response(
+        stream_with_context(events()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@hod_bp.route("/generate-timetable/jobs/<job_id>/result", methods=["GET"])
+@role_required("hod")
+def get_generation_job_result_api(job_id):
+    """Get the timetable of a completed (and saved) generation job"""
+    job = get_job(job_id)
+    if job is None:
+        return jsonify({"success": False, "message": "Job not found"}), 404
+    if job["status"] != "completed":
+        return jsonify({
+            "success": False,
+            "message": f"Job is {job['status']}",
+            "status": job["status"]
+        }), 409
+
+    return jsonify({
+        "success": True,
+        "timetable": get_job_result(job_id),
+        "solver": job["report"]
+    })
+
+
+@hod_bp.route("/timetable/repair", methods=["POST"])
+@role_required("hod")
+def repair_timetable_api():
+    """
+    Repair the current timetable with local search (no full re-solve) and save it.
+    Optional body: {"time_limit": seconds (max 60)}
+    """
+    data = request.get_json(silent=True) or {}
+    time_limit = data.get("time_limit")
+    if time_limit is not None:
+        if not isinstance(time_limit, (int, float)) or time_limit <= 0:
+            return jsonify({"success": False, "message": "time_limit must be a positive number"}), 400
+        time_limit = min(float(time_limit), 60.0)
+
+    report = {}
+    try:
+        timetable = repair_current_timetable(time_limit=time_limit, report=report)
+    except RuntimeError as e:
+        return jsonify({"success": False, "message": str(e)}), 500
+    if timetable is None:
+        return jsonify({"success": False, "message": "No timetable generated yet"}), 404
+
+    return jsonify({
+        "success": True,
+        "timetable": timetable,
+        "solver": report
+    })
+
+
+@hod_bp.route("/timetable/feasibility", methods=["POST"])
+@role_required("hod")
+def check_timetable_feasibility_api():
+    """
+    Check the current config for problems before generating.
+    Optional body: {"diagnose": false} to run only the cheap checks
+    (otherwise CP-SAT also confirms feasibility or names a minimal conflict).
+    """
+    data = request.get_json(silent=True) or {}
+    analysis = check_timetable_config(diagnose=data.get("diagnose", True) is not False)
+
+    return jsonify({
+        "success": True,
+        "feasibility": analysis
+    })
+
+
+# ==================== TIMETABLE HISTORY ====================
+
+@hod_bp.route("/timetable/versions", methods=["GET"])
+@role_required("hod")
+def list_timetable_versions_api():
+    """List saved timetable versions, newest first"""
+    return jsonify({"success": True, "versions": list_versions()})
+
+
+@hod_bp.route("/timetable/versions/<int:version_id>", methods=["GET"])
+@role_required("hod")
+def get_timetable_version_api(version_id):
+    """Get one saved timetable version"""
+    timetable, version = load_version(version_id)
+    if timetable is None:
+        return jsonify({"success": False, "message": "Version not found"}), 404
+
+    version.pop("fingerprints", None)
+    return jsonify({"success": True, "version": version, "timetable": timetable.to_dict()})
+
+
+@hod_bp.route("/timetable/versions/<int:from_id>/diff/<int:to_id>", methods=["GET"])
+@role_required("hod")
+def diff_timetable_versions_api(from_id, to_id):
+    """Get the cells that changed between two versions"""
+    diff = diff_versions(from_id, to_id)
+    if diff is None:
+        return jsonify({"success": False, "message": "Version not found"}), 404
+
+    return jsonify({"success": True, "diff": diff})
+
+
+@hod_bp.route("/timetable/versions/<int:version_id>/rollback", methods=["POST"])
+@role_required("hod")
+def rollback_timetable_version_api(version_id):
+    """Make a saved version the current timetable again"""
+    try:
+        timetable = rollback_timetable(version_id)
+    except RuntimeError as e:
+        return jsonify({"success": False, "message": str(e)}), 500
+    if timetable is None:
+        return jsonify({"success": False, "message": "Version not found"}), 404
+
+    return jsonify({
+        "success": True,
+        "message": f"Timetable rolled back to version {version_id}",
         "timetable": timetable
     })
 
@@ -155,15 +404,17 @@ def generate_timetable_api():
 @hod_bp.route("/users", methods=["GET"])
 @role_required("hod")
 def get_all_users():
-    if not USE_SUPABASE or not USER_STORE:
+    store = get_store()
+    if not store.supports_users:
         return jsonify({"success": False, "message": "User management requires database"}), 503
-    users = USER_STORE.get_all_users()
+    users = store.get_all_users()
     return jsonify({"success": True, "users": users})
 
 @hod_bp.route("/users/create", methods=["POST"])
 @role_required("hod")
 def create_user():
-    if not USE_SUPABASE or not USER_STORE:
+    store = get_store()
+    if not store.supports_users:
         return jsonify({"success": False, "message": "User management requires database"}), 503
     data = request.get_json()
     username = data.get("username")
@@ -175,11 +426,11 @@ def create_user():
     valid_roles = ["hod", "faculty", "exam_control"]
     if role not in valid_roles:
         return jsonify({"success": False, "message": f"Invalid role. Must be one of: {', '.join(valid_roles)}"}), 400
-    existing_user = USER_STORE.get_user_by_username(username)
+    existing_user = store.get_user_by_username(username)
     if existing_user:
         return jsonify({"success": False, "message": "Username already exists"}), 409
     password_hash = hash_password(password)
-    user = USER_STORE.create_user(username, password_hash, role, email)
+    user = store.create_user(username, password_hash, role, email)
     if user:
         return jsonify({"success": True, "message": "User created successfully", "user": {"id": user["id"], "username": user["username"], "role": user["role"], "email": user.get("email")}}), 201
     return jsonify({"success": False, "message": "Failed to create user"}), 500
@@ -187,16 +438,12 @@ def create_user():
 @hod_bp.route("/users/<int:user_id>", methods=["DELETE"])
 @role_required("hod")
 def delete_user(user_id):
-    if not USE_SUPABASE or not USER_STORE:
+    store = get_store()
+    if not store.supports_users:
         return jsonify({"success": False, "message": "User management requires database"}), 503
     current_user = request.current_user
     if current_user and current_user.get("user_id") == user_id:
         return jsonify({"success": False, "message": "Cannot delete your own account"}), 400
-    try:
-        from storage.supabase_store import supabase
-        if supabase:
-            supabase.table("users").delete().eq("id", user_id).execute()
-            return jsonify({"success": True, "message": "User deleted successfully"})
-        return jsonify({"success": False, "message": "Database connection failed"}), 503
-    except Exception as e:
-        return jsonify({"success": False, "message": f"Failed to delete user: {str(e)}"}), 500
\ No newline at end of file
+    if store.delete_user(user_id):
+        return jsonify({"success": True, "message": "User deleted successfully"})
+    return jsonify({"success": False, "message": "Failed to delete user"}), 500
\ No newline at end of file
@@ -3,13 +3,26 @@ Scheduler module for timetable generation using CSP (Constraint Satisfaction Pro
 """
 from .csp_scheduler import generate_timetable_csp, generate_timetable
 from .greedy_scheduler import generate_timetable as generate_timetable_greedy
+from .heuristic_scheduler import generate_timetable_heuristic
+from .local_search import repair_timetable
+from .portfolio import solve_portfolio
+from .lns import solve_lns
 from .utils import validate_timetable, get_faculty_timetable, get_room_timetable
+from .compact import CompactTimetable
+from .solver_profiles import SOLVER_PROFILES, DEFAULT_PROFILE
 
 __all__ = [
     "generate_timetable_csp",
     "generate_timetable",
     "generate_timetable_greedy",
+    "generate_timetable_heuristic",
+    "repair_timetable",
+    "solve_portfolio",
+    "solve_lns",
     "validate_timetable",
     "get_faculty_timetable",
-    "get_room_timetable"
+    "get_room_timetable",
+    "CompactTimetable",
+    "SOLVER_PROFILES",
+    "DEFAULT_PROFILE"
 ]
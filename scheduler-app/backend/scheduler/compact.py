@@ -0,0 +1,391 @@
+"""
+Array-backed compact timetable.
+
+The nested {class: {day: {slot: {subject, faculty, room}}}} dict is stored as
+three integer-coded NumPy arrays of shape (classes, days, slots) indexing
+interned string tables, so a timetable costs a few bytes per cell and
+queries (one faculty's or room's cells, subject hour counts) are vectorized.
+Any other entry fields (lab "block", "batches", ...) are kept in a sparse
+side table, so conversion to and from the dict shape is lossless.
+"""
+import numpy as np
+
+
+EMPTY = -2    # cell holds no lecture (None in the dict shape)
+MISSING = -1  # entry has no such field (e.g. no "room")
+
+COMPACT_FORMAT = "compact-v1"
+DELTA_FORMAT = "compact-delta-v1"
+
+_FIELDS = ("subject", "faculty", "room")
+_TABLES = {"subject": "subjects", "faculty": "faculties", "room": "rooms"}
+
+
+def _interner(table):
+    lookup = {value: i for i, value in enumerate(table)}
+
+    def intern(value):
+        code = lookup.get(value)
+        if code is None:
+            code = lookup[value] = len(table)
+            table.append(value)
+        return code
+    return intern
+
+
+def _code_dtype(*tables):
+    return np.int16 if max((len(t) for t in tables), default=0) < np.iinfo(np.int16).max else np.int32
+
+
+class CompactTimetable:
+    """
+    Integer-coded timetable.
+
+    Attributes:
+        classes, days, slots: axis labels
+        subjects, faculties, rooms: interned string tables
+        subject, faculty, room: int arrays (class, day, slot) of table indexes;
+            EMPTY marks an empty cell, MISSING a field absent from the entry
+        extras: {(c, d, s): {field: value}} for every other entry field
+    """
+
+    def __init__(self, classes, days, slots, subjects=None, faculties=None, rooms=None,
+                 subject=None, faculty=None, room=None, extras=None):
+        self.classes = list(classes)
+        self.days = list(days)
+        self.slots = list(slots)
+        self.subjects = list(subjects or [])
+        self.faculties = list(faculties or [])
+        self.rooms = list(rooms or [])
+
+        shape = (len(self.classes), len(self.days), len(self.slots))
+        dtype = np.int32
+        self.subject = np.full(shape, EMPTY, dtype) if subject is None else np.asarray(subject, dtype).reshape(shape)
+        self.faculty = np.full(shape, MISSING, dtype) if faculty is None else np.asarray(faculty, dtype).reshape(shape)
+        self.room = np.full(shape, MISSING, dtype) if room is None else np.asarray(room, dtype).reshape(shape)
+        self.extras = dict(extras or {})
+        self._lookups = {}
+        self._class_index = {name: c for c, name in enumerate(self.classes)}
+
+    # ==================== BUILDING ====================
+
+    def _intern(self, field, value):
+        """Table code of a field value, adding it to the table if new"""
+        lookup = self._lookups.get(field)
+        if lookup is None:
+            lookup = self._lookups[field] = {v: i for i, v in enumerate(getattr(self, _TABLES[field]))}
+        code = lookup.get(value)
+        if code is None:
+            table = getattr(self, _TABLES[field])
+            code = lookup[value] = len(table)
+            table.append(value)
+        return code
+
+    def set_entry(self, c, d, s, entry):
+        """Store a dict-shaped entry (or None) in cell (c, d, s)"""
+        if entry is None:
+            self.subject[c, d, s] = EMPTY
+            self.faculty[c, d, s] = MISSING
+            self.room[c, d, s] = MISSING
+            self.extras.pop((c, d, s), None)
+            return
+
+        for field in _FIELDS:
+            getattr(self, field)[c, d, s] = self._intern(field, entry[field]) if field in entry else MISSING
+
+        extra = {key: value for key, value in entry.items() if key not in _FIELDS}
+        if extra:
+            self.extras[(c, d, s)] = extra
+        else:
+            self.extras.pop((c, d, s), None)
+
+    @classmethod
+    def from_dict(cls, timetable):
+        """
+        Encode a {class: {day: {slot: entry}}} timetable. Day and slot axes
+        are the union of the labels used, in order of first appearance.
+        """
+        if isinstance(timetable, cls):
+            return timetable
+        timetable = timetable or {}
+
+        days, slots = [], []
+        intern_day, intern_slot = _interner(days), _interner(slots)
+        for class_data in timetable.values():
+            for day, day_data in (class_data or {}).items():
+                intern_day(day)
+                for slot in (day_data or {}):
+                    intern_slot(slot)
+
+        compact = cls(list(timetable.keys()), days, slots)
+        day_index = {day: d for d, day in enumerate(days)}
+        slot_index = {slot: s for s, slot in enumerate(slots)}
+        for c, class_data in enumerate(timetable.values()):
+            for day, day_data in (class_data or {}).items():
+                for slot, entry in (day_data or {}).items():
+                    if entry is not None:
+                        compact.set_entry(c, day_index[day], slot_index[slot], entry)
+
+        return compact.shrink()
+
+    def shrink(self):
+        """Use the smallest integer type that fits the string tables"""
+        dtype = _code_dtype(self.subjects, self.faculties, self.rooms)
+        self.subject = self.subject.astype(dtype, copy=False)
+        self.faculty = self.faculty.astype(dtype, copy=False)
+        self.room = self.room.astype(dtype, copy=False)
+        return self
+
+    # ==================== CONVERSION ====================
+
+    def entry(self, c, d, s):
+        """Dict-shaped entry of cell (c, d, s) (None if empty)"""
+        subject = int(self.subject[c, d, s])
+        if subject == EMPTY:
+            return None
+        entry = {}
+        for field in _FIELDS:
+            code = int(getattr(self, field)[c, d, s])
+            if code >= 0:
+                entry[field] = getattr(self, _TABLES[field])[code]
+        entry.update(self.extras.get((c, d, s), {}))
+        return entry
+
+    def to_dict(self):
+        """Decode to the {class: {day: {slot: entry}}} dict shape"""
+        timetable = {}
+        for c, class_name in enumerate(self.classes):
+            timetable[class_name] = {
+                day: {slot: self.entry(c, d, s) for s, slot in enumerate(self.slots)}
+                for d, day in enumerate(self.days)
+            }
+        return timetable
+
+    def to_json_dict(self):
+        """JSON-serializable payload (flat code lists), see from_json_dict"""
+        return {
+            "format": COMPACT_FORMAT,
+            "classes": self.classes,
+            "days": self.days,
+            "slots": self.slots,
+            "subjects": self.subjects,
+            "faculties": self.faculties,
+            "rooms": self.rooms,
+            "subject": self.subject.ravel().tolist(),
+            "faculty": self.faculty.ravel().tolist(),
+            "room": self.room.ravel().tolist(),
+            "extras": [[c, d, s, extra] for (c, d, s), extra in self.extras.items()]
+        }
+
+    @classmethod
+    def from_json_dict(cls, payload):
+        """Decode a to_json_dict payload"""
+        compact = cls(
+            payload["classes"], payload["days"], payload["slots"],
+            payload["subjects"], payload["faculties"], payload["rooms"],
+            payload["subject"], payload["faculty"], payload["room"],
+            {(c, d, s): extra for c, d, s, extra in payload.get("extras", [])}
+        )
+        return compact.shrink()
+
+    @staticmethod
+    def is_payload(value):
+        """True if value is a to_json_dict payload (rather than a dict-shaped timetable)"""
+        return isinstance(value, dict) and value.get("format") == COMPACT_FORMAT
+
+    @classmethod
+    def load(cls, value):
+        """Decode a stored timetable: CompactTimetable, JSON payload or dict shape"""
+        if value is None or isinstance(value, cls):
+            return value
+        if cls.is_payload(value):
+            return cls.from_json_dict(value)
+        return cls.from_dict(value)
+
+    def copy(self):
+        """Independent copy (arrays, tables and extras)"""
+        return CompactTimetable(
+            self.classes, self.days, self.slots, self.subjects, self.faculties, self.rooms,
+            self.subject.copy(), self.faculty.copy(), self.room.copy(),
+            {cell: dict(extra) for cell, extra in self.extras.items()}
+        ).shrink()
+
+    # ==================== DELTAS ====================
+
+    def same_axes(self, other):
+        """True if both timetables have the same classes, days and slots (in order)"""
+        return self.classes == other.classes and self.days == other.days and self.slots == other.slots
+
+    def _names(self, field):
+        """Object array (class, day, slot) of the field's values (None where empty or missing)"""
+        table = np.array(getattr(self, _TABLES[field]) + [None], dtype=object)
+        codes = getattr(self, field)
+        return table[np.where(codes >= 0, codes, len(table) - 1)]
+
+    def diff_cells(self, other):
+        """
+        Flat (class, day, slot) positions whose entries differ from other's.
+        Codes are compared by value, so the string tables may differ.
+
+        Raises:
+            ValueError: the timetables have different axes (see same_axes)
+        """
+        if not self.same_axes(other):
+            raise ValueError("Timetables have different classes, days or slots")
+        changed = self.filled != other.filled
+        for field in _FIELDS:
+            changed |= self._names(field) != other._names(field)
+        changed = changed.ravel()
+        for cell in set(self.extras) | set(other.extras):
+            if self.extras.get(cell) != other.extras.get(cell):
+                changed[np.ravel_multi_index(cell, self.subject.shape)] = True
+        return np.nonzero(changed)[0].tolist()
+
+    def delta_from(self, base):
+        """
+        JSON-serializable delta turning base into this timetable: the
+        dict-shaped entry of every changed cell (see apply_delta).
+        """
+        shape = self.subject.shape
+        return {
+            "format": DELTA_FORMAT,
+            "cells": [
+                [flat, self.entry(*np.unravel_index(flat, shape))]
+                for flat in self.diff_cells(base)
+            ]
+        }
+
+    def apply_delta(self, delta):
+        """New timetable: a copy of this one with a delta_from payload applied"""
+        timetable = self.copy()
+        shape = timetable.subject.shape
+        for flat, entry in delta["cells"]:
+            timetable.set_entry(*(int(i) for i in np.unravel_index(flat, shape)), entry)
+        return timetable.shrink()
+
+    # ==================== QUERIES ====================
+
+    def __bool__(self):
+        return bool(self.classes)
+
+    def __len__(self):
+        return len(self.classes)
+
+    @property
+    def nbytes(self):
+        """Bytes held by the code arrays"""
+        return self.subject.nbytes + self.faculty.nbytes + self.room.nbytes
+
+    @property
+    def filled(self):
+        """Boolean (class, day, slot) mask of non-empty cells"""
+        return self.subject != EMPTY
+
+    def codes(self, field, name):
+        """Table codes of a field matching name case-insensitively"""
+        target = (name or "").lower()
+        table = getattr(self, _TABLES[field])
+        return [code for code, value in enumerate(table) if isinstance(value, str) and value.lower() == target]
+
+    def mask(self, field, name):
+        """Boolean (class, day, slot) mask of cells whose field matches name (case-insensitive)"""
+        codes = self.codes(field, name)
+        if not codes:
+            return np.zeros(self.subject.shape, dtype=bool)
+        return np.isin(getattr(self, field), codes)
+
+    def build_index(self):
+        """
+        Inverted indexes from lower-cased faculty, room and subject names to
+        the flat (class, day, slot) positions of their cells, in timetable
+        order. JSON-serializable, so it can be stored with the timetable.
+        
+        Returns:
+            dict: {"faculty": {name: [cell, ...]}, "room": {...}, "subject": {...}}
+        """
+        filled = self.filled.ravel()
+        index = {}
+        for field in _FIELDS:
+            codes = getattr(self, field).ravel()
+            cells = np.nonzero(filled & (codes >= 0))[0]
+            order = np.argsort(codes[cells], kind="stable")
+            sorted_cells = cells[order]
+            unique_codes, starts = np.unique(codes[sorted_cells], return_index=True)
+            
+            by_name = {}
+            table = getattr(self, _TABLES[field])
+            for code, start, end in zip(unique_codes, starts, list(starts[1:]) + [len(sorted_cells)]):
+                name = table[code]
+                key = name.lower() if isinstance(name, str) else str(name)
+                by_name.setdefault(key, []).append(sorted_cells[start:end])
+            index[field] = {
+                key: np.sort(np.concatenate(parts)).tolist() if len(parts) > 1 else parts[0].tolist()
+                for key, parts in by_name.items()
+            }
+        # Lab batches use rooms besides the cell's main room
+        for key, cells in self._batch_room_cells().items():
+            index["room"][key] = sorted(set(index["room"].get(key, [])) | set(cells))
+        return index
+
+    def _batch_room_cells(self):
+        """{lower-cased room name: [flat cell, ...]} of the rooms used by lab batches"""
+        cells = {}
+        for cell, extra in self.extras.items():
+            for batch in extra.get("batches") or []:
+                name = batch.get("room")
+                if isinstance(name, str) and self.subject[cell] != EMPTY:
+                    cells.setdefault(name.lower(), set()).add(int(np.ravel_multi_index(cell, self.subject.shape)))
+        return {name: sorted(flat) for name, flat in cells.items()}
+
+    def _cells(self, field, name, index=None):
+        """(class, day, slot) index arrays of the cells matching name, via index if given"""
+        if index is not None and field in index:
+            flat = np.asarray(index[field].get((name or "").lower(), []), dtype=np.int64)
+            return np.unravel_index(flat, self.subject.shape)
+        mask = self.mask(field, name)
+        if field == "room":
+            flat = self._batch_room_cells().get((name or "").lower(), [])
+            mask.ravel()[flat] = True
+        return np.nonzero(mask)
+
+    def _view(self, field, name, columns, index=None):
+        view = {}
+        for c, d, s in zip(*self._cells(field, name, index)):
+            entry = self.entry(c, d, s)
+            view.setdefault(self.days[d], {})[self.slots[s]] = {
+                column: self.classes[c] if column == "class" else entry.get(column, default)
+                for column, default in columns
+            }
+        return view
+
+    def faculty_view(self, faculty_name, index=None):
+        """
+        {day: {slot: {subject, class, room}}} for one faculty (see
+        utils.get_faculty_timetable); O(result) with a build_index() index.
+        """
+        return self._view("faculty", faculty_name, (("subject", "Unknown"), ("class", None), ("room", "TBD")), index)
+
+    def room_view(self, room_name, index=None):
+        """
+        {day: {slot: {subject, class, faculty}}} for one room, including lab
+        batches taught there ("batches": [batch, ...]) (see
+        utils.get_room_timetable); O(result) with a build_index() index.
+        """
+        view = self._view("room", room_name, (("subject", "Unknown"), ("class", None), ("faculty", "TBD")), index)
+        target = (room_name or "").lower()
+        for c, d, s in zip(*self._cells("room", room_name, index)):
+            batches = [
+                batch.get("batch") for batch in self.extras.get((c, d, s), {}).get("batches") or []
+                if isinstance(batch.get("room"), str) and batch["room"].lower() == target
+            ]
+            if batches:
+                view[self.days[d]][self.slots[s]]["batches"] = batches
+        return view
+
+    def subject_hours(self, class_name, subject_name):
+        """Number of slots a class has a subject (case-insensitive)"""
+        c = self._class_index.get(class_name)
+        if c is None:
+            return 0
+        codes = self.codes("subject", subject_name)
+        return int(np.isin(self.subject[c], codes).sum()) if codes else 0
@@ -2,10 +2,19 @@
 CSP (Constraint Satisfaction Problem) Scheduler using Google OR-Tools
 This scheduler handles real-world constraints for timetable generation.
 """
+import threading
+import time
+
 from ortools.sat.python import cp_model
 
+from .solver_profiles import resolve_solver_profile, apply_solver_profile, build_solve_report
+from .decomposition import split_components, partition_rooms, solve_decomposed
+from .compact import CompactTimetable
+from .symmetry import detect_symmetries, symmetry_summary, break_symmetries
+
 
-def generate_timetable_csp(data, config=None):
+def generate_timetable_csp(data, config=None, report=None, progress_callback=None, stop_event=None,
+                           stream_solutions=False, warm_start=None, compact=False):
     """
     Generate an optimized timetable using Constraint Satisfaction Problem (CSP) solver.
     
@@ -15,232 +24,733 @@ def generate_timetable_csp(data, config=None):
             "subjects": [{"name": "ML", "short": "ML"}, ...],
             "faculties": [{"name": "Prof X", "short": "PX"}, ...],
             "rooms": [{"room": "301", "type": "classroom"}, ...],
-            "preferences": []  # faculty preferences
+            "preferences": [],  # faculty preferences
+            "batches": {"BE A": ["BE A1", "BE A2"]}  # optional lab batches
         }
         config: {
             "lectures_per_day": 6,
             "lesson_hours": {"BE A": [{"subject": "ML", "hours": 3}, ...]},
-            "faculty_choices": {"Prof X": {"BE A": ["ML", "AI"]}}
+            "subjects_by_class": {"BE A": [{"name": "ML Lab", "type": "lab", "duration_slots": 2}]},
+            "faculty_choices": {"Prof X": {"BE A": ["ML", "AI"]}},
+            "solver_profile": "fast" | "balanced" | "thorough",
+            "solver_options": {"max_time_in_seconds": 10},  # per-field overrides
+            "decompose": True,  # solve faculty-independent class groups separately
+            "heuristic_fallback": True,  # heuristic timetable when no solution is found
+            "feasibility_check": True,  # skip the solve when a cheap check proves the config infeasible
+            "symmetry_breaking": False  # order interchangeable faculties, classes and days (not with warm_start)
         }
+        report: optional dict, filled with the solver run summary
+                (profile, wall time, objective, bound, ...)
+        progress_callback: optional callable, invoked with
+                {"solutions", "objective", "best_bound", "elapsed"} for every
+                improving solution; returning True stops the search and keeps
+                the best solution found so far
+        stop_event: optional Event; setting it stops a running search
+        stream_solutions: if True, progress_callback info also carries a
+                "timetable" entry with the compact solution (see _compact_solution)
+        warm_start: optional incremental re-solve input:
+                {"timetable": previous timetable, "fixed_classes": [class names]}
+                The previous timetable is used as solution hints (and rewarded
+                as a secondary objective to keep changes minimal); the cells of
+                fixed classes are kept as they are.
+        compact: if True, return a CompactTimetable instead of the dict shape
     
     Returns:
         Timetable dict: {class: {day: {slot: {subject, faculty, room}}}}
+        (CompactTimetable if compact)
     """
     
     classes = data.get("classes", [])
     subjects = data.get("subjects", [])
-    faculties = data.get("faculties", [])
-    rooms = data.get("rooms", [])
     
     if not classes or not subjects:
-        return _generate_empty_timetable(classes)
+        return _as_requested(_generate_empty_timetable(classes), compact)
     
     config = config or {}
+    problem = _build_problem(data, config)
+    
+    # Cheap necessary conditions (see feasibility): no solve for a config that cannot be met
+    issues = []
+    if config.get("feasibility_check", True):
+        from .feasibility import check_feasibility
+        issues = check_feasibility(problem, config)
+        errors = [issue for issue in issues if issue["severity"] == "error"]
+        if errors:
+            return _as_requested(_infeasible_config(problem, config, issues, report), compact)
+    
+    # Classes sharing no faculty are solved as separate models in parallel
+    if config.get("decompose", True) and not stream_solutions:
+        components = split_components(problem)
+        room_shares = partition_rooms(problem, components) if len(components) > 1 else None
+        if room_shares is not None:
+            timetable = solve_decomposed(
+                data, config, problem, components, room_shares, report,
+                progress_callback=progress_callback, stop_event=stop_event, warm_start=warm_start
+            )
+            return _as_requested(timetable, compact)
+        if len(components) > 1:
+            print(f"   {len(components)} independent components, but they compete for rooms; solving as one model")
+    
+    # Create the model (only legal (class, subject, faculty) triples get variables)
+    build_start = time.perf_counter()
+    model, assignments, index = _build_model(problem)
+    warm_summary = _apply_warm_start(model, problem, assignments, index, warm_start) if warm_start else None
+    # Interchangeable faculties, classes and days (see symmetry). The previous
+    # timetable singles out one of the equivalent timetables: no symmetry breaking then
+    symmetries = detect_symmetries(problem, index)
+    if not warm_start and config.get("symmetry_breaking", False):
+        symmetry = break_symmetries(model, problem, assignments, index, symmetries)
+        print(f"   Symmetry breaking: {len(symmetry['faculty_groups'])} faculty groups, "
+              f"{len(symmetry['class_groups'])} class groups, {symmetry['days']} days, "
+              f"{symmetry['constraints']} constraints (up to {symmetry['group_size']}x fewer equivalent solutions)")
+    else:
+        symmetry = symmetry_summary(problem, symmetries)
+    build_time = time.perf_counter() - build_start
+    print(f"   Model: {len(assignments)} assignment variables "
+          f"for {len(problem['triples'])} legal (class, subject, faculty) triples")
+    
+    # ==================== SOLVE ====================
+    profile_name, profile = resolve_solver_profile(config)
+    solver, status = _solve(model, profile, problem, assignments, progress_callback, stop_event, stream_solutions)
+    
+    if warm_summary and warm_summary["fixed_classes"] and status == cp_model.INFEASIBLE:
+        # The kept classes leave no room for the edited ones: free everything, keep the hints
+        print("⚠️ Fixed classes made the model infeasible, re-solving with hints only")
+        build_start = time.perf_counter()
+        model, assignments, index = _build_model(problem)
+        warm_summary = _apply_warm_start(
+            model, problem, assignments, index, dict(warm_start, fixed_classes=[])
+        )
+        build_time += time.perf_counter() - build_start
+        solver, status = _solve(model, profile, problem, assignments, progress_callback, stop_event, stream_solutions)
+    
+    run_report = build_solve_report(profile_name, profile, solver, status, build_time, len(assignments))
+    run_report["fallback"] = status not in (cp_model.OPTIMAL, cp_model.FEASIBLE)
+    if warm_summary is not None:
+        run_report["warm_start"] = warm_summary
+    run_report["symmetry"] = symmetry
+    if status == cp_model.INFEASIBLE and config.get("feasibility_check", True):
+        run_report["feasibility"] = _diagnose_infeasible(problem, issues)
+    elif issues:
+        run_report["feasibility"] = {"feasible": None, "issues": issues}
+    print(f"   Solver profile '{profile_name}': {run_report['status']} in {run_report['wall_time']}s "
+          f"(objective={run_report['objective']}, bound={run_report['best_bound']})")
+    
+    # ==================== BUILD TIMETABLE ====================
+    if status == cp_model.OPTIMAL or status == cp_model.FEASIBLE:
+        print(f"✅ CSP Solver found {'optimal' if status == cp_model.OPTIMAL else 'feasible'} solution")
+        timetable = _extract_timetable(problem, assignments, solver.Value)
+    elif config.get("heuristic_fallback", True):
+        print(f"⚠️ CSP Solver could not find solution (status: {status}), using heuristic fallback")
+        run_report["heuristic"] = {}
+        timetable = _generate_fallback_timetable(problem, run_report["heuristic"])
+    else:
+        print(f"⚠️ CSP Solver could not find solution (status: {status})")
+        timetable = CompactTimetable(problem["classes"], problem["days"], problem["slots"])
+    
+    if report is not None:
+        report.update(run_report)
+    return _as_requested(timetable, compact)
+
+
+def _infeasible_config(problem, config, issues, report):
+    """Report a config that failed the cheap feasibility checks, without solving"""
+    from .feasibility import explain
+    analysis = {"feasible": False, "issues": issues, "conflict": None, "minimal": False}
+    analysis["explanation"] = explain(analysis)
+    print(f"❌ Config cannot be scheduled: {analysis['explanation']}")
+    run_report = {"status": "INFEASIBLE", "objective": None, "best_bound": None, "fallback": True,
+                  "feasibility": analysis}
+    if config.get("heuristic_fallback", True):
+        # Best effort only: local search cannot repair a config that is infeasible
+        from .heuristic_scheduler import heuristic_timetable
+        run_report["heuristic"] = {}
+        timetable = heuristic_timetable(problem, run_report["heuristic"])
+    else:
+        timetable = CompactTimetable(problem["classes"], problem["days"], problem["slots"])
+    if report is not None:
+        report.update(run_report)
+    return timetable
+
+
+def _diagnose_infeasible(problem, issues):
+    """Minimal conflicting set of requirements for a model CP-SAT proved infeasible"""
+    from .feasibility import find_conflict, explain
+    status, conflict, minimal = find_conflict(problem)
+    analysis = {"feasible": False if status == "INFEASIBLE" else None, "issues": issues,
+                "conflict": conflict, "minimal": minimal}
+    analysis["explanation"] = explain(analysis)
+    print(f"❌ Infeasible: {analysis['explanation']}")
+    return analysis
+
+
+def _as_requested(timetable, compact):
+    """Return a timetable as CompactTimetable (compact) or in the dict shape"""
+    if compact:
+        return CompactTimetable.from_dict(timetable)
+    return timetable.to_dict() if isinstance(timetable, CompactTimetable) else timetable
+
+
+def _solve(model, profile, problem, assignments, progress_callback=None, stop_event=None,
+           stream_solutions=False):
+    """
+    Solve a model with a resolved solver profile.
+    
+    Returns:
+        (solver, status)
+    """
+    solver = cp_model.CpSolver()
+    apply_solver_profile(solver, profile)
+    
+    solve_done = threading.Event()
+    if stop_event is not None:
+        threading.Thread(
+            target=_watch_stop_event, args=(solver, stop_event, solve_done), daemon=True
+        ).start()
+    
+    try:
+        if progress_callback is not None:
+            callback = _ProgressCallback(
+                progress_callback, problem, assignments if stream_solutions else None
+            )
+            status = solver.Solve(model, callback)
+        else:
+            status = solver.Solve(model)
+    finally:
+        solve_done.set()
+    
+    return solver, status
+
+
+def _apply_warm_start(model, problem, assignments, index, warm_start):
+    """
+    Seed the model with a previous timetable.
+    
+    Every variable gets a hint (1 if the previous timetable has that exact
+    subject and faculty in every cell it covers), agreeing with the previous timetable is
+    added to the objective below the preference weight, and classes listed in
+    warm_start["fixed_classes"] keep their previous cells when all of them are
+    still representable in the current model.
+    
+    Returns:
+        dict: {"hinted_cells", "fixed_classes", "free_classes"}
+    """
+    previous = warm_start.get("timetable") or {}
+    requested_fixed = set(warm_start.get("fixed_classes") or [])
+    classes = problem["classes"]
+    subjects = problem["subjects"]
+    days = problem["days"]
+    slots = problem["slots"]
+    
+    def previous_entry(c, d, s):
+        class_data = previous.get(classes[c]) or {}
+        return (class_data.get(days[d]) or {}).get(slots[s])
+    
+    # Variables matching the previous timetable, per class
+    matched = {}
+    matched_cells = {}
+    for (c, d, s, subj, f), var in assignments.items():
+        faculty_name = problem["faculty_names"][f]
+        duration = problem["durations"][(c, subj)]
+        entries = [previous_entry(c, d, covered) for covered in range(s, s + duration)]
+        if all(
+            entry
+            and (entry.get("subject") or "").lower() == subjects[subj].get("name", "").lower()
+            and (entry.get("faculty") or "") == faculty_name
+            for entry in entries
+        ):
+            matched.setdefault(c, []).append(var)
+            matched_cells[c] = matched_cells.get(c, 0) + duration
+    
+    for c, class_vars in matched.items():
+        for var in class_vars:
+            model.AddHint(var, 1)
+    matched_vars = {var.Index() for class_vars in matched.values() for var in class_vars}
+    for var in assignments.values():
+        if var.Index() not in matched_vars:
+            model.AddHint(var, 0)
+    
+    # Fix classes whose previous cells can all be reproduced
+    fixed_classes = []
+    for c, class_name in enumerate(classes):
+        if class_name not in requested_fixed or class_name not in previous:
+            continue
+        filled = sum(
+            1 for d in range(len(days)) for s in range(len(slots)) if previous_entry(c, d, s)
+        )
+        if filled == 0 or filled != matched_cells.get(c, 0):
+            continue
+        for var in matched[c]:
+            model.Add(var == 1)
+        for var in index["by_class"].get(c, []):
+            if var.Index() not in matched_vars:
+                model.Add(var == 0)
+        fixed_classes.append(class_name)
+    
+    # Minimal disruption: prefer keeping previous cells, below the preference weight
+    stable = [var for class_vars in matched.values() for var in class_vars]
+    if stable:
+        model.Maximize(10 * _weighted(index["preference_bonus"]) + cp_model.LinearExpr.Sum(stable))
+    
+    return {
+        "hinted_cells": len(stable),
+        "fixed_classes": fixed_classes,
+        "free_classes": [name for name in classes if name not in fixed_classes]
+    }
+
+
+def _watch_stop_event(solver, stop_event, solve_done):
+    """Stop the running search as soon as stop_event is set"""
+    while not solve_done.is_set():
+        if stop_event.wait(0.2):
+            if not solve_done.is_set():
+                solver.StopSearch()
+            return
+
+
+class _ProgressCallback(cp_model.CpSolverSolutionCallback):
+    """
+    Reports every improving solution to a progress callback.
+    When assignments are given, the compact solution is attached as "timetable".
+    """
+    
+    def __init__(self, callback, problem=None, assignments=None):
+        super().__init__()
+        self._callback = callback
+        self._problem = problem
+        self._assignments = assignments
+        self._solutions = 0
+    
+    def on_solution_callback(self):
+        self._solutions += 1
+        info = {
+            "solutions": self._solutions,
+            "objective": self.ObjectiveValue(),
+            "best_bound": self.BestObjectiveBound(),
+            "elapsed": round(self.WallTime(), 3)
+        }
+        if self._assignments is not None:
+            info["timetable"] = _compact_solution(self._problem, self._assignments, self.Value)
+        if self._callback(info):
+            self.StopSearch()
+
+
+def _compact_solution(problem, assignments, value):
+    """
+    Compact form of a solution for streaming: string tables plus one
+    [class, day, start slot, subject, faculty, length] index row per session.
+    
+    Returns:
+        dict: {"classes", "days", "slots", "subjects", "faculties", "cells"}
+    """
+    return {
+        "classes": problem["classes"],
+        "days": problem["days"],
+        "slots": problem["slots"],
+        "subjects": [subject.get("name", "Unknown") for subject in problem["subjects"]],
+        "faculties": problem["faculty_names"],
+        "cells": [
+            list(key) + [problem["durations"][(key[0], key[3])]]
+            for key, var in assignments.items() if value(var) == 1
+        ]
+    }
+
+
+def _build_problem(data, config):
+    """
+    Normalize scheduler input into index-based form.
+    
+    Only (class, subject, faculty) triples permitted by subjects_by_class,
+    lesson_hours and faculty_choices are listed, so the model built from the
+    problem scales with the number of legal assignments.
+    
+    Returns:
+        dict: {
+            "classes", "subjects", "faculties", "rooms", "days", "slots",
+            "faculty_names": [name per faculty index] (["TBD"] without faculties),
+            "class_subjects": {c: [subj, ...]},
+            "allowed_faculties": {(c, subj): [f, ...]},
+            "preferred": {(c, subj, f), ...},
+            "required_hours": {(c, subj): hours},
+            "sessions": {(c, subj): weekly sessions, ceil(hours / duration)},
+            "triples": [(c, subj, f), ...],
+            "room_types": {(c, subj): "lab" | "classroom"},
+            "rooms_by_type": {room_type: [room_idx, ...]},
+            "durations": {(c, subj): contiguous slots per session},
+            "batches": {c: [batch names]},
+            "rooms_needed": {(c, subj): rooms used at once (one per batch for labs)}
+        }
+    """
+    classes = data.get("classes", [])
+    subjects = data.get("subjects", [])
+    faculties = data.get("faculties", [])
+    rooms = data.get("rooms", [])
+    
     lectures_per_day = config.get("lectures_per_day", 6)
     lesson_hours = config.get("lesson_hours", {})
     faculty_choices = config.get("faculty_choices", {})
+    subjects_by_class = config.get("subjects_by_class") or data.get("subjects_by_class") or {}
     
     # Time structure
     days = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday"]
-    num_days = len(days)
     slots = [f"L{i+1}" for i in range(lectures_per_day)]
-    num_slots = len(slots)
     
-    # Create indices
-    num_classes = len(classes)
-    num_subjects = len(subjects)
+    # Subject lookup (case insensitive, first match wins)
+    subject_index = {}
+    for idx, subject in enumerate(subjects):
+        subject_index.setdefault(subject.get("name", "").lower(), idx)
+    
+    # Required hours per (class, subject)
+    required_hours = {}
+    for c, class_name in enumerate(classes):
+        class_lessons = lesson_hours.get(class_name, [])
+        if isinstance(class_lessons, list):
+            for lesson in class_lessons:
+                subj_idx = subject_index.get(lesson.get("subject", "").lower())
+                hours_required = lesson.get("hours", 0)
+                if subj_idx is not None and hours_required > 0:
+                    required_hours[(c, subj_idx)] = hours_required
+    
+    # Subjects each class may be taught: its subjects_by_class entry plus anything
+    # it has lesson hours for. Classes with neither may take any subject.
+    class_subjects = {}
+    subject_types = {}  # (c, subj) -> subject type from the class's subject list
+    subject_durations = {}  # (c, subj) -> duration_slots from the class's subject list
+    for c, class_name in enumerate(classes):
+        allowed = set()
+        for subject in subjects_by_class.get(class_name) or []:
+            subj_idx = subject_index.get((subject.get("name") or "").strip().lower())
+            if subj_idx is not None:
+                allowed.add(subj_idx)
+                subject_types[(c, subj_idx)] = subject.get("type") or "lecture"
+                subject_durations[(c, subj_idx)] = subject.get("duration_slots")
+        allowed.update(subj for (cls, subj) in required_hours if cls == c)
+        class_subjects[c] = sorted(allowed) if allowed else list(range(len(subjects)))
+    
+    # Faculty choices per (class, subject). If NO faculty chose a subject, we
+    # allow anyone (fallback). Without any faculties a single "TBD" slot is used.
     num_faculties = len(faculties) if faculties else 1
-    num_rooms = len(rooms) if rooms else 1
+    faculty_names = [faculty.get("name", "TBD") for faculty in faculties] if faculties else ["TBD"]
+    chosen = {}
+    for f, faculty in enumerate(faculties):
+        faculty_prefs = faculty_choices.get(faculty.get("name", ""), {})
+        for c, class_name in enumerate(classes):
+            for choice in faculty_prefs.get(class_name, []):
+                subj_idx = subject_index.get(choice.lower())
+                if subj_idx is not None:
+                    chosen.setdefault((c, subj_idx), set()).add(f)
+    
+    allowed_faculties = {}
+    preferred = set()
+    triples = []
+    for c in range(len(classes)):
+        for subj in class_subjects[c]:
+            if (c, subj) in chosen:
+                allowed = sorted(chosen[(c, subj)])
+                preferred.update((c, subj, f) for f in allowed)
+            else:
+                allowed = list(range(num_faculties))
+            allowed_faculties[(c, subj)] = allowed
+            triples.extend((c, subj, f) for f in allowed)
+    
+    # Rooms: labs need a lab room, everything else a classroom
+    rooms_by_type = {}
+    for r, room in enumerate(rooms):
+        rooms_by_type.setdefault((room.get("type") or "classroom").lower(), []).append(r)
+    # Sessions: multi-slot subjects are scheduled as contiguous blocks, and a lab
+    # for a class with batches runs all batches in parallel, one lab room each
+    batches_by_class = data.get("batches") or {}
+    batches = {c: list(batches_by_class.get(class_name) or []) for c, class_name in enumerate(classes)}
+    room_types = {}
+    durations = {}
+    rooms_needed = {}
+    for c in range(len(classes)):
+        for subj in class_subjects[c]:
+            subject_type = subject_types.get((c, subj)) or subjects[subj].get("type") or "lecture"
+            room_type = "lab" if subject_type == "lab" else "classroom"
+            room_types[(c, subj)] = room_type
+            duration = subject_durations.get((c, subj)) or subjects[subj].get("duration_slots") or 1
+            durations[(c, subj)] = max(1, min(int(duration), len(slots)))
+            # Not capped at the rooms there are: a lab with more batches than labs
+            # cannot run, which the room capacity constraint makes infeasible
+            rooms_needed[(c, subj)] = len(batches[c]) if subject_type == "lab" and batches[c] else 1
+    # Weekly sessions of subjects with lesson hours: multi-slot subjects get
+    # hours / duration sessions (rounded up)
+    sessions = {key: -(-hours // durations[key]) for key, hours in required_hours.items()}
+    
+    return {
+        "classes": classes,
+        "subjects": subjects,
+        "faculties": faculties,
+        "faculty_names": faculty_names,
+        "rooms": rooms,
+        "days": days,
+        "slots": slots,
+        "class_subjects": class_subjects,
+        "allowed_faculties": allowed_faculties,
+        "preferred": preferred,
+        "required_hours": required_hours,
+        "sessions": sessions,
+        "triples": triples,
+        "room_types": room_types,
+        "rooms_by_type": rooms_by_type,
+        "durations": durations,
+        "batches": batches,
+        "rooms_needed": rooms_needed
+    }
+
+
+def _build_model(problem, relaxable=None):
+    """
+    Build the CP-SAT model over the sparse set of legal assignments.
+    
+    Every constraint sums over a precomputed per-key list of variables
+    instead of scanning the full class x day x slot x subject x faculty space.
+    Subjects longer than one slot (labs, projects) get one variable per
+    possible block start, backed by an optional interval, and classes or
+    faculties that have such blocks use NoOverlap instead of per-slot
+    at-most-one constraints.
+    
+    When a relaxable dict is given (infeasibility diagnosis, see
+    feasibility), the HOD-configurable constraints (lesson hours, coverage,
+    daily subject limit, room capacity) are enforced only under one
+    literal per constraint group, stored in relaxable by group key.
+    
+    Returns:
+        (model, assignments, index) where assignments maps
+        (c, d, s, subj, f) -> BoolVar (s is the start slot of the block for
+        multi-slot subjects) and index holds the per-key variable lists.
+    """
+    num_days = len(problem["days"])
+    num_slots = len(problem["slots"])
+    durations = problem["durations"]
     
-    # Create the model
     model = cp_model.CpModel()
     
     # Decision variables
-    # x[c, d, s, subj, f] = 1 if class c has subject subj with faculty f on day d, slot s
+    # x[c, d, s, subj, f] = 1 if class c has subject subj with faculty f on day d,
+    # starting at slot s and lasting durations[(c, subj)] slots
     assignments = {}
+    intervals = {}            # (c, d, s, subj, f) -> optional interval
+    by_cell = {}              # (c, d, s) -> vars covering the cell
+    by_faculty_slot = {}      # (f, d, s) -> vars covering the slot
+    by_class_subject = {}     # (c, subj) -> vars
+    by_class_day_subject = {} # (c, d, subj) -> vars
+    by_class = {}             # c -> vars
+    class_slot_terms = {}     # c -> [(var, slots covered)]
+    by_room_type_slot = {}    # (room_type, d, s) -> [(var, rooms needed)]
+    preference_bonus = []     # [(var, slots covered)]
+    block_classes = set()
+    block_faculties = set()
     
-    for c in range(num_classes):
+    for (c, subj, f) in problem["triples"]:
+        preferred = (c, subj, f) in problem["preferred"]
+        room_type = problem["room_types"][(c, subj)]
+        rooms_needed = problem["rooms_needed"][(c, subj)]
+        duration = durations[(c, subj)]
+        if duration > 1:
+            block_classes.add(c)
+            block_faculties.add(f)
         for d in range(num_days):
-            for s in range(num_slots):
-                for subj in range(num_subjects):
-                    for f in range(num_faculties):
-                        var_name = f"x_c{c}_d{d}_s{s}_subj{subj}_f{f}"
-                        assignments[(c, d, s, subj, f)] = model.NewBoolVar(var_name)
+            for s in range(num_slots - duration + 1):
+                var = model.NewBoolVar(f"x_c{c}_d{d}_s{s}_subj{subj}_f{f}")
+                key = (c, d, s, subj, f)
+                assignments[key] = var
+                if duration > 1:
+                    intervals[key] = model.NewOptionalFixedSizeIntervalVar(
+                        s, duration, var, f"block_c{c}_d{d}_s{s}_subj{subj}_f{f}"
+                    )
+                for covered in range(s, s + duration):
+                    by_cell.setdefault((c, d, covered), []).append(var)
+                    by_faculty_slot.setdefault((f, d, covered), []).append(var)
+                    by_room_type_slot.setdefault((room_type, d, covered), []).append((var, rooms_needed))
+                by_class_subject.setdefault((c, subj), []).append(var)
+                by_class_day_subject.setdefault((c, d, subj), []).append(var)
+                by_class.setdefault(c, []).append(var)
+                class_slot_terms.setdefault(c, []).append((var, duration))
+                if preferred:
+                    preference_bonus.append((var, duration))
+    
+    def single_slot_interval(key):
+        # Size-1 intervals for lectures that share a NoOverlap with blocks
+        if key not in intervals:
+            c, d, s, subj, f = key
+            intervals[key] = model.NewOptionalFixedSizeIntervalVar(
+                s, 1, assignments[key], f"slot_c{c}_d{d}_s{s}_subj{subj}_f{f}"
+            )
+        return intervals[key]
+    
+    def enforce(constraint, key):
+        if relaxable is not None:
+            if key not in relaxable:
+                relaxable[key] = model.NewBoolVar("assume_" + "_".join(str(part) for part in key))
+            constraint.OnlyEnforceIf(relaxable[key])
     
     # ==================== CONSTRAINTS ====================
     
     # Constraint 1: Each class must have exactly one subject per slot (or empty)
-    for c in range(num_classes):
-        for d in range(num_days):
-            for s in range(num_slots):
-                model.Add(
-                    sum(assignments[(c, d, s, subj, f)] 
-                        for subj in range(num_subjects) 
-                        for f in range(num_faculties)) <= 1
-                )
+    class_day_keys = {}
+    for key in assignments:
+        if key[0] in block_classes:
+            class_day_keys.setdefault((key[0], key[1]), []).append(key)
+    for keys in class_day_keys.values():
+        model.AddNoOverlap([single_slot_interval(key) for key in keys])
+    for (c, d, s), cell_vars in by_cell.items():
+        if c not in block_classes:
+            model.AddAtMostOne(cell_vars)
     
     # Constraint 2: Faculty cannot teach two classes at the same time
-    for f in range(num_faculties):
-        for d in range(num_days):
-            for s in range(num_slots):
-                model.Add(
-                    sum(assignments[(c, d, s, subj, f)] 
-                        for c in range(num_classes) 
-                        for subj in range(num_subjects)) <= 1
-                )
-    
-    # Constraint 3: Subject hours per week (from lesson_hours config)
-    for c, class_name in enumerate(classes):
-        class_lessons = lesson_hours.get(class_name, [])
-        if isinstance(class_lessons, list):
-            for lesson in class_lessons:
-                subject_name = lesson.get("subject", "")
-                hours_required = lesson.get("hours", 0)
-                
-                # Find subject index
-                subj_idx = None
-                for idx, subj in enumerate(subjects):
-                    if subj.get("name", "").lower() == subject_name.lower():
-                        subj_idx = idx
-                        break
-                
-                if subj_idx is not None and hours_required > 0:
-                    # Total assignments for this subject in this class should match hours
-                    model.Add(
-                        sum(assignments[(c, d, s, subj_idx, f)]
-                            for d in range(num_days)
-                            for s in range(num_slots)
-                            for f in range(num_faculties)) == hours_required
-                    )
-    
-    # Constraint 3.5: Restrict faculty assignments to their choices
-    # Only faculties who explicitly chose a subject for a class can teach it.
-    # If NO faculty chose a subject, we allow anyone (fallback).
+    faculty_day_keys = {}
+    for key in assignments:
+        if key[4] in block_faculties:
+            faculty_day_keys.setdefault((key[4], key[1]), []).append(key)
+    for keys in faculty_day_keys.values():
+        if len(keys) > 1:
+            model.AddNoOverlap([single_slot_interval(key) for key in keys])
+    for (f, d, s), slot_vars in by_faculty_slot.items():
+        if f not in block_faculties and len(slot_vars) > 1:
+            model.AddAtMostOne(slot_vars)
     
-    # Pre-compute allowed faculties for each (class, subject)
-    allowed_faculties = {} # (class_idx, subject_idx) -> [faculty_indices]
-    
-    for c, class_name in enumerate(classes):
-        for subj_idx, subject in enumerate(subjects):
-            subject_name = subject.get("name", "")
-            allowed = []
-            
-            for f, faculty in enumerate(faculties):
-                faculty_name = faculty.get("name", "")
-                # Check choices
-                f_choices = faculty_choices.get(faculty_name, {}).get(class_name, [])
-                # Case insensitive check
-                if any(choice.lower() == subject_name.lower() for choice in f_choices):
-                    allowed.append(f)
-            
-            allowed_faculties[(c, subj_idx)] = allowed
-
-    # Apply constraints
-    for c in range(num_classes):
-        for subj in range(num_subjects):
-            allowed = allowed_faculties.get((c, subj), [])
-            
-            if allowed:
-                # If there are faculties who chose this subject, restrict to them
-                # For any faculty f NOT in allowed, set assignments to 0
-                for f in range(num_faculties):
-                    if f not in allowed:
-                        for d in range(num_days):
-                            for s in range(num_slots):
-                                model.Add(assignments[(c, d, s, subj, f)] == 0)
+    # Constraint 3: Subject hours per week (from lesson_hours config), as
+    # problem["sessions"] sessions
+    for key, sessions in problem["sessions"].items():
+        enforce(model.Add(sum(by_class_subject.get(key, [])) == sessions), ("hours",) + key)
     
     # Constraint 4: Faculty-subject preferences (soft constraint via objective)
-    # Build a preference score matrix
-    preference_bonus = []
-    
-    for c, class_name in enumerate(classes):
-        for f, faculty in enumerate(faculties if faculties else [{"name": "TBD"}]):
-            faculty_name = faculty.get("name", "")
-            faculty_prefs = faculty_choices.get(faculty_name, {})
-            class_prefs = faculty_prefs.get(class_name, [])
-            
-            for subj_idx, subject in enumerate(subjects):
-                subject_name = subject.get("name", "")
-                
-                # Check if this faculty prefers this subject for this class
-                if subject_name in class_prefs or subject_name.lower() in [p.lower() for p in class_prefs]:
-                    # Add bonus for preferred assignments
-                    for d in range(num_days):
-                        for s in range(num_slots):
-                            preference_bonus.append(assignments[(c, d, s, subj_idx, f)] * 10)
+    # Preferred triples were collected while creating variables above.
     
     # Constraint 5: Ensure minimum coverage - each class should have some assignments
-    for c in range(num_classes):
-        # At least some slots should be filled (e.g., 50% of total)
-        min_slots = (num_days * num_slots) // 2
-        model.Add(
-            sum(assignments[(c, d, s, subj, f)]
-                for d in range(num_days)
-                for s in range(num_slots)
-                for subj in range(num_subjects)
-                for f in range(num_faculties)) >= min_slots
-        )
+    # At least some slots should be filled (e.g., 50% of total)
+    min_slots = (num_days * num_slots) // 2
+    for c in range(len(problem["classes"])):
+        terms = class_slot_terms.get(c, [])
+        enforce(model.Add(_weighted(terms) >= min_slots), ("coverage", c))
     
-    # Constraint 6: Avoid same subject multiple times in a day (soft - at most 2)
-    for c in range(num_classes):
-        for d in range(num_days):
-            for subj in range(num_subjects):
-                model.Add(
-                    sum(assignments[(c, d, s, subj, f)]
-                        for s in range(num_slots)
-                        for f in range(num_faculties)) <= 2
-                )
+    # Constraint 6: Avoid same subject multiple times in a day (soft - at most 2;
+    # at most one block for multi-slot subjects)
+    for (c, d, subj), day_vars in by_class_day_subject.items():
+        limit = 2 if durations[(c, subj)] == 1 else 1
+        if len(day_vars) > limit:
+            enforce(model.Add(sum(day_vars) <= limit), ("daily", c, subj))
+    
+    # Constraint 7: Room capacity - per slot, no more rooms of a type in use than
+    # rooms of that type (a lab with batches uses one lab per batch). Specific
+    # rooms are handed out after solving, so the model size does not grow with
+    # the number of rooms.
+    for (room_type, d, s), terms in by_room_type_slot.items():
+        capacity = len(problem["rooms_by_type"].get(room_type, []))
+        if capacity and sum(w for _, w in terms) > capacity:
+            enforce(model.Add(_weighted(terms) <= capacity), ("rooms", room_type))
     
     # ==================== OBJECTIVE ====================
-    # Maximize preference satisfaction
+    # Maximize preference satisfaction (per taught slot)
     if preference_bonus:
-        model.Maximize(sum(preference_bonus))
+        model.Maximize(10 * _weighted(preference_bonus))
     
-    # ==================== SOLVE ====================
-    solver = cp_model.CpSolver()
-    solver.parameters.max_time_in_seconds = 30.0  # Timeout after 30 seconds
+    index = {
+        "preference_bonus": preference_bonus,
+        "by_cell": by_cell,
+        "by_faculty_slot": by_faculty_slot,
+        "by_class_subject": by_class_subject,
+        "by_class_day_subject": by_class_day_subject,
+        "by_class": by_class,
+        "by_room_type_slot": by_room_type_slot,
+        "intervals": intervals
+    }
+    return model, assignments, index
+
+
+def _weighted(terms):
+    """Linear expression for [(var, weight), ...]"""
+    return cp_model.LinearExpr.WeightedSum([var for var, _ in terms], [w for _, w in terms])
+
+
+def _extract_timetable(problem, assignments, value):
+    """
+    Build the timetable (a CompactTimetable) from solved assignments.
     
-    status = solver.Solve(model)
+    Multi-slot sessions fill every slot they cover and carry
+    "block": {"start", "length"}; labs for classes with batches carry
+    "batches": [{"batch", "room"}, ...].
     
-    # ==================== BUILD TIMETABLE ====================
-    timetable = {}
+    Args:
+        value: callable returning the solved value of a variable (e.g. solver.Value)
+    """
+    classes = problem["classes"]
+    subjects = problem["subjects"]
+    rooms = problem["rooms"]
+    days = problem["days"]
+    slots = problem["slots"]
     
-    if status == cp_model.OPTIMAL or status == cp_model.FEASIBLE:
-        print(f"✅ CSP Solver found {'optimal' if status == cp_model.OPTIMAL else 'feasible'} solution")
-        
-        for c, class_name in enumerate(classes):
-            timetable[class_name] = {}
+    timetable = CompactTimetable(classes, days, slots)
+    
+    booked = {}  # d -> [(c, s, subj, f)]
+    for (c, d, s, subj_idx, f_idx), var in assignments.items():
+        if value(var) == 1:
+            booked.setdefault(d, []).append((c, s, subj_idx, f_idx))
+    
+    for d, sessions in booked.items():
+        for (c, s, subj_idx, f_idx), room_indices in _assign_rooms(problem, sessions):
+            faculty_name = problem["faculty_names"][f_idx]
+            room_names = [rooms[r].get("room", "TBD") for r in room_indices]
+            duration = problem["durations"][(c, subj_idx)]
             
-            for d, day in enumerate(days):
-                timetable[class_name][day] = {}
-                
-                for s, slot in enumerate(slots):
-                    assigned = False
-                    
-                    for subj_idx, subject in enumerate(subjects):
-                        for f_idx in range(num_faculties):
-                            if solver.Value(assignments[(c, d, s, subj_idx, f_idx)]) == 1:
-                                faculty_name = "TBD"
-                                if faculties and f_idx < len(faculties):
-                                    faculty_name = faculties[f_idx].get("name", "TBD")
-                                
-                                timetable[class_name][day][slot] = {
-                                    "subject": subject.get("name", "Unknown"),
-                                    "faculty": faculty_name,
-                                    "room": rooms[0].get("room", "TBD") if rooms else "TBD"
-                                }
-                                assigned = True
-                                break
-                        if assigned:
-                            break
-                    
-                    if not assigned:
-                        timetable[class_name][day][slot] = None
-    else:
-        print(f"⚠️ CSP Solver could not find solution (status: {status}), using fallback")
-        timetable = _generate_fallback_timetable(classes, subjects, faculties, days, slots)
+            entry = {
+                "subject": subjects[subj_idx].get("name", "Unknown"),
+                "faculty": faculty_name,
+                "room": room_names[0] if room_names else "TBD"
+            }
+            if duration > 1:
+                entry["block"] = {"start": slots[s], "length": duration}
+            batches = problem["batches"][c]
+            if batches and problem["room_types"][(c, subj_idx)] == "lab":
+                # One room per batch, never shared; batches left without one (no
+                # rooms of the type, or an unrepaired capacity clash) get "TBD"
+                entry["batches"] = [
+                    {"batch": batch, "room": room_names[i] if i < len(room_names) else "TBD"}
+                    for i, batch in enumerate(batches)
+                ]
+            
+            for covered in range(s, s + duration):
+                timetable.set_entry(c, d, covered, entry)
     
-    return timetable
+    return timetable.shrink()
+
+
+def _assign_rooms(problem, sessions):
+    """
+    Hand out concrete rooms for the sessions booked on one day.
+    
+    Sessions are processed in start order and keep the same rooms for all
+    the slots they cover; since the model caps per-slot room use at the
+    number of rooms of each type, a room that is free at a session's start
+    stays free until it ends (interval colouring). Each class prefers a
+    stable "home" room of the needed type. Types without rooms get none.
+    
+    Args:
+        sessions: [(c, start, subj, f), ...] booked on the day
+    
+    Returns:
+        list: [((c, start, subj, f), [room_idx, ...]), ...]
+    """
+    busy_until = {}  # room_idx -> first free slot
+    assigned = []
+    
+    for session in sorted(sessions, key=lambda item: (item[1], item[0])):
+        c, start, subj, _f = session
+        candidates = problem["rooms_by_type"].get(problem["room_types"][(c, subj)], [])
+        end = start + problem["durations"][(c, subj)]
+        needed = problem["rooms_needed"][(c, subj)] if candidates else 0
+        
+        # Home room first, then the rest of the rooms of that type in order
+        home = c % len(candidates) if candidates else 0
+        ordered = candidates[home:] + candidates[:home]
+        chosen = [r for r in ordered if busy_until.get(r, 0) <= start][:needed]
+        for r in chosen:
+            busy_until[r] = end
+        assigned.append((session, chosen))
+    
+    return assigned
 
 
 def _generate_empty_timetable(classes):
@@ -259,44 +769,25 @@ def _generate_empty_timetable(classes):
     return timetable
 
 
-def _generate_fallback_timetable(classes, subjects, faculties, days, slots):
+def _generate_fallback_timetable(problem, report=None):
     """
-    Fallback to simple round-robin assignment if CSP fails.
-    Uses a class-dependent starting offset so each class gets a different
-    timetable pattern (avoids BEA and BEB showing identical schedules).
+    Fallback if CSP fails (infeasible or timed out without a solution): the
+    construction heuristic, which keeps lesson hours, faculty choices and
+    clash rules as far as it can (see heuristic_scheduler). If it leaves
+    sessions unplaced, local search repairs the result (see local_search).
     """
-    timetable = {}
-    n_subj = len(subjects) or 1
-    n_fac = len(faculties) or 1
-
-    for c, class_name in enumerate(classes):
-        timetable[class_name] = {}
-        # Start each class at a different point in the round-robin so timetables differ
-        subject_index = (c * 5) % n_subj
-
-        for day in days:
-            timetable[class_name][day] = {}
-
-            for slot in slots:
-                if not subjects:
-                    timetable[class_name][day][slot] = None
-                    continue
-
-                subject = subjects[subject_index % len(subjects)]
-                faculty = faculties[subject_index % len(faculties)] if faculties else {"name": "TBD"}
-
-                timetable[class_name][day][slot] = {
-                    "subject": subject.get("name", "Unknown"),
-                    "faculty": faculty.get("name", "TBD"),
-                    "room": "TBD"
-                }
-
-                subject_index += 1
-
-    return timetable
+    from .heuristic_scheduler import heuristic_timetable
+    from .local_search import local_search_timetable, sessions_from_timetable
+    report = {} if report is None else report
+    timetable = heuristic_timetable(problem, report)
+    if report.get("status") == "COMPLETE":
+        return timetable
+    report["local_search"] = {}
+    sessions, _ = sessions_from_timetable(problem, timetable)
+    return local_search_timetable(problem, sessions, report["local_search"])
 
 
 # For backward compatibility
-def generate_timetable(data, config=None):
+def generate_timetable(data, config=None, report=None):
     """Wrapper function for backward compatibility"""
-    return generate_timetable_csp(data, config)
+    return generate_timetable_csp(data, config, report)
@@ -0,0 +1,265 @@
+"""
+Decomposition of the scheduling problem into independent components.
+
+Classes that share no faculty (through the legal class/subject/faculty
+triples) cannot interact in the model, so each connected component of the
+class-faculty bipartite graph is solved as its own CP-SAT model in a process
+pool and the results are merged back into one timetable. Rooms are the only
+other shared resource; the components are only solved separately when every
+one of them can get all the rooms it could ever use at once, so the merged
+timetable cannot double-book a room and no component is over-constrained.
+"""
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from .solver_profiles import resolve_solver_profile
+
+
+def split_components(problem):
+    """
+    Group classes into connected components of the class-faculty graph.
+
+    Args:
+        problem: normalized problem from csp_scheduler._build_problem
+
+    Returns:
+        list: [[class_idx, ...], ...], largest component first
+    """
+    num_classes = len(problem["classes"])
+    parent = list(range(num_classes))
+
+    def find(c):
+        while parent[c] != c:
+            parent[c] = parent[parent[c]]
+            c = parent[c]
+        return c
+
+    # Union classes through each faculty they may be taught by
+    first_class_of_faculty = {}
+    for (c, _subj, f) in problem["triples"]:
+        other = first_class_of_faculty.setdefault(f, c)
+        root_a, root_b = find(c), find(other)
+        if root_a != root_b:
+            parent[root_a] = root_b
+
+    components = {}
+    for c in range(num_classes):
+        components.setdefault(find(c), []).append(c)
+
+    return sorted(components.values(), key=lambda members: (-len(members), members[0]))
+
+
+def partition_rooms(problem, components):
+    """
+    Split the rooms of each type between components so that no component
+    could ever use a room reserved for another.
+
+    A component's peak demand for a room type is the most rooms of that
+    type it can use at once: per class, the largest rooms_needed of its
+    subjects of that type (a class has one session at a time), so a lab
+    with batches counts one room per batch. Each component gets its peak,
+    and spare rooms are dealt out in turn.
+
+    Returns:
+        list: [[room_idx, ...] per component], or None when the peaks of some
+        room type exceed its rooms: the components then compete for those
+        rooms and are coupled, so the problem is solved whole
+    """
+    shares = [[] for _ in components]
+
+    for room_type, room_indices in problem["rooms_by_type"].items():
+        peaks = [
+            sum(
+                max((
+                    problem["rooms_needed"][(c, subj)] for subj in problem["class_subjects"][c]
+                    if problem["room_types"][(c, subj)] == room_type
+                ), default=0)
+                for c in members
+            )
+            for members in components
+        ]
+        needing = [i for i, peak in enumerate(peaks) if peak]
+        if not needing:
+            continue
+        if sum(peaks) > len(room_indices):
+            return None
+
+        counts = list(peaks)
+        for extra in range(len(room_indices) - sum(peaks)):
+            counts[needing[extra % len(needing)]] += 1
+
+        position = 0
+        for i, count in enumerate(counts):
+            shares[i].extend(room_indices[position:position + count])
+            position += count
+
+    return [sorted(share) for share in shares]
+
+
+def component_input(data, config, problem, class_indices, warm_start=None, room_indices=None):
+    """
+    Restrict the scheduler input to one component.
+
+    Args:
+        room_indices: rooms reserved for this component (see partition_rooms)
+
+    Returns:
+        (data, config, warm_start) for the component's classes and faculties
+    """
+    class_names = [problem["classes"][c] for c in class_indices]
+    class_set = set(class_names)
+    class_index_set = set(class_indices)
+    faculty_indices = sorted({
+        f for (c, _subj, f) in problem["triples"] if c in class_index_set
+    })
+    faculties = problem["faculties"]
+    sub_faculties = [faculties[f] for f in faculty_indices if f < len(faculties)]
+    faculty_names = {faculty.get("name", "") for faculty in sub_faculties}
+
+    sub_data = dict(data)
+    sub_data["classes"] = class_names
+    sub_data["faculties"] = sub_faculties
+    if room_indices is not None:
+        sub_data["rooms"] = [problem["rooms"][r] for r in room_indices]
+
+    sub_config = dict(config)
+    sub_config["decompose"] = False
+    sub_config["lesson_hours"] = {
+        name: lessons for name, lessons in (config.get("lesson_hours") or {}).items()
+        if name in class_set
+    }
+    sub_config["subjects_by_class"] = {
+        name: subjects for name, subjects in (config.get("subjects_by_class") or {}).items()
+        if name in class_set
+    }
+    sub_config["faculty_choices"] = {
+        faculty: {name: choices for name, choices in by_class.items() if name in class_set}
+        for faculty, by_class in (config.get("faculty_choices") or {}).items()
+        if faculty in faculty_names
+    }
+
+    sub_warm_start = None
+    if warm_start:
+        previous = warm_start.get("timetable") or {}
+        sub_warm_start = {
+            "timetable": {name: previous[name] for name in class_names if name in previous},
+            "fixed_classes": [name for name in warm_start.get("fixed_classes") or [] if name in class_set]
+        }
+
+    return sub_data, sub_config, sub_warm_start
+
+
+def _solve_component(data, config, warm_start, stop_event):
+    """Process-pool entry point: solve one component"""
+    from .csp_scheduler import generate_timetable_csp
+
+    report = {}
+    timetable = generate_timetable_csp(data, config, report, stop_event=stop_event, warm_start=warm_start)
+    return timetable, report
+
+
+def solve_decomposed(data, config, problem, components, room_shares=None, report=None,
+                     progress_callback=None, stop_event=None, warm_start=None):
+    """
+    Solve each component in a process pool and merge the timetables.
+    room_shares (from partition_rooms) gives each component its own rooms.
+
+    The profile's workers are shared between the components solved in
+    parallel. progress_callback (if any) is invoked in this process each
+    time a component finishes; stop_event must be picklable (for example a
+    multiprocessing.Manager().Event()) to reach the component solvers.
+
+    Returns:
+        Timetable dict: {class: {day: {slot: {subject, faculty, room}}}}
+    """
+    start = time.perf_counter()
+    profile_name, profile = resolve_solver_profile(config)
+    max_parallel = max(1, min(len(components), os.cpu_count() or 1))
+    workers_per_component = max(1, profile["num_workers"] // max_parallel)
+
+    jobs = []
+    for i, class_indices in enumerate(components):
+        sub_data, sub_config, sub_warm_start = component_input(
+            data, config, problem, class_indices, warm_start,
+            room_shares[i] if room_shares is not None else None
+        )
+        sub_config["solver_options"] = dict(
+            sub_config.get("solver_options") or {}, num_workers=workers_per_component
+        )
+        jobs.append((sub_data, sub_config, sub_warm_start))
+
+    print(f"   Decomposed into {len(components)} independent components "
+          f"(sizes {[len(c) for c in components]}), {max_parallel} in parallel")
+
+    timetable = {}
+    reports = []
+    with ProcessPoolExecutor(max_workers=max_parallel) as executor:
+        futures = [
+            executor.submit(_solve_component, sub_data, sub_config, sub_warm_start, stop_event)
+            for sub_data, sub_config, sub_warm_start in jobs
+        ]
+        for future in as_completed(futures):
+            component_timetable, component_report = future.result()
+            timetable.update(component_timetable)
+            reports.append(component_report)
+            if progress_callback is not None:
+                progress_callback({
+                    "solutions": len(reports),
+                    "objective": sum(r.get("objective") or 0 for r in reports),
+                    "best_bound": None,
+                    "elapsed": round(time.perf_counter() - start, 3)
+                })
+
+    # Keep the original class order
+    timetable = {name: timetable[name] for name in problem["classes"] if name in timetable}
+
+    if report is not None:
+        report.update(_merge_reports(profile_name, profile, reports, components, problem))
+        report["wall_time"] = round(time.perf_counter() - start, 3)
+
+    return timetable
+
+
+def _merge_reports(profile_name, profile, reports, components, problem):
+    """Combine per-component solver reports into one run report"""
+    statuses = [r.get("status") for r in reports]
+    if all(status == "OPTIMAL" for status in statuses):
+        status = "OPTIMAL"
+    elif all(status in ("OPTIMAL", "FEASIBLE") for status in statuses):
+        status = "FEASIBLE"
+    else:
+        status = next(s for s in statuses if s not in ("OPTIMAL", "FEASIBLE"))
+
+    solved = all(r.get("objective") is not None for r in reports)
+    merged = {
+        "profile": profile_name,
+        "parameters": dict(profile),
+        "status": status,
+        "build_time": round(sum(r.get("build_time", 0) for r in reports), 3),
+        "objective": sum(r["objective"] for r in reports) if solved else None,
+        "best_bound": sum(r["best_bound"] for r in reports) if solved else None,
+        "num_variables": sum(r.get("num_variables", 0) for r in reports),
+        "fallback": any(r.get("fallback") for r in reports),
+        "decomposition": {
+            "components": len(components),
+            "classes": [[problem["classes"][c] for c in members] for members in components]
+        }
+    }
+    analyses = [r["feasibility"] for r in reports if r.get("feasibility")]
+    if analyses:
+        merged["feasibility"] = {
+            "feasible": False if any(a["feasible"] is False for a in analyses) else None,
+            "issues": [issue for a in analyses for issue in a["issues"]],
+            "conflict": [issue for a in analyses for issue in a.get("conflict") or []] or None,
+            "minimal": all(a.get("minimal") for a in analyses if a.get("conflict")),
+            "explanation": " ".join(a["explanation"] for a in analyses if a.get("explanation")) or None
+        }
+    warm_starts = [r["warm_start"] for r in reports if r.get("warm_start")]
+    if warm_starts:
+        merged["warm_start"] = {
+            key: sum(w[key] for w in warm_starts) if key == "hinted_cells" else
+            [name for w in warm_starts for name in w[key]]
+            for key in ("hinted_cells", "fixed_classes", "free_classes")
+        }
+    return merged
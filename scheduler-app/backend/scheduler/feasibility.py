@@ -0,0 +1,391 @@
+"""
+Pre-solve feasibility analysis.
+
+check_feasibility runs cheap necessary conditions on the normalized
+problem in milliseconds (lesson hours in whole sessions and vs the week,
+faculty demand vs their slots, daily subject limits, the 50% coverage
+rule, room capacity), so a config that cannot be met is reported before
+any model is built.
+find_conflict handles configs that pass those checks but are still
+infeasible: it ties each HOD-configurable constraint group to a CP-SAT
+assumption literal, takes the infeasible core CP-SAT reports and shrinks
+it to a minimal conflicting set by deletion.
+
+Every issue is a dict {"check", "severity", "message", "suggestion"} with
+"severity" "error" (the timetable cannot satisfy the config) or "warning"
+(the config is probably not what the HOD meant).
+"""
+import time
+
+from ortools.sat.python import cp_model
+
+from .csp_scheduler import _build_problem, _build_model
+
+# Seconds for finding and minimizing an infeasible core
+FEASIBILITY_TIME_LIMIT = 10.0
+
+
+def analyze_feasibility(data, config=None, diagnose=True, time_limit=FEASIBILITY_TIME_LIMIT):
+    """
+    Check whether a timetable config can be satisfied.
+
+    Args:
+        data, config: as for generate_timetable_csp
+        diagnose: if the cheap checks pass, also solve the model without
+                  objective to confirm feasibility or find a minimal conflict
+        time_limit: seconds for the CP-SAT diagnosis
+
+    Returns:
+        dict: {
+            "feasible": True | False | None (unknown),
+            "issues": [issue, ...],
+            "conflict": [issue, ...] or None (minimal set of requirements that cannot hold together),
+            "minimal": whether the conflict was proven minimal,
+            "explanation": text for the HOD (see explain),
+            "wall_time": seconds
+        }
+    """
+    start = time.perf_counter()
+    config = config or {}
+    problem = _build_problem(data, config)
+    issues = check_feasibility(problem, config)
+    result = {"feasible": None, "issues": issues, "conflict": None, "minimal": False}
+
+    if any(issue["severity"] == "error" for issue in issues):
+        result["feasible"] = False
+    elif diagnose and problem["classes"] and problem["subjects"]:
+        status, conflict, minimal = find_conflict(problem, time_limit)
+        if status == "FEASIBLE":
+            result["feasible"] = True
+        elif status == "INFEASIBLE":
+            result.update(feasible=False, conflict=conflict, minimal=minimal)
+
+    result["explanation"] = explain(result)
+    result["wall_time"] = round(time.perf_counter() - start, 3)
+    return result
+
+
+def _issue(check, severity, message, suggestion):
+    return {"check": check, "severity": severity, "message": message, "suggestion": suggestion}
+
+
+def _subject_name(problem, subj):
+    return problem["subjects"][subj].get("name", "Unknown")
+
+
+def _daily_limit(problem, key):
+    """Sessions a day allowed by the model (constraint 6)"""
+    return 2 if problem["durations"][key] == 1 else 1
+
+
+def check_session_lengths(problem):
+    """
+    Lesson hours that are not a multiple of the subject's session length
+    (duration_slots). Every session is a full block, so such hours would be
+    overrun by the last session.
+
+    Args:
+        problem: dict from _build_problem
+
+    Returns:
+        list of "lesson_hours" error issues
+    """
+    issues = []
+    for key in sorted(problem["required_hours"]):
+        hours, duration = problem["required_hours"][key], problem["durations"][key]
+        if hours % duration:
+            fits = [n * duration for n in (hours // duration, hours // duration + 1) if n]
+            issues.append(_issue(
+                "lesson_hours", "error",
+                f"{problem['classes'][key[0]]}: {_subject_name(problem, key[1])} has {hours} lesson hours, "
+                f"not a multiple of its {duration}-slot sessions",
+                f"Set its lesson hours to {' or '.join(str(n) for n in fits)}, or change its session length."
+            ))
+    return issues
+
+
+def check_feasibility(problem, config=None):
+    """
+    Cheap necessary conditions for the CP-SAT model to have a solution.
+
+    Args:
+        problem: dict from _build_problem
+        config: the timetable config (for lesson_hours entries the problem drops)
+
+    Returns:
+        list of issues (empty if nothing was found)
+    """
+    config = config or {}
+    classes = problem["classes"]
+    num_days = len(problem["days"])
+    num_slots = len(problem["slots"])
+    cells = num_days * num_slots
+    min_slots = cells // 2
+    issues = []
+
+    # lesson_hours entries the scheduler ignores
+    known_subjects = {subject.get("name", "").lower() for subject in problem["subjects"]}
+    for class_name, lessons in (config.get("lesson_hours") or {}).items():
+        if class_name not in classes:
+            issues.append(_issue(
+                "lesson_hours", "warning",
+                f"lesson_hours lists class '{class_name}', which does not exist",
+                "Remove the entry or add the class."
+            ))
+            continue
+        for lesson in lessons if isinstance(lessons, list) else []:
+            name = lesson.get("subject", "")
+            if name.lower() not in known_subjects:
+                issues.append(_issue(
+                    "lesson_hours", "warning",
+                    f"{class_name}: lesson_hours lists unknown subject '{name}', its hours are ignored",
+                    "Fix the subject name or add the subject."
+                ))
+
+    # Lesson hours must fill whole sessions
+    issues.extend(check_session_lengths(problem))
+
+    for c, class_name in enumerate(classes):
+        required = [(c, subj) for subj in problem["class_subjects"][c] if (c, subj) in problem["required_hours"]]
+
+        # Required hours vs the week
+        required_slots = sum(problem["sessions"][key] * problem["durations"][key] for key in required)
+        if required_slots > cells:
+            issues.append(_issue(
+                "class_hours", "error",
+                f"{class_name} needs {required_slots} slots of lessons a week, "
+                f"but the week has {cells} ({num_days} days x {num_slots} lectures)",
+                f"Lower {class_name}'s lesson hours by {required_slots - cells} "
+                f"or raise lectures_per_day."
+            ))
+
+        # Required sessions vs the daily subject limit
+        for key in required:
+            sessions, limit = problem["sessions"][key], _daily_limit(problem, key)
+            if sessions > num_days * limit:
+                issues.append(_issue(
+                    "daily_limit", "error",
+                    f"{class_name}: {_subject_name(problem, key[1])} needs {sessions} sessions a week, "
+                    f"but at most {limit} a day fit ({num_days * limit} a week)",
+                    f"Lower its lesson hours to {num_days * limit * problem['durations'][key]} or less."
+                ))
+
+        # 50% coverage rule vs what the class can be taught at all
+        fillable = required_slots
+        for subj in problem["class_subjects"][c]:
+            key = (c, subj)
+            if key not in problem["required_hours"]:
+                fillable += num_days * _daily_limit(problem, key) * problem["durations"][key]
+        if min(fillable, cells) < min_slots:
+            issues.append(_issue(
+                "coverage", "error",
+                f"{class_name} can fill at most {fillable} of its {cells} weekly slots, "
+                f"but at least {min_slots} (50%) must be filled",
+                f"Add {min_slots - fillable} more lesson hours for {class_name} or add subjects to it."
+            ))
+
+        # Lesson hours nobody chose to teach: any faculty may be assigned
+        for key in required:
+            if not any((c, key[1], f) in problem["preferred"] for f in problem["allowed_faculties"][key]):
+                issues.append(_issue(
+                    "faculty_choice", "warning",
+                    f"{class_name}: no faculty chose {_subject_name(problem, key[1])}, "
+                    f"so any faculty may be assigned to it",
+                    "Have a faculty choose the subject for this class."
+                ))
+
+    issues.extend(_check_faculty_demand(problem, cells))
+    issues.extend(_check_rooms(problem, cells))
+    return issues
+
+
+def _check_faculty_demand(problem, cells):
+    """
+    Lesson hours that only a set of faculties may teach vs the slots those
+    faculties have (a Hall-type condition, per distinct set of allowed faculties).
+    """
+    demand_by_set = {}
+    for key in problem["required_hours"]:
+        allowed = frozenset(problem["allowed_faculties"][key])
+        demand_by_set.setdefault(allowed, []).append(key)
+
+    issues = []
+    reported = []
+    for allowed in sorted(demand_by_set, key=len):
+        # A larger set containing an overloaded one adds nothing new
+        if any(overloaded <= allowed for overloaded in reported):
+            continue
+        keys = [key for other, group in demand_by_set.items() if other <= allowed for key in group]
+        demand = sum(problem["sessions"][key] * problem["durations"][key] for key in keys)
+        capacity = len(allowed) * cells
+        if demand <= capacity:
+            continue
+        reported.append(allowed)
+        names = ", ".join(problem["faculty_names"][f] for f in sorted(allowed))
+        lessons = ", ".join(
+            f"{problem['classes'][c]} {_subject_name(problem, subj)}" for c, subj in sorted(keys)
+        )
+        issues.append(_issue(
+            "faculty_demand", "error",
+            f"Only {names} can teach {lessons}: {demand} slots a week, "
+            f"but they have {capacity}",
+            f"Let more faculties choose these subjects or lower their lesson hours by {demand - capacity}."
+        ))
+    return issues
+
+
+def _check_rooms(problem, cells):
+    """Lesson hours that need a room type vs the weekly slots of rooms of that type"""
+    demand = {}
+    for key in problem["required_hours"]:
+        room_type = problem["room_types"][key]
+        slots = problem["sessions"][key] * problem["durations"][key] * problem["rooms_needed"][key]
+        demand[room_type] = demand.get(room_type, 0) + slots
+
+    issues = []
+    # A lab runs all batches at once, one room each
+    for key in sorted(problem["rooms_needed"]):
+        room_type, needed = problem["room_types"][key], problem["rooms_needed"][key]
+        rooms = len(problem["rooms_by_type"].get(room_type, []))
+        if rooms and needed > rooms:
+            required = key in problem["required_hours"]
+            issues.append(_issue(
+                "rooms", "error" if required else "warning",
+                f"{problem['classes'][key[0]]}: {_subject_name(problem, key[1])} needs {needed} "
+                f"{room_type} rooms at once (one per batch), but there are {rooms}"
+                + ("" if required else ", so it is never scheduled"),
+                f"Add {needed - rooms} {room_type} rooms or merge batches."
+            ))
+
+    for room_type, needed in sorted(demand.items()):
+        rooms = len(problem["rooms_by_type"].get(room_type, []))
+        if not rooms:
+            issues.append(_issue(
+                "rooms", "warning",
+                f"No {room_type} rooms: {needed} {room_type} room slots a week are scheduled without a room",
+                f"Add a room of type '{room_type}'."
+            ))
+        elif needed > rooms * cells:
+            issues.append(_issue(
+                "rooms", "error",
+                f"Lessons need {needed} {room_type} room slots a week, but the {rooms} {room_type} rooms "
+                f"have {rooms * cells}",
+                f"Add {room_type} rooms or lower lesson hours that need one."
+            ))
+    return issues
+
+
+def find_conflict(problem, time_limit=FEASIBILITY_TIME_LIMIT):
+    """
+    Solve the model without objective, each configurable constraint group
+    behind an assumption literal; if it is infeasible, shrink CP-SAT's
+    infeasible core by dropping one group at a time while the rest stays
+    infeasible.
+
+    Returns:
+        (status, conflict, minimal): status "FEASIBLE", "INFEASIBLE" or
+        "UNKNOWN"; conflict is a list of issues for the conflicting groups
+        (None unless infeasible); minimal is False if the time ran out
+        before every group was tested
+    """
+    deadline = time.perf_counter() + time_limit
+    relaxable = {}
+    model, _, _ = _build_model(problem, relaxable)
+    model.ClearObjective()
+    groups = {literal.Index(): (key, literal) for key, literal in relaxable.items()}
+
+    def solve(indices):
+        model.ClearAssumptions()
+        model.AddAssumptions([groups[i][1] for i in indices])
+        solver = cp_model.CpSolver()
+        # A single worker reports a tight core of assumptions; the full LP
+        # relaxation proves the counting conflicts behind most cores quickly
+        solver.parameters.num_workers = 1
+        solver.parameters.linearization_level = 2
+        solver.parameters.max_time_in_seconds = max(0.1, deadline - time.perf_counter())
+        return solver, solver.Solve(model)
+
+    solver, status = solve(list(groups))
+    if status in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+        return "FEASIBLE", None, False
+    if status != cp_model.INFEASIBLE:
+        return "UNKNOWN", None, False
+
+    core = [i for i in solver.SufficientAssumptionsForInfeasibility() if i in groups]
+    minimal = True
+    position = 0
+    while position < len(core):
+        if time.perf_counter() >= deadline:
+            minimal = False
+            break
+        trial = core[:position] + core[position + 1:]
+        solver, status = solve(trial)
+        if status == cp_model.INFEASIBLE:
+            # Keep the (possibly smaller) core of the reduced set
+            reduced = set(solver.SufficientAssumptionsForInfeasibility())
+            core = [i for i in trial if i in reduced] or trial
+        else:
+            if status != cp_model.OPTIMAL and status != cp_model.FEASIBLE:
+                minimal = False
+            position += 1
+
+    conflict = [_describe_group(problem, groups[i][0]) for i in core]
+    if not conflict:
+        conflict = [_issue(
+            "conflict", "error",
+            "The timetable rules alone (one lesson per slot, no faculty in two classes at once) "
+            "cannot be met with the allowed faculties",
+            "Let more faculties choose subjects."
+        )]
+    return "INFEASIBLE", conflict, minimal
+
+
+def _describe_group(problem, key):
+    """Issue for one constraint group of a conflict"""
+    kind = key[0]
+    num_days = len(problem["days"])
+    cells = num_days * len(problem["slots"])
+    if kind == "hours":
+        c, subj = key[1], key[2]
+        faculties = ", ".join(problem["faculty_names"][f] for f in problem["allowed_faculties"][(c, subj)])
+        return _issue(
+            "conflict", "error",
+            f"{problem['classes'][c]}: {problem['required_hours'][(c, subj)]} hours of "
+            f"{_subject_name(problem, subj)} a week, taught by {faculties}",
+            "Lower these lesson hours or let more faculties choose the subject."
+        )
+    if kind == "coverage":
+        c = key[1]
+        return _issue(
+            "conflict", "error",
+            f"{problem['classes'][c]}: at least {cells // 2} of {cells} weekly slots filled (50% coverage rule)",
+            f"Add lesson hours or subjects for {problem['classes'][c]}, or free up its faculties."
+        )
+    if kind == "daily":
+        c, subj = key[1], key[2]
+        limit = _daily_limit(problem, (c, subj))
+        return _issue(
+            "conflict", "error",
+            f"{problem['classes'][c]}: {_subject_name(problem, subj)} at most {limit} time(s) a day",
+            "Lower the subject's lesson hours."
+        )
+    room_type = key[1]
+    return _issue(
+        "conflict", "error",
+        f"At most {len(problem['rooms_by_type'].get(room_type, []))} {room_type} rooms in use at a time",
+        f"Add {room_type} rooms."
+    )
+
+
+def explain(analysis):
+    """One-paragraph explanation of an analysis for the HOD"""
+    errors = [issue for issue in analysis["issues"] if issue["severity"] == "error"]
+    if errors:
+        return " ".join(f"{issue['message']}. {issue['suggestion']}" for issue in errors)
+    if analysis.get("conflict"):
+        requirements = "; ".join(issue["message"] for issue in analysis["conflict"])
+        suggestions = " ".join(dict.fromkeys(issue["suggestion"] for issue in analysis["conflict"]))
+        return f"These requirements cannot all hold together: {requirements}. Relax one of them. {suggestions}"
+    if analysis["feasible"]:
+        return "The config can be scheduled."
+    return "No problem found, but the config could not be confirmed feasible in time."
@@ -0,0 +1,384 @@
+"""
+Constraint-aware construction heuristic for timetables.
+
+Sessions are placed DSatur-style: the (class, subject) group with the fewest
+feasible (day, start slot, faculty) options per remaining session goes next,
+and its session is put where it hurts the least (same faculty as its other
+sessions, spread over days, compact days). Occupancy is kept as one slot
+bitmask per (class, day) and (faculty, day), so feasibility checks are a few
+integer operations. The rules are those of the CP-SAT model: lesson hours,
+faculty choices, no class/faculty clashes, room capacity per type, at most
+two sessions (or one block) of a subject per day and 50% minimum coverage.
+A group that runs out of options gets a one-step repair (move one blocking
+session elsewhere) before it is reported as unplaced.
+"""
+import random
+import time
+
+from .csp_scheduler import _build_problem, _extract_timetable, _generate_empty_timetable, _as_requested
+
+
+def generate_timetable_heuristic(data, config=None, report=None, compact=False, seed=0):
+    """
+    Generate a timetable with the construction heuristic (no CP-SAT solve).
+
+    Args:
+        data, config: as for generate_timetable_csp
+        report: optional dict, filled with the run summary
+                (status, wall time, objective, placed and unplaced sessions)
+        compact: if True, return a CompactTimetable instead of the dict shape
+        seed: tie-breaking seed (different seeds give different timetables)
+
+    Returns:
+        Timetable dict: {class: {day: {slot: {subject, faculty, room}}}}
+        (CompactTimetable if compact)
+    """
+    classes = data.get("classes", [])
+    if not classes or not data.get("subjects"):
+        return _as_requested(_generate_empty_timetable(classes), compact)
+
+    problem = _build_problem(data, config or {})
+    return _as_requested(heuristic_timetable(problem, report, seed), compact)
+
+
+def heuristic_timetable(problem, report=None, seed=0):
+    """
+    Run the heuristic on a normalized problem (csp_scheduler._build_problem).
+
+    Returns:
+        CompactTimetable
+    """
+    start = time.perf_counter()
+    placements, summary = schedule_problem(problem, seed)
+    timetable = _extract_timetable(problem, {key: 1 for key in placements}, lambda value: value)
+    summary["wall_time"] = round(time.perf_counter() - start, 3)
+    print(f"   Heuristic: {summary['status']} in {summary['wall_time']}s "
+          f"({summary['placed']} sessions, objective={summary['objective']}, "
+          f"{len(summary['unplaced'])} unplaced)")
+    if report is not None:
+        report.update(summary)
+    return timetable
+
+
+def schedule_problem(problem, seed=0):
+    """
+    Place the sessions of a normalized problem.
+
+    Returns:
+        (placements, summary): placements is a list of
+        (c, d, start slot, subj, f) keys like the CP-SAT assignments;
+        summary = {"scheduler", "status", "placed", "objective", "unplaced", "repairs"}
+    """
+    state = _State(problem, seed)
+
+    # Required sessions per (class, subject)
+    required = problem["sessions"]
+    unplaced = state.place_groups(required)
+
+    # Minimum coverage (50% of each class's slots), then every slot a preferred
+    # faculty can fill, both with subjects that have no fixed hours
+    min_slots = (len(problem["days"]) * len(problem["slots"])) // 2
+    for c in range(len(problem["classes"])):
+        fillers = [subj for subj in problem["class_subjects"][c] if (c, subj) not in required]
+        state.fill(c, fillers, min_slots, preferred_only=False)
+        state.fill(c, fillers, None, preferred_only=True)
+
+    missing = sum(unplaced.values())
+    covered = all(
+        state.filled_slots(c) >= min_slots for c in range(len(problem["classes"]))
+    )
+    summary = {
+        "scheduler": "heuristic",
+        "status": "COMPLETE" if not missing and covered else "PARTIAL",
+        "placed": len(state.placements),
+        "objective": state.objective(),
+        "unplaced": [
+            {
+                "class": problem["classes"][c],
+                "subject": problem["subjects"][subj].get("name", "Unknown"),
+                "sessions": count
+            }
+            for (c, subj), count in unplaced.items() if count
+        ],
+        "repairs": state.repairs,
+        "fallback": False
+    }
+    return list(state.placements.values()), summary
+
+
+def _popcount(mask):
+    return bin(mask).count("1")
+
+
+class _State:
+    """Occupancy bitmasks and placed sessions during construction"""
+
+    def __init__(self, problem, seed):
+        self.problem = problem
+        self.num_days = len(problem["days"])
+        self.num_slots = len(problem["slots"])
+        self.rng = random.Random(seed)
+        self.check_faculty = bool(problem["faculties"])
+
+        num_faculties = len(problem["faculties"]) or 1
+        self.class_busy = [[0] * self.num_days for _ in problem["classes"]]
+        self.faculty_busy = [[0] * self.num_days for _ in range(num_faculties)]
+        self.capacity = {room_type: len(rooms) for room_type, rooms in problem["rooms_by_type"].items()}
+        self.room_use = {}    # (room_type, d, s) -> rooms in use
+        self.day_count = {}   # (c, d, subj) -> sessions that day
+        self.sticky = {}      # (c, subj) -> {f: sessions}
+        self.placements = {}  # session id -> (c, d, s, subj, f)
+        self.class_cells = {} # (c, d, s) -> session id
+        self.faculty_cells = {}  # (f, d, s) -> session id
+        self.next_id = 0
+        self.repairs = 0
+
+    # ==================== FEASIBILITY ====================
+
+    def _window(self, c, subj, s):
+        duration = self.problem["durations"][(c, subj)]
+        return ((1 << duration) - 1) << s, duration
+
+    def _room_free(self, c, subj, d, s, duration):
+        room_type = self.problem["room_types"][(c, subj)]
+        capacity = self.capacity.get(room_type, 0)
+        if not capacity:
+            return True
+        needed = self.problem["rooms_needed"][(c, subj)]
+        return all(
+            self.room_use.get((room_type, d, covered), 0) + needed <= capacity
+            for covered in range(s, s + duration)
+        )
+
+    def _day_limit(self, c, subj):
+        return 2 if self.problem["durations"][(c, subj)] == 1 else 1
+
+    def options(self, c, subj):
+        """Feasible (d, s, f) placements of one more session of (c, subj)"""
+        result = []
+        limit = self._day_limit(c, subj)
+        allowed = self.problem["allowed_faculties"][(c, subj)]
+        duration = self.problem["durations"][(c, subj)]
+        for d in range(self.num_days):
+            if self.day_count.get((c, d, subj), 0) >= limit:
+                continue
+            busy = self.class_busy[c][d]
+            for s in range(self.num_slots - duration + 1):
+                window = ((1 << duration) - 1) << s
+                if busy & window or not self._room_free(c, subj, d, s, duration):
+                    continue
+                for f in allowed:
+                    if not self.check_faculty or not self.faculty_busy[f][d] & window:
+                        result.append((d, s, f))
+        return result
+
+    # ==================== PLACEMENT ====================
+
+    def place(self, c, d, s, subj, f):
+        window, duration = self._window(c, subj, s)
+        session = self.next_id
+        self.next_id += 1
+        self.placements[session] = (c, d, s, subj, f)
+        self.class_busy[c][d] |= window
+        self.faculty_busy[f][d] |= window
+        room_type = self.problem["room_types"][(c, subj)]
+        needed = self.problem["rooms_needed"][(c, subj)]
+        for covered in range(s, s + duration):
+            self.room_use[(room_type, d, covered)] = self.room_use.get((room_type, d, covered), 0) + needed
+            self.class_cells[(c, d, covered)] = session
+            self.faculty_cells[(f, d, covered)] = session
+        self.day_count[(c, d, subj)] = self.day_count.get((c, d, subj), 0) + 1
+        by_faculty = self.sticky.setdefault((c, subj), {})
+        by_faculty[f] = by_faculty.get(f, 0) + 1
+        return session
+
+    def remove(self, session):
+        c, d, s, subj, f = self.placements.pop(session)
+        window, duration = self._window(c, subj, s)
+        self.class_busy[c][d] &= ~window
+        self.faculty_busy[f][d] &= ~window
+        room_type = self.problem["room_types"][(c, subj)]
+        needed = self.problem["rooms_needed"][(c, subj)]
+        for covered in range(s, s + duration):
+            self.room_use[(room_type, d, covered)] -= needed
+            del self.class_cells[(c, d, covered)]
+            self.faculty_cells.pop((f, d, covered), None)
+        self.day_count[(c, d, subj)] -= 1
+        self.sticky[(c, subj)][f] -= 1
+        return c, d, s, subj, f
+
+    def _score(self, c, subj, option):
+        """Cost of an option (lower is better)"""
+        d, s, f = option
+        window, duration = self._window(c, subj, s)
+        used = self.sticky.get((c, subj), {})
+        busy = self.class_busy[c][d]
+        score = 6 * self.day_count.get((c, d, subj), 0)
+        if used and not used.get(f):
+            score += 4  # keep one faculty per (class, subject)
+        if (c, subj, f) not in self.problem["preferred"]:
+            score += 2
+        score += _popcount(busy) + _popcount(self.faculty_busy[f][d])
+        if busy and not busy & ((window << 1) | (window >> 1)):
+            score += 1  # avoid gaps in the class's day
+        if duration > 1 and s % duration:
+            score += 3  # aligned blocks leave room slots usable by other blocks
+        room_type = self.problem["room_types"][(c, subj)]
+        capacity = self.capacity.get(room_type, 0)
+        needed = self.problem["rooms_needed"][(c, subj)]
+        if capacity and needed > 1:
+            # Best fit: fill up slots where the rooms left over would be too few for another lab
+            left = min(
+                capacity - self.room_use.get((room_type, d, covered), 0) - needed
+                for covered in range(s, s + duration)
+            )
+            score += 2 * left
+        return score + 0.05 * s + 0.01 * self.rng.random()
+
+    def place_best(self, c, subj, options=None):
+        options = self.options(c, subj) if options is None else options
+        if not options:
+            return None
+        d, s, f = min(options, key=lambda option: self._score(c, subj, option))
+        return self.place(c, d, s, subj, f)
+
+    def repair(self, c, subj):
+        """
+        Place one session of (c, subj) by moving a single blocking session
+        (in the class or the faculty's timetable) to another feasible spot.
+        """
+        allowed = self.problem["allowed_faculties"][(c, subj)]
+        duration = self.problem["durations"][(c, subj)]
+        limit = self._day_limit(c, subj)
+        for d in range(self.num_days):
+            if self.day_count.get((c, d, subj), 0) >= limit:
+                continue
+            for s in range(self.num_slots - duration + 1):
+                for f in allowed:
+                    blockers = {
+                        self.class_cells.get((c, d, covered)) for covered in range(s, s + duration)
+                    }
+                    if self.check_faculty:
+                        blockers |= {
+                            self.faculty_cells.get((f, d, covered)) for covered in range(s, s + duration)
+                        }
+                    blockers.discard(None)
+                    if len(blockers) != 1:
+                        continue
+                    blocker = blockers.pop()
+                    moved = self.remove(blocker)
+                    if (d, s, f) in self.options(c, subj):
+                        session = self.place(c, d, s, subj, f)
+                        mc, md, ms, msubj, mf = moved
+                        elsewhere = [
+                            option for option in self.options(mc, msubj) if option != (md, ms, mf)
+                        ]
+                        if elsewhere and self.place_best(mc, msubj, elsewhere) is not None:
+                            self.repairs += 1
+                            return session
+                        self.remove(session)
+                    self.place(*moved)
+        return None
+
+    def place_groups(self, remaining):
+        """
+        Place remaining[(c, subj)] sessions per group, most constrained group
+        first. Returns the counts that could not be placed.
+        """
+        remaining = {key: count for key, count in remaining.items() if count > 0}
+        unplaced = {}
+        problem = self.problem
+
+        groups_by_class = {}
+        groups_by_faculty = {}
+        groups_by_room_type = {}
+        for key in remaining:
+            c, subj = key
+            groups_by_class.setdefault(c, set()).add(key)
+            for f in problem["allowed_faculties"][key]:
+                groups_by_faculty.setdefault(f, set()).add(key)
+            groups_by_room_type.setdefault(problem["room_types"][key], set()).add(key)
+        max_needed = {
+            room_type: max(problem["rooms_needed"][key] for key in keys)
+            for room_type, keys in groups_by_room_type.items()
+        }
+
+        options = {key: self.options(*key) for key in remaining}
+        while remaining:
+            def saturation(key):
+                # Sessions holding several rooms or slots are harder to fit later
+                weight = problem["rooms_needed"][key] * problem["durations"][key]
+                return (
+                    len(options[key]) / (remaining[key] * weight),
+                    -problem["durations"][key],
+                    -problem["rooms_needed"][key],
+                    len(problem["allowed_faculties"][key])
+                )
+            key = min(remaining, key=saturation)
+            c, subj = key
+            repaired = False
+            session = self.place_best(c, subj, options[key])
+            if session is None:
+                session = self.repair(c, subj)
+                repaired = session is not None
+            if session is None:
+                unplaced[key] = remaining.pop(key)
+                continue
+
+            remaining[key] -= 1
+            if not remaining[key]:
+                del remaining[key]
+
+            # Only groups sharing the class, a faculty or the room type changed
+            _, d, s, _, f = self.placements[session]
+            dirty = set(groups_by_class.get(c, ())) | groups_by_faculty.get(f, set())
+            room_type = problem["room_types"][key]
+            capacity = self.capacity.get(room_type, 0)
+            if capacity and any(
+                capacity - self.room_use.get((room_type, d, covered), 0) < max_needed[room_type]
+                for covered in range(s, s + problem["durations"][key])
+            ):
+                dirty |= groups_by_room_type.get(room_type, set())
+            if repaired:
+                # The repair moved a session of some other group
+                dirty = set(remaining)
+            for other in dirty:
+                if other in remaining:
+                    options[other] = self.options(*other)
+        return unplaced
+
+    def fill(self, c, subjects, target, preferred_only):
+        """
+        Add single sessions of subjects (round-robin) to class c until it has
+        target filled slots (None: as many as fit).
+        """
+        if preferred_only:
+            subjects = [
+                subj for subj in subjects
+                if any((c, subj, f) in self.problem["preferred"] for f in self.problem["allowed_faculties"][(c, subj)])
+            ]
+        active = list(subjects)
+        while active and (target is None or self.filled_slots(c) < target):
+            for subj in list(active):
+                options = self.options(c, subj)
+                if preferred_only:
+                    options = [option for option in options if (c, subj, option[2]) in self.problem["preferred"]]
+                if not options:
+                    active.remove(subj)
+                    continue
+                self.place_best(c, subj, options)
+                if target is not None and self.filled_slots(c) >= target:
+                    return
+
+    # ==================== SUMMARY ====================
+
+    def filled_slots(self, c):
+        return sum(_popcount(mask) for mask in self.class_busy[c])
+
+    def objective(self):
+        """Same scale as the CP-SAT objective: 10 per slot taught by a preferred faculty"""
+        return 10 * sum(
+            self.problem["durations"][(c, subj)]
+            for c, _d, _s, subj, f in self.placements.values()
+            if (c, subj, f) in self.problem["preferred"]
+        )
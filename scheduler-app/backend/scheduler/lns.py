@@ -0,0 +1,318 @@
+"""
+Large Neighborhood Search (LNS) around the CP-SAT model.
+
+For departments too big for one CP-SAT solve to reach optimality, the full
+model is built once and the current timetable is improved piece by piece:
+every iteration keeps most of the timetable fixed and lets CP-SAT
+re-optimize one neighborhood (a few classes sharing faculties, one day, or
+one faculty's lectures), hinted with the current assignment. A sub-solve
+that is at least as good replaces the current timetable.
+
+Neighborhood kinds are picked by roulette wheel over adaptive weights: a
+kind that improves the objective gains weight, one that times out or finds
+nothing loses it. The "classes" neighborhood grows while its sub-problems
+are solved to optimality quickly and shrinks when they time out.
+"""
+import random
+import time
+
+from ortools.sat.python import cp_model
+
+from .csp_scheduler import (
+    _build_problem, _build_model, _solve, _extract_timetable, _generate_empty_timetable, _as_requested
+)
+from .heuristic_scheduler import schedule_problem
+from .local_search import improve_sessions, evaluate_sessions
+from .portfolio import objective_upper_bound
+from .solver_profiles import resolve_solver_profile
+
+LNS_NEIGHBORHOODS = ["classes", "day", "faculty"]
+
+# Seconds per sub-solve (default; config["lns_iteration_time"])
+LNS_ITERATION_TIME = 2.0
+
+# Share of the budget spent repairing the initial timetable with local search
+LNS_REPAIR_SHARE = 0.2
+
+# Initial number of classes in a "classes" neighborhood, as a share of all classes
+LNS_CLASS_SHARE = 0.1
+
+# Adaptive weights: weight <- (1 - LNS_REACTION) * weight + LNS_REACTION * reward
+LNS_REACTION = 0.3
+LNS_REWARDS = {"improved": 3.0, "accepted": 1.0, "rejected": 0.0}
+LNS_MIN_WEIGHT = 0.1
+
+
+def solve_lns(data, config=None, report=None, time_limit=None, seed=0, progress_callback=None,
+              stop_event=None, compact=False):
+    """
+    Improve a timetable with CP-SAT over changing neighborhoods until the
+    time budget runs out.
+
+    Args:
+        data, config: as for generate_timetable_csp; config may carry
+                "lns_time_limit" (seconds for the whole run) and
+                "lns_iteration_time" (seconds per sub-solve)
+        report: optional dict, filled with the run summary and one entry per
+                iteration ("history": neighborhood, objective before/after,
+                improvement, time)
+        time_limit: seconds for the whole run (default: lns_time_limit, else
+                the solver profile's max_time_in_seconds)
+        seed: random seed for the initial timetable and neighborhood choice
+        progress_callback: optional callable, invoked with
+                {"solutions", "objective", "best_bound", "elapsed"} for every
+                improving iteration; returning True stops the search
+        stop_event: optional Event; setting it stops the search with the
+                best timetable so far
+        compact: if True, return a CompactTimetable instead of the dict shape
+
+    Returns:
+        Timetable dict: {class: {day: {slot: {subject, faculty, room}}}}
+        (CompactTimetable if compact)
+    """
+    classes = data.get("classes", [])
+    if not classes or not data.get("subjects"):
+        return _as_requested(_generate_empty_timetable(classes), compact)
+
+    config = config or {}
+    start = time.time()
+    problem = _build_problem(data, config)
+    _, profile = resolve_solver_profile(config)
+    time_limit = float(time_limit or config.get("lns_time_limit") or profile["max_time_in_seconds"])
+    iteration_time = float(config.get("lns_iteration_time") or LNS_ITERATION_TIME)
+    deadline = start + time_limit
+    upper_bound = objective_upper_bound(problem)
+
+    model, assignments, _ = _build_model(problem)
+    print(f"🔁 LNS: {len(assignments)} assignment variables, {time_limit}s budget "
+          f"(objective bound {upper_bound})")
+
+    search = _Neighborhoods(problem, assignments, seed)
+    current, objective, violations, initial = _initial_solution(
+        problem, model, assignments, profile, deadline, seed, stop_event
+    )
+    summary = {
+        "scheduler": "lns",
+        "initial": initial,
+        "initial_objective": objective,
+        "upper_bound": upper_bound,
+        "history": []
+    }
+    optimal = not violations and objective >= upper_bound - 1e-6
+    improvements = 0
+
+    def stopped():
+        return time.time() >= deadline or (stop_event is not None and stop_event.is_set())
+
+    iteration = 0
+    while not violations and not optimal and not stopped():
+        iteration += 1
+        kind = search.pick_kind()
+        target, free = search.neighborhood(kind, current)
+        limit = min(iteration_time, deadline - time.time())
+        if limit <= 0.05:
+            break
+
+        iteration_start = time.time()
+        new, new_objective, status = _solve_neighborhood(
+            model, problem, assignments, profile, current, free, limit, stop_event
+        )
+        elapsed = time.time() - iteration_start
+
+        gain = 0
+        if new is not None and new_objective >= objective:
+            gain = new_objective - objective
+            outcome = "improved" if gain > 0 else ("accepted" if new != current else "rejected")
+            current, objective = new, new_objective
+        else:
+            outcome = "rejected"
+        search.update(kind, outcome, status, elapsed, limit)
+
+        summary["history"].append({
+            "iteration": iteration,
+            "neighborhood": kind,
+            "target": target,
+            "free_variables": len(free),
+            "status": status,
+            "objective_before": objective - gain,
+            "objective_after": objective,
+            "improvement": gain,
+            "time": round(elapsed, 3)
+        })
+        print(f"   LNS {iteration} [{kind} {target}]: {objective - gain} -> {objective} "
+              f"({status}, {len(free)} free, {elapsed:.2f}s)")
+
+        # A neighborhood covering the whole model that was solved to optimality proves optimality
+        if status == "OPTIMAL" and len(free) == len(assignments):
+            optimal = True
+        optimal = optimal or objective >= upper_bound - 1e-6
+        if gain > 0:
+            improvements += 1
+            if progress_callback is not None and progress_callback({
+                "solutions": improvements,
+                "objective": objective,
+                "best_bound": upper_bound,
+                "elapsed": round(time.time() - start, 3)
+            }):
+                break
+
+    timetable = _extract_timetable(problem, {key: 1 for key in current}, lambda value: value)
+    summary.update({
+        "status": "COMPLETE" if not violations else "PARTIAL",
+        "objective": objective,
+        "violations": violations,
+        "improvement": objective - summary["initial_objective"],
+        "iterations": iteration,
+        "improvements": improvements,
+        "optimal": optimal,
+        "neighborhoods": search.stats(),
+        "wall_time": round(time.time() - start, 3),
+        "time_limit": time_limit,
+        "fallback": bool(violations)
+    })
+    print(f"   LNS: objective {summary['initial_objective']} -> {objective} in {iteration} iterations, "
+          f"{summary['wall_time']}s (bound {upper_bound}, violations={violations})")
+    if report is not None:
+        report.update(summary)
+    return _as_requested(timetable, compact)
+
+
+def _initial_solution(problem, model, assignments, profile, deadline, seed, stop_event):
+    """
+    Conflict-free starting timetable: the construction heuristic, repaired
+    by local search if needed, else a CP-SAT solve of the full model hinted
+    with the repaired timetable.
+
+    Returns:
+        (set of session keys, objective, violations, source name)
+    """
+    sessions, _ = schedule_problem(problem, seed)
+    violations, objective = evaluate_sessions(problem, sessions)
+    source = "heuristic"
+    if violations:
+        repair_deadline = time.perf_counter() + LNS_REPAIR_SHARE * max(0.0, deadline - time.time())
+        sessions, result = improve_sessions(problem, sessions, seed=seed, deadline=repair_deadline)
+        violations, objective = result["violations"], result["objective"]
+        source = "local_search"
+    if violations:
+        hinted = model.Clone()
+        current = set(sessions)
+        for key, var in assignments.items():
+            hinted.AddHint(var, 1 if key in current else 0)
+        cp_profile = dict(profile, max_time_in_seconds=max(0.1, deadline - time.time()))
+        solver, status = _solve(hinted, cp_profile, problem, assignments, stop_event=stop_event)
+        if status in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+            sessions = [key for key, var in assignments.items() if solver.Value(var)]
+            violations, objective = evaluate_sessions(problem, sessions)
+            source = "cpsat"
+    print(f"   LNS start ({source}): objective {objective}, violations {violations}")
+    return set(sessions), objective, violations, source
+
+
+def _solve_neighborhood(model, problem, assignments, profile, current, free, time_limit, stop_event):
+    """
+    Re-optimize the free variables with every other variable fixed to the
+    current timetable.
+
+    Returns:
+        (new session set or None, objective or None, CP-SAT status name)
+    """
+    sub = model.Clone()
+    ones, zeros = [], []
+    for key, var in assignments.items():
+        if key in free:
+            sub.AddHint(var, 1 if key in current else 0)
+        elif key in current:
+            ones.append(var)
+        else:
+            zeros.append(var)
+    if ones:
+        sub.AddBoolAnd(ones)
+    if zeros:
+        sub.Add(cp_model.LinearExpr.Sum(zeros) == 0)
+
+    sub_profile = dict(profile, max_time_in_seconds=time_limit, relative_gap_limit=0.0)
+    solver, status = _solve(sub, sub_profile, problem, assignments, stop_event=stop_event)
+    status_name = solver.StatusName(status)
+    if status not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+        return None, None, status_name
+
+    new = {key for key in current if key not in free}
+    new.update(key for key in free if solver.Value(assignments[key]))
+    return new, int(round(solver.ObjectiveValue())), status_name
+
+
+class _Neighborhoods:
+    """Neighborhood construction and adaptive selection of the neighborhood kind"""
+
+    def __init__(self, problem, assignments, seed):
+        self.problem = problem
+        self.keys = list(assignments)
+        self.rng = random.Random(seed)
+        self.weights = {kind: 1.0 for kind in LNS_NEIGHBORHOODS}
+        self.counts = {kind: {"tried": 0, "improved": 0} for kind in LNS_NEIGHBORHOODS}
+        num_classes = len(problem["classes"])
+        self.class_count = min(num_classes, max(2, round(num_classes * LNS_CLASS_SHARE)))
+
+        # Classes sharing a faculty, so a "classes" neighborhood can trade lectures
+        classes_by_faculty = {}
+        for c, _, f in problem["triples"]:
+            classes_by_faculty.setdefault(f, set()).add(c)
+        self.linked = {c: set() for c in range(num_classes)}
+        for linked in classes_by_faculty.values():
+            for c in linked:
+                self.linked[c] |= linked
+        self.faculties = sorted(classes_by_faculty)
+
+    def pick_kind(self):
+        kinds = [kind for kind in LNS_NEIGHBORHOODS if kind != "faculty" or self.faculties]
+        return self.rng.choices(kinds, weights=[self.weights[kind] for kind in kinds])[0]
+
+    def neighborhood(self, kind, current):
+        """
+        Returns:
+            (target description, set of free assignment keys)
+        """
+        problem = self.problem
+        if kind == "day":
+            d = self.rng.randrange(len(problem["days"]))
+            return problem["days"][d], {key for key in self.keys if key[1] == d}
+
+        if kind == "faculty":
+            f = self.rng.choice(self.faculties)
+            groups = {(c, subj) for c, _, _, subj, faculty in current if faculty == f}
+            free = {key for key in self.keys if key[4] == f or (key[0], key[3]) in groups}
+            return problem["faculty_names"][f], free
+
+        # A random class plus classes sharing its faculties, up to class_count
+        chosen = [self.rng.randrange(len(problem["classes"]))]
+        while len(chosen) < self.class_count:
+            candidates = sorted(set().union(*(self.linked[c] for c in chosen)) - set(chosen))
+            if not candidates:
+                candidates = [c for c in range(len(problem["classes"])) if c not in chosen]
+            chosen.append(self.rng.choice(candidates))
+        chosen = set(chosen)
+        target = ", ".join(problem["classes"][c] for c in sorted(chosen))
+        return target, {key for key in self.keys if key[0] in chosen}
+
+    def update(self, kind, outcome, status, elapsed, time_limit):
+        """Reward the kind by outcome; resize the classes neighborhood by solve difficulty"""
+        self.counts[kind]["tried"] += 1
+        if outcome == "improved":
+            self.counts[kind]["improved"] += 1
+        self.weights[kind] = max(
+            LNS_MIN_WEIGHT, (1 - LNS_REACTION) * self.weights[kind] + LNS_REACTION * LNS_REWARDS[outcome]
+        )
+        if kind == "classes":
+            if status == "OPTIMAL" and elapsed < 0.5 * time_limit:
+                self.class_count = min(len(self.problem["classes"]), self.class_count + 1)
+            elif status not in ("OPTIMAL", "FEASIBLE"):
+                self.class_count = max(1, self.class_count // 2)
+
+    def stats(self):
+        """Per-kind counts and final weights, plus the final classes neighborhood size"""
+        stats = {
+            kind: dict(self.counts[kind], weight=round(self.weights[kind], 3)) for kind in LNS_NEIGHBORHOODS
+        }
+        stats["classes"]["size"] = self.class_count
+        return stats
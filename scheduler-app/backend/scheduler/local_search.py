@@ -0,0 +1,560 @@
+"""
+Local search repair and improvement for timetables.
+
+Any timetable in the {class: {day: {slot: entry}}} shape is read back into
+sessions (class, day, start slot, subject, faculty) of the normalized
+problem (csp_scheduler._build_problem) and improved by tabu search over
+single-session moves: relocate (other day, slot or faculty), swap two
+sessions of a class, add a missing session, drop a surplus one. Every move
+is scored incrementally from occupancy counters (class and faculty cells,
+room use per type, sessions per day and per class/subject), so a move costs
+a few dictionary updates instead of a validate_timetable pass.
+
+Cost = HARD_WEIGHT * violations - objective. Violations are the rules of
+the CP-SAT model (class, faculty and room clashes, lesson hours, at most two
+sessions or one block of a subject per day, 50% coverage); the objective is
+the CP-SAT objective (10 per slot taught by a preferred faculty). Concrete
+rooms are handed out again when the timetable is built.
+"""
+import random
+import time
+
+from .compact import CompactTimetable
+from .csp_scheduler import _build_problem, _extract_timetable, _as_requested
+
+HARD_WEIGHT = 1000
+DEFAULT_TIME_LIMIT = 5.0
+
+# Iterations a reversed move stays forbidden: base + random extra
+TABU_TENURE = (7, 5)
+
+# Stop early after this many iterations without a better timetable (once conflict-free)
+MAX_STALE_ITERATIONS = 1000
+
+# Faculties tried per relocation when a subject is open to many (nobody chose it)
+MAX_FACULTY_OPTIONS = 4
+
+
+def repair_timetable(timetable, data, config=None, report=None, time_limit=None, seed=0, compact=False):
+    """
+    Repair and improve an existing timetable against the scheduler input.
+
+    Args:
+        timetable: {class: {day: {slot: entry}}} dict or CompactTimetable
+                   (e.g. a timed-out or hand-edited timetable)
+        data, config: as for generate_timetable_csp
+        report: optional dict, filled with the run summary
+                (violations and objective before/after, iterations, wall time)
+        time_limit: seconds to search (default: config["local_search_time_limit"] or 5)
+        seed: random seed
+        compact: if True, return a CompactTimetable instead of the dict shape
+
+    Returns:
+        Timetable dict: {class: {day: {slot: {subject, faculty, room}}}}
+        (CompactTimetable if compact)
+    """
+    config = config or {}
+    if not data.get("classes") or not data.get("subjects"):
+        return _as_requested(CompactTimetable.from_dict(timetable), compact)
+
+    if time_limit is None:
+        time_limit = config.get("local_search_time_limit", DEFAULT_TIME_LIMIT)
+    problem = _build_problem(data, config)
+    sessions, dropped = sessions_from_timetable(problem, timetable)
+    result = local_search_timetable(problem, sessions, report, time_limit, seed)
+    if report is not None:
+        report["dropped_cells"] = dropped
+    return _as_requested(result, compact)
+
+
+def local_search_timetable(problem, sessions, report=None, time_limit=DEFAULT_TIME_LIMIT, seed=0):
+    """
+    Run the local search on a normalized problem.
+
+    Args:
+        sessions: starting [(c, d, start slot, subj, f), ...] (see sessions_from_timetable)
+
+    Returns:
+        CompactTimetable
+    """
+    start = time.perf_counter()
+    placements, summary = improve_sessions(problem, sessions, time_limit, seed)
+    timetable = _extract_timetable(problem, {key: 1 for key in placements}, lambda value: value)
+    summary["wall_time"] = round(time.perf_counter() - start, 3)
+    print(f"   Local search: {summary['status']} in {summary['wall_time']}s "
+          f"(violations {summary['violations_before']} -> {summary['violations']}, "
+          f"objective {summary['objective_before']} -> {summary['objective']}, "
+          f"{summary['iterations']} iterations)")
+    if report is not None:
+        report.update(summary)
+    return timetable
+
+
+def improve_sessions(problem, sessions, time_limit=DEFAULT_TIME_LIMIT, seed=0, deadline=None):
+    """
+    Tabu search from a list of sessions.
+
+    Args:
+        deadline: optional time.perf_counter() value to stop at (overrides time_limit)
+
+    Returns:
+        (placements, summary): the best sessions found, as
+        (c, d, start slot, subj, f) keys like the CP-SAT assignments;
+        summary = {"scheduler", "status", "violations_before", "violations",
+                   "breakdown", "objective_before", "objective", "feasible_after",
+                   "iterations", "moves"}
+    """
+    search = _Search(problem, seed)
+    for session in sessions:
+        search.insert(session)
+    violations_before, objective_before = search.hard, search.objective
+
+    deadline = deadline if deadline is not None else time.perf_counter() + time_limit
+    search.run(deadline)
+    placements = search.best
+
+    check = _Search(problem, seed)
+    for session in placements:
+        check.insert(session)
+    return placements, {
+        "scheduler": "local_search",
+        "status": "COMPLETE" if check.hard == 0 else "PARTIAL",
+        "violations_before": violations_before,
+        "violations": check.hard,
+        "breakdown": check.breakdown(),
+        "objective_before": objective_before,
+        "objective": check.objective,
+        "feasible_after": 0.0 if violations_before == 0 else search.feasible_after,
+        "iterations": search.iterations,
+        "moves": search.moves
+    }
+
+
+def evaluate_sessions(problem, sessions):
+    """
+    Score sessions with the local search cost terms.
+
+    Returns:
+        (violations, objective): violations of the CP-SAT model's rules and
+        the CP-SAT objective value
+    """
+    search = _Search(problem, 0)
+    for session in sessions:
+        search._count(*session, 1)
+    return search.hard, search.objective
+
+
+def sessions_from_timetable(problem, timetable):
+    """
+    Read a timetable back into problem sessions.
+
+    Subjects and faculties are matched by name (subjects case-insensitively,
+    like lesson_hours). Consecutive cells of a multi-slot subject form one
+    block; a block that does not fit the day is moved to end on the last
+    slot. A faculty the subject does not allow is replaced by an allowed one.
+
+    Returns:
+        (sessions, dropped): [(c, d, start slot, subj, f), ...] and the number
+        of cells that match no subject of their class
+    """
+    if not timetable:
+        return [], 0
+    compact = CompactTimetable.from_dict(timetable)
+    num_slots = len(problem["slots"])
+
+    subject_index = {}
+    for idx, subject in enumerate(problem["subjects"]):
+        subject_index.setdefault((subject.get("name") or "").lower(), idx)
+    faculty_index = {}
+    for idx, name in enumerate(problem["faculty_names"]):
+        faculty_index.setdefault(name, idx)
+    class_index = {name: i for i, name in enumerate(compact.classes)}
+    day_index = {name: i for i, name in enumerate(compact.days)}
+    slot_index = {name: i for i, name in enumerate(compact.slots)}
+
+    sessions = []
+    dropped = 0
+    for c, class_name in enumerate(problem["classes"]):
+        if class_name not in class_index:
+            continue
+        ci = class_index[class_name]
+        for d, day in enumerate(problem["days"]):
+            if day not in day_index:
+                continue
+            di = day_index[day]
+
+            def cell(s):
+                slot = problem["slots"][s]
+                return compact.entry(ci, di, slot_index[slot]) if slot in slot_index else None
+
+            def subject_of(entry):
+                return subject_index.get((entry.get("subject") or "").lower()) if entry else None
+
+            s = 0
+            while s < num_slots:
+                entry = cell(s)
+                subj = subject_of(entry)
+                if entry is None or (c, subj) not in problem["durations"]:
+                    dropped += entry is not None
+                    s += 1
+                    continue
+
+                duration = problem["durations"][(c, subj)]
+                length = 1
+                while length < duration and s + length < num_slots and subject_of(cell(s + length)) == subj:
+                    length += 1
+
+                allowed = problem["allowed_faculties"][(c, subj)]
+                f = faculty_index.get(entry.get("faculty"), 0 if not problem["faculties"] else None)
+                if f not in allowed:
+                    preferred = [g for g in allowed if (c, subj, g) in problem["preferred"]]
+                    f = (preferred or allowed)[0]
+                sessions.append((c, d, min(s, num_slots - duration), subj, f))
+                s += length
+    return sessions, dropped
+
+
+class _Search:
+    """Occupancy counters, incremental move costs and the tabu search loop"""
+
+    def __init__(self, problem, seed):
+        self.problem = problem
+        self.num_days = len(problem["days"])
+        self.num_slots = len(problem["slots"])
+        self.rng = random.Random(seed)
+        self.check_faculty = bool(problem["faculties"])
+        self.durations = problem["durations"]
+        self.preferred = problem["preferred"]
+        self.room_types = problem["room_types"]
+        self.rooms_needed = problem["rooms_needed"]
+        self.capacity = {room_type: len(rooms) for room_type, rooms in problem["rooms_by_type"].items()}
+        self.required = problem["sessions"]
+        self.min_slots = (self.num_days * self.num_slots) // 2
+        self.fillers = {
+            c: [subj for subj in subjects if (c, subj) not in self.required]
+            for c, subjects in problem["class_subjects"].items()
+        }
+
+        self.class_count = {}    # (c, d, s) -> sessions covering the cell
+        self.faculty_count = {}  # (f, d, s) -> sessions covering the slot
+        self.room_use = {}       # (room_type, d, s) -> rooms in use
+        self.day_count = {}      # (c, d, subj) -> sessions that day
+        self.group_count = {}    # (c, subj) -> sessions in the week
+        self.covered = [0] * len(problem["classes"])  # filled cells per class
+        # Violations of the empty timetable: every class short of coverage and lesson hours
+        self.hard = self.min_slots * len(problem["classes"]) + sum(self.required.values())
+        self.objective = 0
+
+        self.sessions = {}       # session id -> (c, d, s, subj, f)
+        self.class_sessions = {} # c -> {session id}
+        self.cell_sessions = {}  # ("c", c, d, s) / ("f", f, d, s) / ("r", room_type, d, s) -> {session id}
+        self.hot = set()         # sessions involved in a violation
+        self.next_id = 0
+
+        self.tabu = {}           # (kind, c, subj, d, s) -> iteration it is allowed again
+        self.iterations = 0
+        self.moves = 0
+        self.best = []
+        self.best_cost = None
+        self.feasible_after = None  # seconds until the first conflict-free timetable
+
+    # ==================== INCREMENTAL COST ====================
+
+    def _count(self, c, d, s, subj, f, sign):
+        """
+        Add (sign=1) or remove (sign=-1) a session from the counters.
+        Returns the change in violations; self.hard/objective are updated.
+        """
+        key = (c, subj)
+        duration = self.durations[key]
+        room_type = self.room_types[key]
+        capacity = self.capacity.get(room_type, 0)
+        needed = self.rooms_needed[key]
+        class_count = self.class_count
+        faculty_count = self.faculty_count
+        room_use = self.room_use
+
+        hard = 0
+        newly_covered = 0
+        for covered in range(s, s + duration):
+            cell = (c, d, covered)
+            n = class_count.get(cell, 0)
+            if sign > 0:
+                if n:
+                    hard += 1
+                else:
+                    newly_covered += 1
+            elif n > 1:
+                hard -= 1
+            else:
+                newly_covered -= 1
+            class_count[cell] = n + sign
+
+            if self.check_faculty:
+                slot = (f, d, covered)
+                n = faculty_count.get(slot, 0)
+                hard += (1 if n else 0) if sign > 0 else (-1 if n > 1 else 0)
+                faculty_count[slot] = n + sign
+
+            if capacity:
+                slot = (room_type, d, covered)
+                used = room_use.get(slot, 0)
+                now = used + sign * needed
+                hard += max(0, now - capacity) - max(0, used - capacity)
+                room_use[slot] = now
+
+        before = self.covered[c]
+        after = before + newly_covered
+        hard += max(0, self.min_slots - after) - max(0, self.min_slots - before)
+        self.covered[c] = after
+
+        limit = 2 if duration == 1 else 1
+        day_key = (c, d, subj)
+        n = self.day_count.get(day_key, 0)
+        hard += max(0, n + sign - limit) - max(0, n - limit)
+        self.day_count[day_key] = n + sign
+
+        n = self.group_count.get(key, 0)
+        if key in self.required:
+            required = self.required[key]
+            hard += abs(n + sign - required) - abs(n - required)
+        self.group_count[key] = n + sign
+
+        self.hard += hard
+        if (c, subj, f) in self.preferred:
+            self.objective += sign * 10 * duration
+        return hard
+
+    def _cost(self):
+        return HARD_WEIGHT * self.hard - self.objective
+
+    def _evaluate(self, removals, additions):
+        """Cost change of removing session ids and adding sessions (counters are restored)"""
+        before = self._cost()
+        for session in removals:
+            self._count(*self.sessions[session], -1)
+        for added in additions:
+            self._count(*added, 1)
+        delta = self._cost() - before
+        for added in additions:
+            self._count(*added, -1)
+        for session in removals:
+            self._count(*self.sessions[session], 1)
+        return delta
+
+    def breakdown(self):
+        """Violations by rule, recomputed from the counters"""
+        counts = {"class_clash": 0, "faculty_clash": 0, "room_overuse": 0,
+                  "lesson_sessions": 0, "daily_limit": 0, "coverage": 0}
+        counts["class_clash"] = sum(n - 1 for n in self.class_count.values() if n > 1)
+        counts["faculty_clash"] = sum(n - 1 for n in self.faculty_count.values() if n > 1)
+        counts["room_overuse"] = sum(
+            max(0, used - self.capacity.get(room_type, 0))
+            for (room_type, _d, _s), used in self.room_use.items() if self.capacity.get(room_type, 0)
+        )
+        counts["lesson_sessions"] = sum(
+            abs(self.group_count.get(key, 0) - required) for key, required in self.required.items()
+        )
+        counts["daily_limit"] = sum(
+            max(0, n - (2 if self.durations[(c, subj)] == 1 else 1))
+            for (c, _d, subj), n in self.day_count.items()
+        )
+        counts["coverage"] = sum(max(0, self.min_slots - covered) for covered in self.covered)
+        return counts
+
+    # ==================== SESSIONS ====================
+
+    def _cell_keys(self, session):
+        c, d, s, subj, f = session
+        key = (c, subj)
+        keys = []
+        for covered in range(s, s + self.durations[key]):
+            keys.append(("c", c, d, covered))
+            if self.check_faculty:
+                keys.append(("f", f, d, covered))
+            if self.capacity.get(self.room_types[key], 0):
+                keys.append(("r", self.room_types[key], d, covered))
+        keys.append(("d", c, d, subj))
+        keys.append(("g", c, subj))
+        return keys
+
+    def insert(self, session):
+        session_id = self.next_id
+        self.next_id += 1
+        self._count(*session, 1)
+        self.sessions[session_id] = session
+        self.class_sessions.setdefault(session[0], set()).add(session_id)
+        for key in self._cell_keys(session):
+            self.cell_sessions.setdefault(key, set()).add(session_id)
+        return session_id
+
+    def delete(self, session_id):
+        session = self.sessions.pop(session_id)
+        self._count(*session, -1)
+        self.class_sessions[session[0]].discard(session_id)
+        for key in self._cell_keys(session):
+            self.cell_sessions[key].discard(session_id)
+        self.hot.discard(session_id)
+        return session
+
+    def _is_hot(self, session_id):
+        """True if the session takes part in a clash, a daily limit or a lesson-hour surplus"""
+        c, d, s, subj, f = self.sessions[session_id]
+        key = (c, subj)
+        room_type = self.room_types[key]
+        capacity = self.capacity.get(room_type, 0)
+        for covered in range(s, s + self.durations[key]):
+            if self.class_count[(c, d, covered)] > 1:
+                return True
+            if self.check_faculty and self.faculty_count[(f, d, covered)] > 1:
+                return True
+            if capacity and self.room_use[(room_type, d, covered)] > capacity:
+                return True
+        if self.day_count[(c, d, subj)] > (2 if self.durations[key] == 1 else 1):
+            return True
+        return key in self.required and self.group_count[key] > self.required[key]
+
+    def _refresh_hot(self, sessions):
+        """Re-check every session sharing a cell, day or group with the given sessions"""
+        touched = set()
+        for session in sessions:
+            for key in self._cell_keys(session):
+                touched |= self.cell_sessions.get(key, set())
+        for session_id in touched:
+            if self._is_hot(session_id):
+                self.hot.add(session_id)
+            else:
+                self.hot.discard(session_id)
+
+    def apply(self, removals, additions):
+        removed = [self.delete(session_id) for session_id in removals]
+        added = [self.insert(session) for session in additions]
+        self._refresh_hot(removed + list(additions))
+        for c, d, s, subj, _f in removed:
+            self.tabu[("add", c, subj, d, s)] = self.iterations + self._tenure()
+        for session_id in added:
+            c, d, s, subj, _f = self.sessions[session_id]
+            self.tabu[("drop", c, subj, d, s)] = self.iterations + self._tenure()
+        self.moves += 1
+
+    def _tenure(self):
+        base, extra = TABU_TENURE
+        return base + self.rng.randint(0, extra)
+
+    def _is_tabu(self, kind, c, subj, d, s):
+        return self.tabu.get((kind, c, subj, d, s), 0) > self.iterations
+
+    # ==================== NEIGHBOURHOODS ====================
+
+    def _faculty_options(self, c, subj, current=None):
+        allowed = self.problem["allowed_faculties"][(c, subj)]
+        if len(allowed) <= MAX_FACULTY_OPTIONS:
+            return allowed
+        options = {g for g in allowed if (c, subj, g) in self.preferred}
+        if current is not None:
+            options.add(current)
+        options.update(self.rng.sample(allowed, MAX_FACULTY_OPTIONS))
+        return sorted(options)
+
+    def _placements(self, c, subj, faculties):
+        duration = self.durations[(c, subj)]
+        for d in range(self.num_days):
+            for s in range(self.num_slots - duration + 1):
+                if self._is_tabu("add", c, subj, d, s):
+                    continue
+                for f in faculties:
+                    yield (c, d, s, subj, f)
+
+    def _session_moves(self, session_id):
+        """Relocations, swaps within the class and (if allowed) dropping the session"""
+        c, d, s, subj, f = session = self.sessions[session_id]
+        moves = [
+            ([session_id], [target])
+            for target in self._placements(c, subj, self._faculty_options(c, subj, f))
+            if target != session
+        ]
+        duration = self.durations[(c, subj)]
+        for other_id in self.class_sessions[c]:
+            _, od, os_, osubj, of = self.sessions[other_id]
+            if osubj == subj or self.durations[(c, osubj)] != duration or (od, os_) == (d, s):
+                continue
+            moves.append(([session_id, other_id], [(c, od, os_, subj, f), (c, d, s, osubj, of)]))
+        if not self._is_tabu("drop", c, subj, d, s):
+            moves.append(([session_id], []))
+        return moves
+
+    def _deficits(self):
+        """Groups short of their lesson hours and classes below minimum coverage"""
+        groups = [key for key, required in self.required.items() if self.group_count.get(key, 0) < required]
+        groups.extend(
+            (c, self.rng.choice(self.fillers[c]))
+            for c, covered in enumerate(self.covered)
+            if covered < self.min_slots and self.fillers.get(c)
+        )
+        return groups
+
+    def _improvement_moves(self):
+        """Moves towards preferred faculties once the timetable is conflict-free"""
+        if self.sessions and self.rng.random() < 0.7:
+            session_id = self.rng.choice(list(self.sessions))
+            return self._session_moves(session_id)
+        c = self.rng.randrange(len(self.problem["classes"]))
+        if not self.fillers.get(c):
+            return []
+        subj = self.rng.choice(self.fillers[c])
+        preferred = [g for g in self.problem["allowed_faculties"][(c, subj)] if (c, subj, g) in self.preferred]
+        return [([], [target]) for target in self._placements(c, subj, preferred)]
+
+    # ==================== SEARCH ====================
+
+    def _record_best(self):
+        cost = self._cost()
+        if self.best_cost is None or cost < self.best_cost:
+            self.best_cost = cost
+            self.best = list(self.sessions.values())
+            return True
+        return False
+
+    def run(self, deadline):
+        started = time.perf_counter()
+        self._refresh_hot(list(self.sessions.values()))
+        self._record_best()
+        stale = 0
+        while time.perf_counter() < deadline:
+            self.iterations += 1
+            if self.hard:
+                deficits = self._deficits()
+                if self.hot and (not deficits or self.rng.random() < len(self.hot) / (len(self.hot) + len(deficits))):
+                    moves = self._session_moves(self.rng.choice(list(self.hot)))
+                elif deficits:
+                    c, subj = self.rng.choice(deficits)
+                    moves = [([], [target]) for target in self._placements(c, subj, self._faculty_options(c, subj))]
+                else:
+                    # Violations without a session to blame (e.g. coverage with no filler subjects)
+                    break
+            else:
+                moves = self._improvement_moves()
+
+            best_move, best_delta = None, None
+            for move in moves:
+                delta = self._evaluate(*move)
+                if best_delta is None or delta < best_delta:
+                    best_move, best_delta = move, delta
+            if best_move is None:
+                continue
+            if not self.hard and best_delta > 0:
+                # Conflict-free: only sideways or improving moves
+                stale += 1
+                if stale > MAX_STALE_ITERATIONS:
+                    break
+                continue
+
+            self.apply(*best_move)
+            if not self.hard and self.feasible_after is None:
+                self.feasible_after = round(time.perf_counter() - started, 3)
+            if self._record_best():
+                stale = 0
+            else:
+                stale += 1
+                if not self.hard and stale > MAX_STALE_ITERATIONS:
+                    break
@@ -0,0 +1,366 @@
+"""
+Portfolio solver: several strategies race on the same input.
+
+Each strategy (CP-SAT with different parameters, heuristic construction
+with restarts, local search) runs in its own process under one shared
+deadline. Strategies publish every conflict-free timetable they find to a
+shared incumbent (a multiprocessing.Manager dict, like the job progress in
+services.job_service); local search restarts from the incumbent when
+another strategy beats it. The race stops as soon as the incumbent reaches
+an upper bound on the objective (CP-SAT's best bound or the cheap bound of
+objective_upper_bound), so easy instances finish as fast as the quickest
+strategy that solves them. All candidates are scored the same way
+(local_search.evaluate_sessions) and the best conflict-free one wins.
+"""
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+from .csp_scheduler import (
+    generate_timetable_csp, _build_problem, _extract_timetable, _compact_solution, _generate_empty_timetable,
+    _as_requested
+)
+from .heuristic_scheduler import schedule_problem
+from .local_search import improve_sessions, evaluate_sessions, sessions_from_timetable
+from .solver_profiles import resolve_solver_profile
+
+PORTFOLIO_STRATEGIES = [
+    # The configured solver profile
+    {"name": "cpsat", "kind": "cpsat"},
+    # Same model, different search: other seed, stronger LP relaxation, portfolio branching,
+    # symmetry breaking (slower to first solutions, much faster at proving the bound)
+    {"name": "cpsat-alt", "kind": "cpsat", "solver_options": {
+        "random_seed": 17, "linearization_level": 2, "search_branching": "PORTFOLIO_SEARCH"
+    }, "config": {"symmetry_breaking": True}},
+    {"name": "heuristic", "kind": "heuristic"},
+    {"name": "local_search", "kind": "local_search"}
+]
+
+HEURISTIC_RESTARTS = 8
+
+# Local search runs in rounds of this many seconds, picking up better incumbents in between
+LOCAL_SEARCH_ROUND = 1.0
+
+# Seconds local search waits for another strategy's first incumbent before building its own
+LOCAL_SEARCH_WAIT = 1.0
+
+POLL_INTERVAL = 0.1
+
+
+def solve_portfolio(data, config=None, report=None, time_limit=None, strategies=None, stop_event=None,
+                    compact=False, progress_callback=None, stream_solutions=False):
+    """
+    Race the portfolio strategies and return the best timetable.
+
+    Args:
+        data, config: as for generate_timetable_csp; config may carry
+                "portfolio_strategies" (names from PORTFOLIO_STRATEGIES) and
+                "portfolio_time_limit" (seconds)
+        report: optional dict, filled with the run summary (winner, objective,
+                upper bound, per-strategy results)
+        time_limit: seconds for the whole race (default: portfolio_time_limit,
+                else the solver profile's max_time_in_seconds)
+        strategies: optional list of strategy dicts (default: PORTFOLIO_STRATEGIES)
+        stop_event: optional Event; setting it ends the race with the best result so far
+        compact: if True, return a CompactTimetable instead of the dict shape
+        progress_callback: optional callable, invoked from this process with
+                {"solutions", "objective", "best_bound", "elapsed"} whenever the
+                shared incumbent improves; returning True ends the race with it
+        stream_solutions: if True, progress_callback info also carries a
+                "timetable" entry with the compact incumbent (see
+                csp_scheduler._compact_solution)
+
+    Returns:
+        Timetable dict: {class: {day: {slot: {subject, faculty, room}}}}
+        (CompactTimetable if compact)
+    """
+    classes = data.get("classes", [])
+    if not classes or not data.get("subjects"):
+        return _as_requested(_generate_empty_timetable(classes), compact)
+
+    config = config or {}
+    problem = _build_problem(data, config)
+    _, profile = resolve_solver_profile(config)
+    time_limit = float(time_limit or config.get("portfolio_time_limit") or profile["max_time_in_seconds"])
+    strategies = _with_workers(strategies or default_strategies(config), profile)
+    upper_bound = objective_upper_bound(problem)
+
+    print(f"🏁 Portfolio: {', '.join(s['name'] for s in strategies)} "
+          f"racing for {time_limit}s (objective bound {upper_bound})")
+
+    start = time.time()
+    deadline = start + time_limit
+    results = {}
+    stopped_early = False
+    reported = {"solutions": 0, "objective": None}
+    manager = multiprocessing.Manager()
+    try:
+        incumbent = manager.dict({"objective": None, "sessions": None, "source": None, "bound": upper_bound})
+        lock = manager.Lock()
+        race_over = manager.Event()
+
+        with ProcessPoolExecutor(max_workers=len(strategies)) as executor:
+            futures = {
+                executor.submit(_run_strategy, strategy, data, config, deadline, incumbent, lock, race_over):
+                    strategy["name"]
+                for strategy in strategies
+            }
+            pending = set(futures)
+            while pending:
+                done, pending = wait(pending, timeout=POLL_INTERVAL, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = futures[future]
+                    try:
+                        results[name] = future.result()
+                    except Exception as e:
+                        print(f"⚠️ Portfolio strategy '{name}' failed: {e}")
+                        results[name] = {"name": name, "error": str(e)}
+
+                if progress_callback is not None and _report_progress(
+                        progress_callback, stream_solutions, problem, incumbent, lock, reported, start):
+                    race_over.set()
+                if race_over.is_set():
+                    continue
+                best = incumbent.get("objective")
+                if best is not None and best >= incumbent.get("bound") - 1e-6:
+                    stopped_early = bool(pending)
+                    race_over.set()
+                elif time.time() > deadline or (stop_event is not None and stop_event.is_set()):
+                    race_over.set()
+
+        shared = incumbent.copy()
+    finally:
+        manager.shutdown()
+
+    # The incumbent goes first so ties credit the strategy that found it first
+    candidates = []
+    if shared["sessions"] is not None:
+        candidates.append({
+            "name": shared["source"], "sessions": shared["sessions"],
+            "violations": 0, "objective": shared["objective"]
+        })
+    candidates.extend(result for result in results.values() if result.get("sessions") is not None)
+    if candidates:
+        winner = min(candidates, key=lambda result: (result["violations"], -result["objective"]))
+        sessions = winner["sessions"]
+    else:
+        winner, sessions = {"name": None, "violations": None, "objective": None}, []
+
+    timetable = _extract_timetable(problem, {key: 1 for key in sessions}, lambda value: value)
+    summary = {
+        "scheduler": "portfolio",
+        "status": "COMPLETE" if winner["violations"] == 0 else "PARTIAL",
+        "winner": winner["name"],
+        "objective": winner["objective"],
+        "violations": winner["violations"],
+        "upper_bound": shared["bound"],
+        "optimal": winner["violations"] == 0 and winner["objective"] >= shared["bound"] - 1e-6,
+        "wall_time": round(time.time() - start, 3),
+        "time_limit": time_limit,
+        "stopped_early": stopped_early,
+        "fallback": winner["violations"] != 0,
+        "strategies": {
+            name: {key: result.get(key) for key in ("status", "objective", "violations", "wall_time", "error")}
+            for name, result in results.items()
+        }
+    }
+    print(f"   Portfolio: '{summary['winner']}' wins in {summary['wall_time']}s "
+          f"(objective={summary['objective']}, bound={summary['upper_bound']}, "
+          f"violations={summary['violations']})")
+    if report is not None:
+        report.update(summary)
+    return _as_requested(timetable, compact)
+
+
+def _report_progress(progress_callback, stream_solutions, problem, incumbent, lock, reported, start):
+    """
+    Pass an improved incumbent to progress_callback (polling loop of solve_portfolio).
+
+    Returns:
+        bool: True if the callback asks to stop
+    """
+    if incumbent.get("objective") is None or incumbent.get("objective") == reported["objective"]:
+        return False
+    with lock:
+        shared = incumbent.copy()
+    reported["objective"] = shared["objective"]
+    reported["solutions"] += 1
+    info = {
+        "solutions": reported["solutions"],
+        "objective": shared["objective"],
+        "best_bound": shared["bound"],
+        "elapsed": round(time.time() - start, 3)
+    }
+    if stream_solutions:
+        info["timetable"] = _compact_solution(problem, {key: 1 for key in shared["sessions"]}, lambda value: value)
+    return bool(progress_callback(info))
+
+
+def default_strategies(config=None):
+    """PORTFOLIO_STRATEGIES, limited to config["portfolio_strategies"] names if given"""
+    names = (config or {}).get("portfolio_strategies")
+    if not names:
+        return [dict(strategy) for strategy in PORTFOLIO_STRATEGIES]
+    known = {strategy["name"]: strategy for strategy in PORTFOLIO_STRATEGIES}
+    unknown = [name for name in names if name not in known]
+    if unknown:
+        print(f"⚠️ Unknown portfolio strategies {unknown}, expected some of {sorted(known)}")
+    return [dict(known[name]) for name in names if name in known] or [dict(s) for s in PORTFOLIO_STRATEGIES]
+
+
+def _with_workers(strategies, profile):
+    """Share the profile's CP-SAT workers between the CP-SAT strategies"""
+    cpsat = [strategy for strategy in strategies if strategy["kind"] == "cpsat"]
+    if cpsat:
+        spare = max(1, min(profile["num_workers"], (os.cpu_count() or 1) - (len(strategies) - len(cpsat))))
+        for strategy in cpsat:
+            strategy["solver_options"] = dict(
+                strategy.get("solver_options") or {}, num_workers=max(1, spare // len(cpsat))
+            )
+    return strategies
+
+
+def objective_upper_bound(problem):
+    """
+    Cheap upper bound on the CP-SAT objective (10 per slot taught by a
+    preferred faculty), ignoring faculty and room clashes: per class, the
+    required sessions with a preferred faculty, plus as many subjects without
+    fixed hours with a preferred faculty as fit in the remaining slots and
+    the daily limit.
+    """
+    num_days = len(problem["days"])
+    cells = num_days * len(problem["slots"])
+    total = 0
+    for c, subjects in problem["class_subjects"].items():
+        free = cells
+        required_slots = 0
+        optional_slots = 0
+        for subj in subjects:
+            key = (c, subj)
+            duration = problem["durations"][key]
+            preferred = any((c, subj, f) in problem["preferred"] for f in problem["allowed_faculties"][key])
+            if key in problem["required_hours"]:
+                slots = problem["sessions"][key] * duration
+                free -= slots
+                required_slots += slots if preferred else 0
+            elif preferred:
+                optional_slots += num_days * (2 if duration == 1 else 1) * duration
+        total += required_slots + min(max(free, 0), optional_slots)
+    return 10 * total
+
+
+# ==================== STRATEGIES (worker processes) ====================
+
+def _publish(incumbent, lock, name, sessions, objective):
+    """Offer a conflict-free timetable as the shared incumbent"""
+    with lock:
+        if incumbent["objective"] is None or objective > incumbent["objective"]:
+            incumbent.update(objective=objective, sessions=list(sessions), source=name, found_at=time.time())
+            return True
+    return False
+
+
+def _publish_bound(incumbent, lock, bound):
+    """Tighten the shared objective bound"""
+    if bound is None:
+        return
+    with lock:
+        if bound < incumbent["bound"]:
+            incumbent["bound"] = bound
+
+
+def _run_strategy(strategy, data, config, deadline, incumbent, lock, race_over):
+    """
+    Process-pool entry point: run one strategy until it finishes, the
+    deadline passes or race_over is set.
+
+    Returns:
+        dict: {"name", "status", "sessions", "violations", "objective", "wall_time", "report"}
+    """
+    start = time.time()
+    problem = _build_problem(data, config)
+    runner = {"cpsat": _run_cpsat, "heuristic": _run_heuristic, "local_search": _run_local_search}[strategy["kind"]]
+    sessions, report = runner(strategy, data, config, problem, deadline, incumbent, lock, race_over)
+
+    violations, objective = evaluate_sessions(problem, sessions)
+    if not violations:
+        _publish(incumbent, lock, strategy["name"], sessions, objective)
+    return {
+        "name": strategy["name"],
+        "status": report.get("status"),
+        "sessions": sessions,
+        "violations": violations,
+        "objective": objective,
+        "wall_time": round(time.time() - start, 3),
+        "report": report
+    }
+
+
+def _run_cpsat(strategy, data, config, problem, deadline, incumbent, lock, race_over):
+    options = dict(
+        config.get("solver_options") or {},
+        **(strategy.get("solver_options") or {}),
+        max_time_in_seconds=max(0.1, deadline - time.time())
+    )
+    # Without a solution the other strategies cover for CP-SAT: no fallback run
+    cp_config = dict(config, **(strategy.get("config") or {}), solver_options=options, heuristic_fallback=False)
+
+    def on_progress(info):
+        _publish_bound(incumbent, lock, info.get("best_bound"))
+        return race_over.is_set()
+
+    report = {}
+    timetable = generate_timetable_csp(
+        data, cp_config, report, progress_callback=on_progress, stop_event=race_over, compact=True
+    )
+    if not report.get("fallback"):
+        _publish_bound(incumbent, lock, report.get("best_bound"))
+    sessions, _ = sessions_from_timetable(problem, timetable)
+    return sessions, report
+
+
+def _run_heuristic(strategy, data, config, problem, deadline, incumbent, lock, race_over):
+    best, best_key = [], None
+    restarts = 0
+    for seed in range(strategy.get("restarts", HEURISTIC_RESTARTS)):
+        if race_over.is_set() or time.time() > deadline:
+            break
+        placements, _ = schedule_problem(problem, seed)
+        restarts += 1
+        violations, objective = evaluate_sessions(problem, placements)
+        if best_key is None or (violations, -objective) < best_key:
+            best, best_key = placements, (violations, -objective)
+            if not violations:
+                _publish(incumbent, lock, strategy["name"], placements, objective)
+    status = "COMPLETE" if best_key is not None and best_key[0] == 0 else "PARTIAL"
+    return best, {"status": status, "restarts": restarts}
+
+
+def _run_local_search(strategy, data, config, problem, deadline, incumbent, lock, race_over):
+    # Start from another strategy's first timetable if one comes quickly
+    wait_until = min(deadline, time.time() + LOCAL_SEARCH_WAIT)
+    while incumbent["sessions"] is None and time.time() < wait_until and not race_over.is_set():
+        time.sleep(0.05)
+    if incumbent["sessions"] is not None:
+        current = list(incumbent["sessions"])
+    else:
+        current, _ = schedule_problem(problem, seed=1)
+
+    summary = {"status": None, "rounds": 0, "adopted": 0}
+    while not race_over.is_set() and time.time() < deadline:
+        round_time = min(LOCAL_SEARCH_ROUND, deadline - time.time())
+        current, result = improve_sessions(
+            problem, current, seed=summary["rounds"], deadline=time.perf_counter() + round_time
+        )
+        summary["rounds"] += 1
+        summary["status"] = result["status"]
+        if not result["violations"]:
+            _publish(incumbent, lock, strategy["name"], current, result["objective"])
+
+        # Continue from a better timetable found by another strategy
+        shared = incumbent["objective"]
+        if shared is not None and (result["violations"] or shared > result["objective"]):
+            current = list(incumbent["sessions"])
+            summary["adopted"] += 1
+    return current, summary
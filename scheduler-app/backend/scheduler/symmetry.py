@@ -0,0 +1,182 @@
+"""
+Symmetry breaking for the CP-SAT model.
+
+Many timetables are the same timetable up to renaming: the five days are
+interchangeable in the model, as are two faculties allowed for exactly the
+same (class, subject) pairs, or two classes with the same subjects, hours
+and faculties. CP-SAT would otherwise explore every such copy.
+
+All constraints added here are lexicographic-leader constraints with
+respect to one variable order, (class, day, slot, subject, faculty), plus a
+canonical order of the days by their per-subject session counts, which
+faculty and class swaps leave unchanged; so every group of equivalent
+timetables keeps at least one member and the optimum does not change.
+
+CP-SAT's presolve already detects many of these symmetries itself, and on
+feasible instances the extra constraints mostly slow the first solutions
+down, so generate_timetable_csp only adds them when
+config["symmetry_breaking"] is set; the detected groups are reported either way.
+"""
+import math
+
+from ortools.sat.python import cp_model
+
+
+def detect_symmetries(problem, index):
+    """
+    Interchangeable faculties, classes and days of a problem.
+
+    Args:
+        index: from _build_model(problem)
+
+    Returns:
+        dict: {"faculty_groups", "class_groups", "days", "subjects"} with
+        faculty and class index lists, the number of interchangeable days
+        and the subjects taught (the day order key)
+    """
+    num_days = len(problem["days"])
+    subjects = sorted({subj for (_, _, subj) in index["by_class_day_subject"]})
+    return {
+        "faculty_groups": _interchangeable_faculties(problem),
+        "class_groups": _interchangeable_classes(problem),
+        "days": num_days if num_days > 1 and subjects else 0,
+        "subjects": subjects
+    }
+
+
+def symmetry_summary(problem, symmetries, constraints=0):
+    """
+    Report of detected symmetries.
+
+    Returns:
+        dict: {"faculty_groups", "class_groups", "days", "constraints",
+               "group_size", "log10_reduction"} with names instead of indices;
+               group_size is the number of equivalent copies of each
+               timetable, the factor by which symmetry breaking shrinks the
+               space of solutions at most
+    """
+    group_log = sum(math.lgamma(len(group) + 1) for group in symmetries["faculty_groups"])
+    group_log += sum(math.lgamma(len(group) + 1) for group in symmetries["class_groups"])
+    group_log += math.lgamma(symmetries["days"] + 1)
+    log10_reduction = group_log / math.log(10)
+    return {
+        "faculty_groups": [[problem["faculty_names"][f] for f in group] for group in symmetries["faculty_groups"]],
+        "class_groups": [[problem["classes"][c] for c in group] for group in symmetries["class_groups"]],
+        "days": symmetries["days"],
+        "constraints": constraints,
+        "group_size": f"{10 ** log10_reduction:.3g}",
+        "log10_reduction": round(log10_reduction, 2)
+    }
+
+
+def break_symmetries(model, problem, assignments, index, symmetries=None):
+    """
+    Add symmetry-breaking constraints for interchangeable faculties,
+    classes and days to the model.
+
+    Args:
+        model, assignments, index: from _build_model(problem)
+        symmetries: optional result of detect_symmetries
+
+    Returns:
+        dict: symmetry_summary with the number of constraints added
+    """
+    symmetries = symmetries or detect_symmetries(problem, index)
+    constraints = 0
+    keys_by_faculty, keys_by_class = {}, {}
+    for key in sorted(assignments):
+        keys_by_faculty.setdefault(key[4], []).append(key)
+        keys_by_class.setdefault(key[0], []).append(key)
+
+    # Faculties: same allowed (class, subject) pairs and preferences
+    for group in symmetries["faculty_groups"]:
+        for first, second in zip(group, group[1:]):
+            left, right = [], []
+            for key in keys_by_faculty[first]:
+                left.append(assignments[key])
+                right.append(assignments[key[:4] + (second,)])
+            constraints += _lex_greater_equal(model, left, right, f"sym_f{first}_{second}")
+
+    # Classes: same subjects, hours, durations, rooms and allowed faculties
+    for group in symmetries["class_groups"]:
+        for first, second in zip(group, group[1:]):
+            left, right = [], []
+            for key in keys_by_class[first]:
+                left.append(assignments[key])
+                right.append(assignments[(second,) + key[1:]])
+            constraints += _lex_greater_equal(model, left, right, f"sym_c{first}_{second}")
+
+    # Days: canonical order, by sessions of each subject (summed over classes) per day
+    num_days = symmetries["days"]
+    if num_days:
+        counts = []
+        for d in range(num_days):
+            day_counts = []
+            for subj in symmetries["subjects"]:
+                day_vars = [
+                    var for c in range(len(problem["classes"]))
+                    for var in index["by_class_day_subject"].get((c, d, subj), [])
+                ]
+                day_counts.append(cp_model.LinearExpr.Sum(day_vars))
+            counts.append(day_counts)
+        for d in range(num_days - 1):
+            constraints += _lex_greater_equal(model, counts[d], counts[d + 1], f"sym_d{d}")
+
+    return symmetry_summary(problem, symmetries, constraints)
+
+
+def _interchangeable_faculties(problem):
+    """Groups (sorted index lists, size > 1) of faculties with identical (class, subject, preferred) sets"""
+    signatures = {}
+    for c, subj, f in problem["triples"]:
+        signatures.setdefault(f, set()).add((c, subj, (c, subj, f) in problem["preferred"]))
+    groups = {}
+    for f, signature in signatures.items():
+        groups.setdefault(frozenset(signature), []).append(f)
+    return sorted(sorted(group) for group in groups.values() if len(group) > 1)
+
+
+def _interchangeable_classes(problem):
+    """Groups (sorted index lists, size > 1) of classes that only differ by name"""
+    groups = {}
+    for c in range(len(problem["classes"])):
+        signature = tuple(
+            (
+                subj,
+                tuple(problem["allowed_faculties"][(c, subj)]),
+                tuple((c, subj, f) in problem["preferred"] for f in problem["allowed_faculties"][(c, subj)]),
+                problem["required_hours"].get((c, subj)),
+                problem["durations"][(c, subj)],
+                problem["room_types"][(c, subj)],
+                problem["rooms_needed"][(c, subj)]
+            )
+            for subj in problem["class_subjects"][c]
+        )
+        groups.setdefault(signature, []).append(c)
+    return sorted(group for group in groups.values() if len(group) > 1)
+
+
+def _lex_greater_equal(model, left, right, name):
+    """
+    Constrain the sequence left to be lexicographically >= right
+    (BoolVars or integer linear expressions, same length).
+
+    equal[i] is forced true while the prefix up to i is equal; it may only
+    turn false where left is strictly greater.
+
+    Returns:
+        int: number of constraints added
+    """
+    added = 0
+    equal = None
+    for i, (a, b) in enumerate(zip(left, right)):
+        guard = [] if equal is None else [equal]
+        model.Add(a >= b).OnlyEnforceIf(guard)
+        added += 1
+        if i == len(left) - 1:
+            break
+        following = model.NewBoolVar(f"{name}_eq{i}")
+        model.Add(a >= b + 1).OnlyEnforceIf(guard + [following.Not()])
+        added += 1
+        equal = following
+    return added
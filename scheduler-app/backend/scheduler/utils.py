@@ -1,12 +1,27 @@
 """
 Utility functions for timetable validation and analysis
 """
+import numpy as np
 
+from .compact import CompactTimetable
 
-def validate_timetable(timetable, faculties=None):
+
+def validate_timetable(timetable, faculties=None, lesson_hours=None, max_daily_sessions=2):
     """
     Validate a generated timetable and check for conflicts.
     
+    All checks run as bulk NumPy operations over the integer-coded
+    timetable (see CompactTimetable):
+      - conflicts: faculty double-booking, room double-booking (including
+        the rooms of lab batches), lesson-hour shortfalls against lesson_hours
+      - warnings: lesson-hour overruns, a subject taught more than
+        max_daily_sessions times a day (a multi-slot block counts once),
+        uneven faculty workload, low fill rate
+    
+    Args:
+        timetable: {class: {day: {slot: entry}}} dict or CompactTimetable
+        lesson_hours: optional {class: [{"subject", "hours"}, ...]} to check hours against
+    
     Returns:
         dict: {
             "valid": bool,
@@ -33,52 +48,111 @@ def validate_timetable(timetable, faculties=None):
             "stats": stats
         }
     
-    # Track faculty assignments per time slot
-    faculty_schedule = {}  # {(day, slot): {faculty: class}}
+    compact = CompactTimetable.from_dict(timetable)
+    filled = compact.filled
     
-    stats["classes"] = len(timetable)
+    stats["classes"] = len(compact.classes)
+    stats["total_slots"] = int(filled.size)
+    stats["filled_slots"] = int(filled.sum())
+    stats["empty_slots"] = stats["total_slots"] - stats["filled_slots"]
     
-    for class_name, class_data in timetable.items():
-        for day, day_data in class_data.items():
-            for slot, entry in day_data.items():
-                stats["total_slots"] += 1
-                
-                if entry is None:
-                    stats["empty_slots"] += 1
-                    continue
-                
-                stats["filled_slots"] += 1
-                
-                faculty = entry.get("faculty", "TBD")
-                subject = entry.get("subject", "Unknown")
-                
-                # Track faculty assignments
-                if faculty not in stats["faculty_assignments"]:
-                    stats["faculty_assignments"][faculty] = 0
-                stats["faculty_assignments"][faculty] += 1
-                
-                # Check for faculty conflicts (same faculty, same time, different class)
-                time_key = (day, slot)
-                if time_key not in faculty_schedule:
-                    faculty_schedule[time_key] = {}
-                
-                if faculty in faculty_schedule[time_key]:
-                    other_class = faculty_schedule[time_key][faculty]
-                    if other_class != class_name and faculty != "TBD":
-                        conflicts.append({
-                            "type": "faculty_conflict",
-                            "faculty": faculty,
-                            "day": day,
-                            "slot": slot,
-                            "classes": [class_name, other_class]
-                        })
-                else:
-                    faculty_schedule[time_key][faculty] = class_name
+    # Faculty workload (cells without a faculty count as "TBD", as before)
+    faculty_codes = np.where(compact.faculty >= 0, compact.faculty, len(compact.faculties))[filled]
+    counts = np.bincount(faculty_codes, minlength=len(compact.faculties) + 1)
+    faculty_names = compact.faculties + ["TBD"]
+    for code in np.nonzero(counts)[0]:
+        name = faculty_names[code]
+        stats["faculty_assignments"][name] = stats["faculty_assignments"].get(name, 0) + int(counts[code])
+    
+    # Check for faculty conflicts (same faculty, same time, different class)
+    valid_faculty = filled & (compact.faculty >= 0)
+    if "TBD" in compact.faculties:
+        valid_faculty &= compact.faculty != compact.faculties.index("TBD")
+    c, d, s = np.nonzero(valid_faculty)
+    for group in _clashes(compact, c, d, s, compact.faculty[c, d, s].astype(np.int64)):
+        first, day, slot, code = group[0]
+        for other, _, _, _ in group[1:]:
+            conflicts.append({
+                "type": "faculty_conflict",
+                "faculty": compact.faculties[code],
+                "day": compact.days[day],
+                "slot": compact.slots[slot],
+                "classes": [compact.classes[other], compact.classes[first]]
+            })
+    
+    # Check for room conflicts (same room, same time: different classes or batches)
+    c, d, s, rooms, room_names = _room_bookings(compact, filled)
+    for group in _clashes(compact, c, d, s, rooms):
+        first, day, slot, code = group[0]
+        for other, _, _, _ in group[1:]:
+            conflicts.append({
+                "type": "room_conflict",
+                "room": room_names[code],
+                "day": compact.days[day],
+                "slot": compact.slots[slot],
+                "classes": [compact.classes[other], compact.classes[first]]
+            })
+    
+    # Check lesson hours (scheduled slots per class and subject)
+    if lesson_hours:
+        # Subject codes grouped by case-insensitive name; the last group is "no subject"
+        groups = {}
+        group_of = [groups.setdefault(_lower(name), len(groups)) for name in compact.subjects]
+        num_groups = len(groups) + 1
+        subject_groups = np.array(group_of + [num_groups - 1], dtype=np.int64)[
+            np.where(compact.subject >= 0, compact.subject, len(compact.subjects))
+        ]
+        class_axis = np.arange(len(compact.classes), dtype=np.int64)[:, None, None]
+        scheduled = np.bincount(
+            (class_axis * num_groups + subject_groups)[filled],
+            minlength=len(compact.classes) * num_groups
+        ).reshape(len(compact.classes), num_groups)
+        class_index = {name: i for i, name in enumerate(compact.classes)}
+        for class_name, lessons in lesson_hours.items():
+            if class_name not in class_index or not isinstance(lessons, list):
+                continue
+            row = scheduled[class_index[class_name]]
+            for lesson in lessons:
+                required = lesson.get("hours", 0) or 0
+                group = groups.get(_lower(lesson.get("subject")))
+                count = int(row[group]) if group is not None else 0
+                issue = {
+                    "class": class_name,
+                    "subject": lesson.get("subject"),
+                    "required": required,
+                    "scheduled": count
+                }
+                if count < required:
+                    conflicts.append(dict(issue, type="lesson_hours_shortfall"))
+                elif count > required:
+                    warnings.append(dict(issue, type="lesson_hours_overrun"))
+    
+    # Check per-day subject repetition (sessions: a multi-slot block counts once)
+    sessions = filled & (compact.subject >= 0)
+    for (c_idx, d_idx, s_idx), extra in compact.extras.items():
+        block = extra.get("block") if isinstance(extra, dict) else None
+        if block and block.get("start") != compact.slots[s_idx]:
+            sessions[c_idx, d_idx, s_idx] = False
+    c, d, s = np.nonzero(sessions)
+    if len(c):
+        keys = (c * len(compact.days) + d) * len(compact.subjects) + compact.subject[c, d, s]
+        unique_keys, key_counts = np.unique(keys, return_counts=True)
+        for key, count in zip(unique_keys[key_counts > max_daily_sessions], key_counts[key_counts > max_daily_sessions]):
+            class_day, subject_code = divmod(int(key), len(compact.subjects))
+            class_idx, day_idx = divmod(class_day, len(compact.days))
+            warnings.append({
+                "type": "subject_repetition",
+                "class": compact.classes[class_idx],
+                "day": compact.days[day_idx],
+                "subject": compact.subjects[subject_code],
+                "sessions": int(count),
+                "limit": max_daily_sessions
+            })
     
     # Check for uneven workload distribution
     if stats["faculty_assignments"]:
-        assignments = list(stats["faculty_assignments"].values())
-        avg = sum(assignments) / len(assignments)
+        assignments = np.array(list(stats["faculty_assignments"].values()))
+        avg = float(assignments.mean())
         for faculty, count in stats["faculty_assignments"].items():
             if faculty != "TBD" and count > avg * 1.5:
                 warnings.append({
@@ -108,10 +182,82 @@ def validate_timetable(timetable, faculties=None):
     }
 
 
-def get_faculty_timetable(full_timetable, faculty_name):
+def _lower(name):
+    return name.lower() if isinstance(name, str) else name
+
+
+def _room_bookings(compact, filled):
+    """
+    Every room booking of a compact timetable. A lab with batches books one
+    room per batch entry (and its main room, if no batch uses it), so two
+    batches in the same room in one cell show up as a clash.
+    
+    Returns:
+        (class, day, slot, room code) index arrays and the room names the codes refer to
+    """
+    room_names = list(compact.rooms)
+    room_codes = {name: i for i, name in enumerate(room_names)}
+    booked = filled & (compact.room >= 0)
+    if "TBD" in room_codes:
+        booked &= compact.room != room_codes["TBD"]
+    
+    extra = []
+    for (c_idx, d_idx, s_idx), fields in compact.extras.items():
+        batches = fields.get("batches") or []
+        if not batches or not filled[c_idx, d_idx, s_idx]:
+            continue
+        batch_rooms = [batch.get("room") for batch in batches]
+        main = int(compact.room[c_idx, d_idx, s_idx])
+        if main >= 0 and compact.rooms[main] in batch_rooms:
+            booked[c_idx, d_idx, s_idx] = False
+        for name in batch_rooms:
+            if not name or name == "TBD":
+                continue
+            if name not in room_codes:
+                room_codes[name] = len(room_names)
+                room_names.append(name)
+            extra.append((c_idx, d_idx, s_idx, room_codes[name]))
+    
+    c, d, s = np.nonzero(booked)
+    rooms = compact.room[c, d, s].astype(np.int64)
+    if extra:
+        extra = np.array(extra, dtype=np.int64)
+        c, d, s = (np.concatenate([axis, extra[:, i]]) for i, axis in enumerate((c, d, s)))
+        rooms = np.concatenate([rooms, extra[:, 3]])
+    
+    return c, d, s, rooms, room_names
+
+
+def _clashes(compact, c, d, s, codes):
+    """
+    Group bookings (class c uses resource codes[i] at day d, slot s) that
+    share a resource at the same time.
+    
+    Returns:
+        list: [[(class, day, slot, code), ...] per clash], classes in order
+    """
+    if not len(c):
+        return []
+    codes = np.asarray(codes, dtype=np.int64)
+    keys = (d.astype(np.int64) * len(compact.slots) + s) * (int(codes.max()) + 1) + codes
+    order = np.lexsort((c, keys))
+    _, starts, counts = np.unique(keys[order], return_index=True, return_counts=True)
+    
+    groups = []
+    for start, count in zip(starts[counts > 1], counts[counts > 1]):
+        rows = order[start:start + count]
+        groups.append([(int(c[i]), int(d[i]), int(s[i]), int(codes[i])) for i in rows])
+    return groups
+
+
+def get_faculty_timetable(full_timetable, faculty_name, index=None):
     """
     Extract a specific faculty's timetable from the full timetable.
     
+    Args:
+        index: optional CompactTimetable.build_index() of a compact timetable,
+               making the lookup proportional to the result
+    
     Returns:
         dict: {day: {slot: {subject, class}}}
     """
@@ -120,6 +266,9 @@ def get_faculty_timetable(full_timetable, faculty_name):
     if not full_timetable:
         return faculty_view
     
+    if isinstance(full_timetable, CompactTimetable):
+        return full_timetable.faculty_view(faculty_name, index)
+    
     for class_name, class_data in full_timetable.items():
         for day, day_data in class_data.items():
             for slot, entry in day_data.items():
@@ -136,22 +285,35 @@ def get_faculty_timetable(full_timetable, faculty_name):
     return faculty_view
 
 
-def get_room_timetable(full_timetable, room_name):
+def get_room_timetable(full_timetable, room_name, index=None):
     """
     Extract a specific room's timetable from the full timetable.
     
+    Args:
+        index: optional CompactTimetable.build_index() of a compact timetable
+    
     Returns:
-        dict: {day: {slot: {subject, class, faculty}}}
+        dict: {day: {slot: {subject, class, faculty}}}, with "batches" for
+        lab batches taught in the room
     """
     room_view = {}
     
     if not full_timetable:
         return room_view
     
+    if isinstance(full_timetable, CompactTimetable):
+        return full_timetable.room_view(room_name, index)
+    
     for class_name, class_data in full_timetable.items():
         for day, day_data in class_data.items():
             for slot, entry in day_data.items():
-                if entry and entry.get("room", "").lower() == room_name.lower():
+                if not entry:
+                    continue
+                batches = [
+                    batch.get("batch") for batch in entry.get("batches") or []
+                    if (batch.get("room") or "").lower() == room_name.lower()
+                ]
+                if batches or entry.get("room", "").lower() == room_name.lower():
                     if day not in room_view:
                         room_view[day] = {}
                     
@@ -160,6 +322,8 @@ def get_room_timetable(full_timetable, room_name):
                         "class": class_name,
                         "faculty": entry.get("faculty", "TBD")
                     }
+                    if batches:
+                        room_view[day][slot]["batches"] = batches
     
     return room_view
 
@@ -170,6 +334,9 @@ def count_subject_hours(timetable, class_name, subject_name):
     """
     count = 0
     
+    if isinstance(timetable, CompactTimetable):
+        return timetable.subject_hours(class_name, subject_name)
+    
     if not timetable or class_name not in timetable:
         return count
     
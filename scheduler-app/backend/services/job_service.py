@@ -0,0 +1,365 @@
+"""
+Background timetable-generation jobs.
+
+Solves run in a process pool so the Flask request that starts a generation
+returns immediately with a job id. Each job shares a small progress dict and
+a stop event with its worker process; the CP-SAT solution callback writes
+the objective progress (and, for streaming jobs, the latest compact solution)
+there, and setting the stop event ends the search. A cancelled job is
+discarded, an accepted job keeps its best solution so far. Finished
+timetables are persisted through timetable_service in the web process.
+
+Note: the job registry lives in the process that created the jobs, so status
+requests must reach the same server process (single worker or sticky sessions).
+"""
+import multiprocessing
+import os
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+
+from scheduler.csp_scheduler import generate_timetable_csp
+from scheduler.portfolio import solve_portfolio
+from scheduler.lns import solve_lns
+from scheduler.compact import CompactTimetable
+from services.timetable_service import (
+    load_scheduler_input,
+    save_timetable,
+    build_timetable_meta,
+    build_warm_start
+)
+from services.solve_cache import SOLVE_CACHE
+from services.timetable_history import version_summary
+
+
+MAX_WORKERS = int(os.getenv("SCHEDULER_JOB_WORKERS", "2"))
+MAX_FINISHED_JOBS = 20
+MAX_PROGRESS_POINTS = 200
+
+JOB_STATUSES = ["queued", "running", "completed", "failed", "cancelled"]
+
+_EXECUTOR = None
+_MANAGER = None
+_LOCK = threading.Lock()
+JOBS = {}  # job_id -> job dict
+
+
+def _get_executor():
+    """Lazily start the process pool and the manager used for shared job state"""
+    global _EXECUTOR, _MANAGER
+    with _LOCK:
+        if _EXECUTOR is None:
+            _MANAGER = multiprocessing.Manager()
+            _EXECUTOR = ProcessPoolExecutor(max_workers=MAX_WORKERS)
+        return _EXECUTOR, _MANAGER
+
+
+def _solve_job(data, config, progress, stop_event, stream_solutions=False, warm_start=None):
+    """
+    Worker-process entry point: run the CSP solver and report progress.
+
+    Returns:
+        (CompactTimetable, report)
+    """
+    progress["status"] = "running"
+    progress["started_at"] = time.time()
+
+    def on_progress(info):
+        solution = info.pop("timetable", None)
+        # latest (and the streamed solution) first: a client that sees a point
+        # in the history can always accept it
+        progress["latest"] = info
+        if solution is not None:
+            progress["latest_solution"] = dict(info, timetable=solution)
+        progress["history"] = (progress.get("history", []) + [info])[-MAX_PROGRESS_POINTS:]
+        return stop_event.is_set()
+
+    report = {}
+    if config.get("portfolio") and warm_start is None:
+        timetable = solve_portfolio(data, config, report, stop_event=stop_event, compact=True,
+                                    progress_callback=on_progress, stream_solutions=stream_solutions)
+        return timetable, report
+    if config.get("lns") and warm_start is None:
+        timetable = solve_lns(data, config, report, progress_callback=on_progress, stop_event=stop_event,
+                              compact=True)
+        return timetable, report
+    timetable = generate_timetable_csp(
+        data, config, report, progress_callback=on_progress, stop_event=stop_event,
+        stream_solutions=stream_solutions, warm_start=warm_start, compact=True
+    )
+    return timetable, report
+
+
+def submit_generation_job(solver_profile=None, stream_solutions=False, incremental=False, portfolio=None,
+                          lns=None):
+    """
+    Enqueue a timetable generation job.
+
+    Args:
+        solver_profile: optional profile name overriding timetable_config["solver_profile"]
+        stream_solutions: keep the latest improving solution for streaming
+        incremental: re-solve starting from the stored timetable, keeping
+                     classes whose input did not change
+        portfolio: optional override of timetable_config["portfolio"] (race
+                   several strategies, see scheduler.portfolio)
+        lns: optional override of timetable_config["lns"] (large neighborhood
+             search, see scheduler.lns; no streaming)
+
+    Returns:
+        str: job id
+    """
+    data, config = load_scheduler_input(solver_profile)
+    if portfolio is not None:
+        config = dict(config, portfolio=bool(portfolio))
+    if lns is not None:
+        config = dict(config, lns=bool(lns))
+    job_id = uuid.uuid4().hex
+
+    # An incremental re-solve depends on the stored timetable, which the cache key does not cover
+    cached = SOLVE_CACHE.get(data, config) if SOLVE_CACHE and not incremental else None
+    if cached is not None:
+        return _complete_from_cache(job_id, data, config, *cached)
+
+    warm_start = build_warm_start(data, config) if incremental else None
+    executor, manager = _get_executor()
+    progress = manager.dict({"status": "queued", "history": [], "latest": None, "latest_solution": None})
+    stop_event = manager.Event()
+
+    job = {
+        "id": job_id,
+        "status": "queued",
+        "solver_profile": config.get("solver_profile"),
+        "created_at": time.time(),
+        "finished_at": None,
+        "stream_solutions": stream_solutions,
+        "incremental": incremental,
+        "progress": progress,
+        "stop_event": stop_event,
+        "cancel_requested": False,
+        "accepted": False,
+        "report": None,
+        "error": None,
+        "timetable": None
+    }
+
+    with _LOCK:
+        _prune_finished_jobs()
+        JOBS[job_id] = job
+
+    print(f"🔄 Queued timetable generation job {job_id}")
+    job["future"] = executor.submit(
+        _solve_job, data, config, progress, stop_event, stream_solutions, warm_start
+    )
+    job["future"].add_done_callback(lambda future: _on_job_done(job_id, future, data, config))
+    return job_id
+
+
+def _complete_from_cache(job_id, data, config, timetable, report):
+    """Register an already-completed job for a solve-cache hit (failed if it cannot be saved)"""
+    error = None
+    try:
+        save_timetable(timetable, build_timetable_meta(data, config), version_summary(report))
+    except RuntimeError as e:
+        error = str(e)
+    now = time.time()
+    job = {
+        "id": job_id,
+        "status": "failed" if error else "completed",
+        "solver_profile": config.get("solver_profile"),
+        "created_at": now,
+        "finished_at": now,
+        "stream_solutions": False,
+        "incremental": False,
+        "progress": {"status": "completed", "history": [], "latest": None, "latest_solution": None},
+        "stop_event": None,
+        "cancel_requested": False,
+        "accepted": False,
+        "report": report,
+        "error": error,
+        "timetable": None if error else CompactTimetable.from_dict(timetable)
+    }
+    with _LOCK:
+        _prune_finished_jobs()
+        JOBS[job_id] = job
+    if error:
+        print(f"❌ Timetable generation job {job_id} failed: {error}")
+    else:
+        print(f"✅ Timetable generation job {job_id} served from solve cache ({report['cache']})")
+    return job_id
+
+
+def _on_job_done(job_id, future, data, config):
+    """Persist the result of a finished job (runs in the web process)"""
+    job = JOBS.get(job_id)
+    if job is None:
+        return
+
+    try:
+        if future.cancelled():
+            job["status"] = "cancelled"
+        elif future.exception() is not None:
+            job["status"] = "failed"
+            error = future.exception()
+            job["error"] = "".join(traceback.format_exception_only(type(error), error)).strip()
+            print(f"❌ Timetable generation job {job_id} failed: {job['error']}")
+        else:
+            timetable, report = future.result()
+            job["report"] = report
+            if job["cancel_requested"]:
+                job["status"] = "cancelled"
+            else:
+                if SOLVE_CACHE and not job["accepted"] and not job["incremental"]:
+                    SOLVE_CACHE.put(data, config, timetable.to_dict(), report)
+                save_timetable(timetable, build_timetable_meta(data, config), version_summary(report))
+                job["timetable"] = timetable
+                job["status"] = "completed"
+                print(f"✅ Timetable generation job {job_id} finished and saved")
+    except Exception as e:
+        # e.g. save_timetable's RuntimeError when the store could not save the timetable
+        job["status"] = "failed"
+        job["error"] = str(e)
+        print(f"❌ Timetable generation job {job_id} failed: {job['error']}")
+    finally:
+        job["finished_at"] = time.time()
+
+
+def _prune_finished_jobs():
+    """Keep only the most recent finished jobs in the registry"""
+    finished = sorted(
+        (job for job in JOBS.values() if job["finished_at"] is not None),
+        key=lambda job: job["finished_at"]
+    )
+    for job in finished[:-MAX_FINISHED_JOBS]:
+        JOBS.pop(job["id"], None)
+
+
+def _job_status(job):
+    """Current status, taking the worker-side progress into account"""
+    if job["status"] == "queued":
+        try:
+            return job["progress"].get("status", "queued")
+        except Exception:
+            return "queued"
+    return job["status"]
+
+
+def get_job(job_id):
+    """
+    Get the public view of a job.
+
+    Returns:
+        dict or None: {job_id, status, solver_profile, created_at, finished_at, elapsed, latest, report, error}
+    """
+    job = JOBS.get(job_id)
+    if job is None:
+        return None
+
+    latest = None
+    if job["finished_at"] is None:
+        try:
+            latest = job["progress"].get("latest")
+        except Exception:
+            latest = None
+
+    end = job["finished_at"] or time.time()
+    return {
+        "job_id": job_id,
+        "status": _job_status(job),
+        "solver_profile": job["solver_profile"],
+        "created_at": job["created_at"],
+        "finished_at": job["finished_at"],
+        "accepted": job["accepted"],
+        "elapsed": round(end - job["created_at"], 3),
+        "latest": latest or (job["report"] and {
+            "objective": job["report"].get("objective"),
+            "best_bound": job["report"].get("best_bound")
+        }),
+        "report": job["report"],
+        "error": job["error"]
+    }
+
+
+def get_job_progress(job_id):
+    """
+    Get the objective progress of a job, one point per improving solution.
+
+    Returns:
+        list or None: [{solutions, objective, best_bound, elapsed}, ...]
+    """
+    job = JOBS.get(job_id)
+    if job is None:
+        return None
+    try:
+        return list(job["progress"].get("history", []))
+    except Exception:
+        # The manager is gone (e.g. during shutdown); nothing more to report
+        return []
+
+
+def cancel_job(job_id):
+    """
+    Cancel a queued or running job. A running solve is stopped and its
+    result is not saved.
+
+    Returns:
+        bool: False if the job does not exist or has already finished
+    """
+    job = JOBS.get(job_id)
+    if job is None or job["finished_at"] is not None:
+        return False
+
+    job["cancel_requested"] = True
+    job["stop_event"].set()
+    if job["future"].cancel():
+        job["status"] = "cancelled"
+    print(f"🛑 Cancellation requested for timetable generation job {job_id}")
+    return True
+
+
+def accept_job(job_id):
+    """
+    Stop a running job early and keep its best solution so far. The job
+    then completes and is saved like a normal run.
+
+    Returns:
+        bool: False if the job does not exist, has finished or has no solution yet
+    """
+    job = JOBS.get(job_id)
+    if job is None or job["finished_at"] is not None:
+        return False
+    try:
+        if not job["progress"].get("latest"):
+            return False
+    except Exception:
+        return False
+
+    job["accepted"] = True
+    job["stop_event"].set()
+    print(f"👍 Current solution accepted for timetable generation job {job_id}")
+    return True
+
+
+def get_latest_solution(job_id):
+    """
+    Latest improving solution of a streaming job.
+
+    Returns:
+        dict or None: {solutions, objective, best_bound, elapsed, timetable}
+    """
+    job = JOBS.get(job_id)
+    if job is None:
+        return None
+    try:
+        return job["progress"].get("latest_solution")
+    except Exception:
+        return None
+
+
+def get_job_result(job_id):
+    """Timetable (dict shape) produced by a completed job, None otherwise"""
+    job = JOBS.get(job_id)
+    if job is None or job["status"] != "completed":
+        return None
+    return job["timetable"].to_dict()
@@ -0,0 +1,259 @@
+"""
+Content-addressed cache of solved timetables.
+
+The scheduler input (data + timetable_config + solver profile and strategy)
+is normalized into a canonical form and hashed; identical inputs map to the
+same key no matter how lists and dicts were ordered when they were saved. Results live in
+a bounded in-memory LRU tier backed by a bounded on-disk tier, so repeat
+generations (and other server processes) skip the solve entirely.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from dotenv import load_dotenv
+
+from scheduler.solver_profiles import resolve_solver_profile
+
+load_dotenv()
+
+SOLVE_CACHE_ENABLED = os.getenv("SOLVE_CACHE_ENABLED", "true").lower() == "true"
+SOLVE_CACHE_SIZE = int(os.getenv("SOLVE_CACHE_SIZE", "32"))
+SOLVE_CACHE_DISK_SIZE = int(os.getenv("SOLVE_CACHE_DISK_SIZE", "256"))
+SOLVE_CACHE_DIR = os.getenv(
+    "SOLVE_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".solve_cache")
+)
+
+# Bump when the solver model changes so stale results are not served
+CACHE_FORMAT_VERSION = 4
+
+
+def _norm(value):
+    return (value or "").strip() if isinstance(value, str) else value
+
+
+def _subject_entry(subject):
+    return {
+        "name": _norm(subject.get("name")),
+        "short": _norm(subject.get("short")),
+        "type": subject.get("type", "lecture"),
+        "duration_slots": subject.get("duration_slots", 1)
+    }
+
+
+def canonical_solver_input(data, config):
+    """
+    Normalize the scheduler input so that equivalent inputs compare equal.
+
+    Returns:
+        dict: sorted, JSON-serializable view of everything the solver reads
+    """
+    config = config or {}
+    profile_name, profile = resolve_solver_profile(config)
+
+    lesson_hours = {}
+    for class_name, lessons in (config.get("lesson_hours") or {}).items():
+        if isinstance(lessons, list):
+            lesson_hours[class_name] = sorted(
+                [_norm(lesson.get("subject")), lesson.get("hours", 0)] for lesson in lessons
+            )
+
+    faculty_choices = {
+        faculty: {
+            class_name: sorted(_norm(choice) for choice in choices or [])
+            for class_name, choices in (by_class or {}).items()
+        }
+        for faculty, by_class in (config.get("faculty_choices") or {}).items()
+    }
+
+    subjects_by_class = {
+        class_name: sorted((_subject_entry(s) for s in subjects or []), key=lambda s: s["name"])
+        for class_name, subjects in (config.get("subjects_by_class") or {}).items()
+    }
+
+    return {
+        "version": CACHE_FORMAT_VERSION,
+        "classes": sorted(data.get("classes", [])),
+        "subjects": sorted((_subject_entry(s) for s in data.get("subjects", [])), key=lambda s: s["name"]),
+        "faculties": sorted(_norm(f.get("name")) for f in data.get("faculties", [])),
+        "rooms": sorted([_norm(r.get("room")), r.get("type", "classroom")] for r in data.get("rooms", [])),
+        "lectures_per_day": config.get("lectures_per_day", 6),
+        "lesson_hours": lesson_hours,
+        "faculty_choices": faculty_choices,
+        "subjects_by_class": subjects_by_class,
+        "batches": {
+            class_name: sorted(batches or [])
+            for class_name, batches in (data.get("batches") or {}).items()
+        },
+        "solver_profile": [profile_name, profile],
+        "strategy": solver_strategy(config)
+    }
+
+
+def solver_strategy(config):
+    """
+    The switches choosing how the timetable is solved (see
+    generate_timetable_csp, solve_portfolio, solve_lns), with their defaults.
+    Different strategies find different timetables for the same input.
+    """
+    return {
+        "portfolio": bool(config.get("portfolio")),
+        "lns": bool(config.get("lns")),
+        "decompose": bool(config.get("decompose", True)),
+        "symmetry_breaking": bool(config.get("symmetry_breaking", False)),
+        "heuristic_fallback": bool(config.get("heuristic_fallback", True)),
+        "feasibility_check": bool(config.get("feasibility_check", True))
+    }
+
+
+def solver_input_key(data, config):
+    """SHA-256 of the canonical scheduler input"""
+    canonical = json.dumps(canonical_solver_input(data, config), sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def class_fingerprints(data, config):
+    """
+    Per-class hash of the input that shapes that class's timetable: its
+    subjects, lesson hours, batches and faculty choices, plus the global time grid
+    and faculty list. Used to find classes untouched by a config edit.
+
+    Returns:
+        dict: {class_name: sha256 hex}
+    """
+    canonical = canonical_solver_input(data, config)
+    shared = [canonical["lectures_per_day"], canonical["faculties"], canonical["subjects"]]
+
+    fingerprints = {}
+    for class_name in canonical["classes"]:
+        choices = {
+            faculty: by_class[class_name]
+            for faculty, by_class in canonical["faculty_choices"].items()
+            if by_class.get(class_name)
+        }
+        payload = json.dumps([
+            shared,
+            canonical["subjects_by_class"].get(class_name, []),
+            canonical["lesson_hours"].get(class_name, []),
+            canonical["batches"].get(class_name, []),
+            choices
+        ], sort_keys=True, separators=(",", ":"))
+        fingerprints[class_name] = hashlib.sha256(payload.encode("utf-8")).hexdigest()
+    return fingerprints
+
+
+class SolveCache:
+    """Two-tier (memory LRU + disk) cache of solved timetables"""
+
+    def __init__(self, max_entries=SOLVE_CACHE_SIZE, directory=SOLVE_CACHE_DIR,
+                 max_disk_entries=SOLVE_CACHE_DISK_SIZE):
+        self.max_entries = max_entries
+        self.directory = directory
+        self.max_disk_entries = max_disk_entries
+        self._entries = OrderedDict()  # key -> {"timetable", "report"}
+        self._lock = threading.Lock()
+
+    def get(self, data, config):
+        """
+        Look up a solved timetable for this input.
+
+        Returns:
+            (timetable, report) or None; report["cache"] names the tier that hit
+        """
+        key = solver_input_key(data, config)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                return entry["timetable"], dict(entry["report"], cache="memory")
+
+        entry = self._read_disk(key)
+        if entry is None:
+            return None
+
+        self._remember(key, entry)
+        return entry["timetable"], dict(entry["report"], cache="disk")
+
+    def put(self, data, config, timetable, report=None):
+        """Store a solved timetable. Fallback (unsolved) results are not cached."""
+        report = dict(report or {})
+        if report.get("fallback"):
+            return
+        report.pop("cache", None)
+
+        key = solver_input_key(data, config)
+        entry = {"timetable": timetable, "report": report}
+        self._remember(key, entry)
+        self._write_disk(key, entry)
+
+    def clear(self):
+        """Drop every cached result (both tiers)"""
+        with self._lock:
+            self._entries.clear()
+        for path in self._disk_files():
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def _remember(self, key, entry):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.json")
+
+    def _disk_files(self):
+        if not self.directory or not os.path.isdir(self.directory):
+            return []
+        return [
+            os.path.join(self.directory, name)
+            for name in os.listdir(self.directory) if name.endswith(".json")
+        ]
+
+    def _read_disk(self, key):
+        if not self.directory:
+            return None
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+            os.utime(path)  # keep recently used entries on disk
+            return entry
+        except (OSError, ValueError):
+            return None
+
+    def _write_disk(self, key, entry):
+        if not self.directory or self.max_disk_entries <= 0:
+            return
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            tmp_path = f"{self._path(key)}.{os.getpid()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(dict(entry, created_at=time.time()), f)
+            os.replace(tmp_path, self._path(key))
+            self._evict_disk()
+        except OSError as e:
+            print(f"⚠️ Could not write solve cache entry: {e}")
+
+    def _evict_disk(self):
+        files = self._disk_files()
+        if len(files) <= self.max_disk_entries:
+            return
+        files.sort(key=lambda path: os.path.getmtime(path))
+        for path in files[:len(files) - self.max_disk_entries]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+SOLVE_CACHE = SolveCache() if SOLVE_CACHE_ENABLED else None
@@ -0,0 +1,76 @@
+"""
+In-process read-through cache of the current timetable.
+
+Read endpoints go through timetable_service, which keeps the decoded
+CompactTimetable, its metadata (inverted indexes, fingerprints) and the
+lazily built dict shape here, keyed by a version token of the stored
+timetable (the timetables row id and updated_at in Supabase, a token
+regenerated on every save in memory). Saving invalidates the cache in the
+saving process; other processes (e.g. gunicorn workers) compare the stored
+version token at most every TIMETABLE_CACHE_TTL seconds and reload when it
+changed.
+"""
+import os
+import threading
+import time
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+TIMETABLE_CACHE_ENABLED = os.getenv("TIMETABLE_CACHE_ENABLED", "true").lower() == "true"
+TIMETABLE_CACHE_TTL = float(os.getenv("TIMETABLE_CACHE_TTL", "5"))
+
+
+class TimetableCache:
+    """Single-entry cache of the current timetable, validated by version token"""
+
+    def __init__(self, ttl=TIMETABLE_CACHE_TTL):
+        self.ttl = ttl
+        self._entry = None
+        self._lock = threading.Lock()
+
+    def get(self, load_version, load):
+        """
+        Current timetable entry, reloading it when the stored version changed.
+
+        Args:
+            load_version: callable returning the stored version token (None if no timetable)
+            load: callable returning (version, compact, meta) from storage
+
+        Returns:
+            dict or None: {"version", "compact", "meta", "timetable", "checked_at"}
+        """
+        with self._lock:
+            entry = self._entry
+            now = time.monotonic()
+            if entry is not None and now - entry["checked_at"] < self.ttl:
+                pass
+            elif entry is not None and load_version() == entry["version"]:
+                entry["checked_at"] = now
+            else:
+                version, compact, meta = load()
+                # "No timetable yet" is cached too, so reads do not hit storage until one is saved
+                entry = self._entry = {
+                    "version": version,
+                    "compact": compact if compact else None,
+                    "meta": meta,
+                    "timetable": None,
+                    "checked_at": now
+                }
+            return entry if entry["compact"] is not None else None
+
+    def timetable(self, entry):
+        """Dict shape of a cached entry, decoded once per version (treat as read-only)"""
+        with self._lock:
+            if entry["timetable"] is None:
+                entry["timetable"] = entry["compact"].to_dict()
+            return entry["timetable"]
+
+    def invalidate(self):
+        """Drop the cached timetable (e.g. after saving a new one)"""
+        with self._lock:
+            self._entry = None
+
+
+TIMETABLE_CACHE = TimetableCache() if TIMETABLE_CACHE_ENABLED else None
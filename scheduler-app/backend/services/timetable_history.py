@@ -0,0 +1,233 @@
+"""
+Versioned timetable history.
+
+Every saved timetable is recorded as a version. A "base" version stores the
+full compact payload; later versions store only the cells that differ from
+their base (CompactTimetable.delta_from), so N generations of a mostly
+stable timetable cost little more than one. A new base is started when the
+classes/days/slots change or when a delta would cover too many cells.
+Versions load without re-solving: base + delta.
+"""
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+from dotenv import load_dotenv
+
+from scheduler.compact import CompactTimetable
+from storage import get_store
+
+load_dotenv()
+
+# Number of versions kept (older ones are pruned, except bases still in use)
+TIMETABLE_HISTORY_LIMIT = int(os.getenv("TIMETABLE_HISTORY_LIMIT", "20"))
+
+# Start a new base once a delta would cover more than this fraction of the cells
+TIMETABLE_HISTORY_REBASE = float(os.getenv("TIMETABLE_HISTORY_REBASE", "0.5"))
+
+# Decoded base timetables by id (bases never change once written)
+_BASES = OrderedDict()
+_BASES_SIZE = 4
+_LOCK = threading.Lock()
+
+
+def version_summary(report=None, source="solver"):
+    """Short description of how a version was produced, shown in the version list"""
+    report = report or {}
+    summary = {"source": source}
+    for key in ("scheduler", "status", "objective", "cache"):
+        if report.get(key) is not None:
+            summary[key] = report[key]
+    return summary
+
+
+def _load_base(base_id):
+    """Decoded base timetable (None if missing or not a base)"""
+    with _LOCK:
+        if base_id in _BASES:
+            _BASES.move_to_end(base_id)
+            return _BASES[base_id]
+
+    entry = get_store().get_history_entry(base_id)
+    if not entry or entry["kind"] != "base":
+        return None
+    compact = CompactTimetable.load(entry["data"])
+    with _LOCK:
+        _BASES[base_id] = compact
+        while len(_BASES) > _BASES_SIZE:
+            _BASES.popitem(last=False)
+    return compact
+
+
+def record_version(timetable, meta=None, summary=None, prune=True):
+    """
+    Add a timetable to the history and prune old versions.
+
+    Args:
+        timetable: CompactTimetable
+        meta: metadata saved with it (e.g. input fingerprints; the index is not kept)
+        summary: optional dict from version_summary
+        prune: delete versions beyond the limit right away (save_timetable
+               prunes with prune_history only once the timetable is stored)
+
+    Returns:
+        int or None: the new version id
+    """
+    store = get_store()
+    if TIMETABLE_HISTORY_LIMIT <= 0:
+        return None
+
+    entries = store.get_history()
+    latest_base = next((entry for entry in entries if entry["kind"] == "base"), None)
+
+    record = {
+        "kind": "base",
+        "base_id": None,
+        "data": timetable.to_json_dict(),
+        "stored_cells": int(timetable.filled.sum())
+    }
+    base = _load_base(latest_base["id"]) if latest_base else None
+    if base is not None and base.same_axes(timetable):
+        delta = timetable.delta_from(base)
+        if len(delta["cells"]) <= TIMETABLE_HISTORY_REBASE * timetable.subject.size:
+            record = {
+                "kind": "delta",
+                "base_id": latest_base["id"],
+                "data": delta,
+                "stored_cells": len(delta["cells"])
+            }
+
+    record["meta"] = {
+        "fingerprints": (meta or {}).get("fingerprints"),
+        "summary": summary or {}
+    }
+    version_id = store.save_history_entry(record)
+    if version_id is None:
+        return None
+
+    if prune:
+        entries.insert(0, {"id": version_id, "kind": record["kind"], "base_id": record["base_id"]})
+        _prune(store, entries)
+    print(f"   Saved timetable version {version_id} ({record['kind']}, {record['stored_cells']} cells)")
+    return version_id
+
+
+def discard_version(version_id):
+    """Delete a version whose timetable could not be saved"""
+    get_store().delete_history_entries([version_id])
+    with _LOCK:
+        _BASES.pop(version_id, None)
+
+
+def prune_history():
+    """Delete versions beyond TIMETABLE_HISTORY_LIMIT"""
+    store = get_store()
+    _prune(store, store.get_history())
+
+
+def _prune(store, entries):
+    """Delete versions beyond the limit, keeping bases that kept deltas refer to"""
+    kept = entries[:TIMETABLE_HISTORY_LIMIT]
+    needed = {entry["id"] for entry in kept} | {entry["base_id"] for entry in kept if entry["base_id"]}
+    stale = [entry["id"] for entry in entries if entry["id"] not in needed]
+    if stale:
+        store.delete_history_entries(stale)
+        with _LOCK:
+            for version_id in stale:
+                _BASES.pop(version_id, None)
+
+
+def _public(entry):
+    meta = entry.get("meta") or {}
+    return {
+        "id": entry["id"],
+        "created_at": entry.get("created_at"),
+        "kind": entry["kind"],
+        "stored_cells": entry.get("stored_cells"),
+        "summary": meta.get("summary") or {}
+    }
+
+
+def list_versions():
+    """
+    Kept versions, newest first.
+
+    Returns:
+        list of {"id", "created_at", "kind", "stored_cells", "summary"}
+    """
+    return [_public(entry) for entry in get_store().get_history()][:TIMETABLE_HISTORY_LIMIT]
+
+
+def load_version(version_id):
+    """
+    Rebuild one version (no solver run).
+
+    Returns:
+        (CompactTimetable, version dict with "fingerprints") or (None, None) if unknown
+    """
+    entry = get_store().get_history_entry(version_id)
+    if not entry:
+        return None, None
+
+    if entry["kind"] == "base":
+        base = _load_base(entry["id"])
+        compact = base.copy() if base is not None else None
+    else:
+        base = _load_base(entry["base_id"])
+        compact = base.apply_delta(entry["data"]) if base is not None else None
+    if compact is None:
+        return None, None
+
+    version = _public(entry)
+    version["fingerprints"] = (entry.get("meta") or {}).get("fingerprints")
+    return compact, version
+
+
+def diff_timetables(before, after):
+    """
+    Cells that differ between two timetables.
+
+    Returns:
+        list of {"class", "day", "slot", "before", "after"} (entries in the dict shape, None if empty)
+    """
+    if before.same_axes(after):
+        shape = after.subject.shape
+        cells = []
+        for flat in after.diff_cells(before):
+            c, d, s = (int(i) for i in np.unravel_index(flat, shape))
+            cells.append({
+                "class": after.classes[c], "day": after.days[d], "slot": after.slots[s],
+                "before": before.entry(c, d, s), "after": after.entry(c, d, s)
+            })
+        return cells
+
+    # Classes, days or slots changed: compare by name
+    old, new = before.to_dict(), after.to_dict()
+    cells = []
+    for class_name in sorted(set(old) | set(new)):
+        old_days, new_days = old.get(class_name) or {}, new.get(class_name) or {}
+        for day in sorted(set(old_days) | set(new_days)):
+            old_slots, new_slots = old_days.get(day) or {}, new_days.get(day) or {}
+            for slot in sorted(set(old_slots) | set(new_slots)):
+                if old_slots.get(slot) != new_slots.get(slot):
+                    cells.append({
+                        "class": class_name, "day": day, "slot": slot,
+                        "before": old_slots.get(slot), "after": new_slots.get(slot)
+                    })
+    return cells
+
+
+def diff_versions(from_id, to_id):
+    """
+    Changes between two versions.
+
+    Returns:
+        dict or None: {"from", "to", "changed", "cells"} (None if either version is unknown)
+    """
+    before, _ = load_version(from_id)
+    after, _ = load_version(to_id)
+    if before is None or after is None:
+        return None
+    cells = diff_timetables(before, after)
+    return {"from": from_id, "to": to_id, "changed": len(cells), "cells": cells}
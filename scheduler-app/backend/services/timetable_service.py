@@ -1,40 +1,187 @@
 from scheduler.csp_scheduler import generate_timetable_csp
-from services.data_service import get_all_data, get_timetable_config
-import os
-from dotenv import load_dotenv
+from scheduler.heuristic_scheduler import generate_timetable_heuristic
+from scheduler.local_search import repair_timetable
+from scheduler.portfolio import solve_portfolio
+from scheduler.lns import solve_lns
+from scheduler.feasibility import analyze_feasibility
+from scheduler.compact import CompactTimetable
+from scheduler.utils import get_faculty_timetable, get_room_timetable
+from services.data_service import get_all_data
+from services.solve_cache import SOLVE_CACHE, class_fingerprints
+from services.timetable_cache import TIMETABLE_CACHE
+from services.timetable_history import (
+    record_version, discard_version, prune_history, load_version, version_summary
+)
+from storage import get_store
 
-load_dotenv()
 
-USE_SUPABASE = os.getenv("USE_SUPABASE", "false").lower() == "true"
-
-if USE_SUPABASE:
-    try:
-        from storage.supabase_store import SupabaseStore
-        STORE = SupabaseStore()
-    except Exception:
-        from storage.in_memory_store import DATA_STORE
-        STORE = None
-        USE_SUPABASE = False
-else:
-    from storage.in_memory_store import DATA_STORE
-    STORE = None
-
-
-def run_scheduler():
+def load_scheduler_input(solver_profile=None):
     """
-    Run the CSP scheduler to generate an optimized timetable.
-    Uses configuration from timetable_config (lessons, faculty choices, etc.)
+    Load the scheduler input (data, config) from storage.
+    
+    Args:
+        solver_profile: optional profile name overriding timetable_config["solver_profile"]
+    
+    Returns:
+        (data, config) ready for generate_timetable_csp
     """
     all_data = get_all_data()
-    config = get_timetable_config()
+    config = all_data.get("timetable_config") or {}
+    if solver_profile:
+        config = dict(config)
+        config["solver_profile"] = solver_profile
     
     data = {
         "classes": all_data.get("classes", []),
         "subjects": all_data.get("subjects", []),
         "faculties": all_data.get("faculties", []),
         "rooms": all_data.get("rooms", []),
-        "preferences": all_data.get("faculty_preferences", [])
+        "preferences": all_data.get("faculty_preferences", []),
+        "batches": all_data.get("batches", {})
     }
+    return data, config
+
+
+def save_timetable(timetable, meta=None, summary=None):
+    """
+    Persist a generated timetable as the current one. It is stored as a
+    compact JSON payload (CompactTimetable.to_json_dict), with the
+    faculty/room/subject inverted indexes in its metadata, and recorded as
+    a new version in the timetable history.
+    
+    Args:
+        timetable: CompactTimetable or {class: {day: {slot: entry}}} dict
+        meta: optional metadata stored alongside, e.g. {"fingerprints": {class: hash}}
+        summary: optional version summary (see timetable_history.version_summary)
+    
+    Raises:
+        RuntimeError: the store could not save the timetable (its version is
+                      removed again, so the history only lists saved timetables)
+    """
+    compact = CompactTimetable.from_dict(timetable)
+    # The stored meta names its version, so the version is recorded first;
+    # old versions are only pruned once the timetable is saved
+    version_id = record_version(compact, meta, summary, prune=False)
+    meta = dict(meta or {}, index=compact.build_index(), history_version=version_id)
+    # 👇 STORE CENTRALLY
+    saved = get_store().save_timetable(compact.to_json_dict(), meta)
+    if TIMETABLE_CACHE:
+        TIMETABLE_CACHE.invalidate()
+    if not saved:
+        if version_id is not None:
+            discard_version(version_id)
+        raise RuntimeError("Could not save the timetable")
+    if version_id is not None:
+        prune_history()
+
+
+def _load_timetable_version():
+    """Version token of the stored timetable"""
+    return get_store().get_timetable_version()
+
+
+def _load_timetable():
+    """
+    Read the current timetable from storage.
+    
+    Returns:
+        (version, CompactTimetable or None, meta)
+    """
+    record = get_store().get_timetable_record()
+    if not record:
+        return None, None, None
+    # Timetables saved before the compact format are stored in the dict shape
+    return record["id"], CompactTimetable.load(record["timetable"]), record["meta"]
+
+
+def _current_timetable():
+    """
+    Current timetable entry, through the read-through cache when enabled.
+    
+    Returns:
+        dict or None: {"version", "compact", "meta", ...} (None without a timetable)
+    """
+    if TIMETABLE_CACHE:
+        return TIMETABLE_CACHE.get(_load_timetable_version, _load_timetable)
+    version, compact, meta = _load_timetable()
+    if not compact:
+        return None
+    return {"version": version, "compact": compact, "meta": meta, "timetable": None}
+
+
+def get_timetable_meta():
+    """Metadata saved with the current timetable (None if unknown)"""
+    entry = _current_timetable()
+    return entry["meta"] if entry else None
+
+
+def get_timetable_version():
+    """Version token of the current timetable (None without a timetable)"""
+    if not TIMETABLE_CACHE:
+        # Without the cache, answering a conditional request must not load the timetable
+        return _load_timetable_version()
+    entry = _current_timetable()
+    return entry["version"] if entry else None
+
+
+def build_timetable_meta(data, config):
+    """Metadata recorded with a timetable generated from (data, config)"""
+    return {"fingerprints": class_fingerprints(data, config)}
+
+
+def build_warm_start(data, config):
+    """
+    Incremental re-solve input from the currently stored timetable.
+    
+    Classes whose input fingerprint is unchanged since that timetable was
+    generated are kept fixed; everything else is re-solved with the previous
+    cells as hints.
+    
+    Returns:
+        dict or None: {"timetable", "fixed_classes"} (None without a stored timetable)
+    """
+    previous = get_timetable()
+    if not previous:
+        return None
+    
+    previous_fingerprints = (get_timetable_meta() or {}).get("fingerprints") or {}
+    current_fingerprints = class_fingerprints(data, config)
+    fixed_classes = [
+        class_name for class_name, fingerprint in current_fingerprints.items()
+        if previous_fingerprints.get(class_name) == fingerprint and class_name in previous
+    ]
+    changed = [name for name in current_fingerprints if name not in fixed_classes]
+    print(f"   Incremental re-solve: keeping {len(fixed_classes)} classes, re-solving {len(changed)}")
+    return {"timetable": previous, "fixed_classes": fixed_classes}
+
+
+def run_scheduler(solver_profile=None, report=None, incremental=False, portfolio=None, lns=None):
+    """
+    Run the CSP scheduler to generate an optimized timetable.
+    Uses configuration from timetable_config (lessons, faculty choices, etc.)
+    
+    Args:
+        solver_profile: optional profile name overriding timetable_config["solver_profile"]
+        report: optional dict, filled with the solver run summary
+        incremental: re-solve starting from the stored timetable, keeping
+                     classes whose input did not change
+        portfolio: race CP-SAT variants, the heuristic and local search and keep
+                   the best result (default: timetable_config["portfolio"]);
+                   ignored for incremental re-solves
+        lns: improve a heuristic timetable with CP-SAT one neighborhood at a
+             time, for departments too big for one solve (default:
+             timetable_config["lns"]); ignored for incremental re-solves
+    
+    Raises:
+        RuntimeError: the timetable could not be saved
+    """
+    data, config = load_scheduler_input(solver_profile)
+    if portfolio is not None:
+        config = dict(config, portfolio=bool(portfolio))
+    if lns is not None:
+        config = dict(config, lns=bool(lns))
+    portfolio, lns = bool(config.get("portfolio")), bool(config.get("lns"))
+    meta = build_timetable_meta(data, config)
     
     print("🔄 Running CSP Scheduler...")
     print(f"   Classes: {len(data['classes'])}")
@@ -42,21 +189,176 @@ def run_scheduler():
     print(f"   Faculties: {len(data['faculties'])}")
     print(f"   Rooms: {len(data['rooms'])}")
     
-    # Generate timetable using CSP solver with config
-    timetable = generate_timetable_csp(data, config)
-
-    # 👇 STORE CENTRALLY
-    if USE_SUPABASE and STORE:
-        STORE.save_timetable(timetable)
+    # An incremental re-solve depends on the stored timetable, which the cache key does not cover
+    cached = SOLVE_CACHE.get(data, config) if SOLVE_CACHE and not incremental else None
+    if cached is not None:
+        timetable, cached_report = cached
+        if report is not None:
+            report.update(cached_report)
+        save_timetable(timetable, meta, version_summary(cached_report))
+        print(f"✅ Timetable served from solve cache ({cached_report['cache']}) and saved")
+        return timetable
+    
+    run_report = {}
+    if portfolio and not incremental:
+        compact = solve_portfolio(data, config, run_report, compact=True)
+    elif lns and not incremental:
+        compact = solve_lns(data, config, run_report, compact=True)
     else:
-        DATA_STORE["timetable"] = timetable
+        # Generate timetable using CSP solver with config
+        warm_start = build_warm_start(data, config) if incremental else None
+        compact = generate_timetable_csp(data, config, run_report, warm_start=warm_start, compact=True)
+    if report is not None:
+        report.update(run_report)
+    timetable = compact.to_dict()
+    if SOLVE_CACHE and not incremental:
+        SOLVE_CACHE.put(data, config, timetable, run_report)
+    save_timetable(compact, meta, version_summary(run_report))
     
     print("✅ Timetable generated and saved")
     return timetable
 
 
+def preview_timetable(solver_profile=None, report=None):
+    """
+    Instant timetable from the heuristic scheduler, without saving it.
+    
+    Args:
+        solver_profile: optional profile name overriding timetable_config["solver_profile"]
+        report: optional dict, filled with the heuristic run summary
+    
+    Returns:
+        {class: {day: {slot: entry}}} dict
+    """
+    data, config = load_scheduler_input(solver_profile)
+    return generate_timetable_heuristic(data, config, report)
+
+
+def check_lesson_hours(config):
+    """
+    Lesson hours of a timetable config that do not fill whole sessions
+    (hours not a multiple of the subject's duration_slots), checked before
+    the config is saved.
+    
+    Args:
+        config: the timetable config about to be saved
+    
+    Returns:
+        list of "lesson_hours" error issues (see scheduler.feasibility)
+    """
+    data, _ = load_scheduler_input()
+    issues = analyze_feasibility(data, config, diagnose=False)["issues"]
+    return [issue for issue in issues if issue["check"] == "lesson_hours" and issue["severity"] == "error"]
+
+
+def check_timetable_config(diagnose=True):
+    """
+    Feasibility analysis of the current input, without generating a timetable.
+    
+    Args:
+        diagnose: if the cheap checks pass, also run the CP-SAT diagnosis
+                  (confirms feasibility or finds a minimal conflicting set)
+    
+    Returns:
+        dict from scheduler.feasibility.analyze_feasibility
+    """
+    data, config = load_scheduler_input()
+    return analyze_feasibility(data, config, diagnose=diagnose)
+
+
+def repair_current_timetable(time_limit=None, report=None):
+    """
+    Repair and improve the current timetable in place with local search
+    (clashes, lesson hours, preferences) against the current input, and
+    save the result as a new version.
+    
+    Args:
+        time_limit: seconds to search (default: timetable_config["local_search_time_limit"] or 5)
+        report: optional dict, filled with the local search summary
+    
+    Returns:
+        dict or None: the repaired timetable (None without a stored timetable)
+    
+    Raises:
+        RuntimeError: the repaired timetable could not be saved
+    """
+    current = get_compact_timetable()
+    if current is None:
+        return None
+    data, config = load_scheduler_input()
+    run_report = {}
+    compact = repair_timetable(current, data, config, run_report, time_limit=time_limit, compact=True)
+    if report is not None:
+        report.update(run_report)
+    save_timetable(compact, build_timetable_meta(data, config), version_summary(run_report, source="repair"))
+    print("✅ Timetable repaired and saved")
+    return compact.to_dict()
+
+
+def rollback_timetable(version_id):
+    """
+    Make a previous version the current timetable again (recorded as a new version).
+    
+    Returns:
+        dict or None: the restored timetable (None if the version is unknown)
+    
+    Raises:
+        RuntimeError: the restored timetable could not be saved
+    """
+    compact, version = load_version(version_id)
+    if compact is None:
+        return None
+    meta = {"fingerprints": version["fingerprints"]} if version["fingerprints"] else None
+    save_timetable(compact, meta, {"source": "rollback", "rollback_of": version_id})
+    print(f"✅ Timetable rolled back to version {version_id}")
+    return compact.to_dict()
+
+
+def get_compact_timetable():
+    """Current timetable as a CompactTimetable (None if none generated yet)"""
+    entry = _current_timetable()
+    return entry["compact"] if entry else None
+
+
 def get_timetable():
-    if USE_SUPABASE and STORE:
-        return STORE.get_timetable()
-    else:
-        return DATA_STORE.get("timetable")
\ No newline at end of file
+    """
+    Current timetable in the {class: {day: {slot: entry}}} dict shape (None if none).
+    The cached dict is shared between requests: treat it as read-only.
+    """
+    entry = _current_timetable()
+    if not entry:
+        return None
+    if TIMETABLE_CACHE:
+        return TIMETABLE_CACHE.timetable(entry)
+    return entry["compact"].to_dict()
+
+
+def get_timetable_index():
+    """Inverted indexes saved with the current timetable (see CompactTimetable.build_index)"""
+    return (get_timetable_meta() or {}).get("index")
+
+
+def get_faculty_view(faculty_name):
+    """
+    One faculty's timetable via the stored index.
+    
+    Returns:
+        dict or None: {day: {slot: {subject, class, room}}} (None without a timetable)
+    """
+    entry = _current_timetable()
+    if not entry:
+        return None
+    return get_faculty_timetable(entry["compact"], faculty_name, (entry["meta"] or {}).get("index"))
+
+
+def get_room_view(room_name):
+    """
+    One room's timetable via the stored index.
+    
+    Returns:
+        dict or None: {day: {slot: {subject, class, faculty}}} (None without a timetable)
+    """
+    entry = _current_timetable()
+    if not entry:
+        return None
+    return get_room_timetable(entry["compact"], room_name, (entry["meta"] or {}).get("index"))
\ No newline at end of file
@@ -0,0 +1,8 @@
+from storage.base import BaseStore
+from storage.registry import (
+    register_backend,
+    register_decorator,
+    create_store,
+    configure_store,
+    get_store
+)
@@ -0,0 +1,156 @@
+"""
+Storage backend interface for scheduler app
+Every backend (in-memory, Supabase, SQLite, caching wrapper) implements BaseStore
+"""
+
+
+def default_timetable_config():
+    """Timetable configuration used until one is saved"""
+    return {
+        "lectures_per_day": 6,
+        "lesson_hours": {},
+        "faculty_choices": {},
+        "subjects_by_class": {}
+    }
+
+
+class BaseStore:
+    """
+    Interface shared by all storage backends.
+
+    Saves return True/False, getters return empty values on errors (backends
+    log them). Timetables are passed as JSON-serializable payloads
+    (CompactTimetable.to_json_dict) together with their metadata.
+    """
+
+    # Backend name in the registry (see storage.registry)
+    name = None
+
+    # False for backends that cannot hold user accounts (auth needs a database)
+    supports_users = True
+
+    # ==================== SCHEDULER DATA ====================
+
+    def save_classes(self, classes):
+        raise NotImplementedError
+
+    def get_classes(self):
+        raise NotImplementedError
+
+    def save_subjects(self, subjects):
+        raise NotImplementedError
+
+    def get_subjects(self):
+        raise NotImplementedError
+
+    def save_faculties(self, faculties):
+        raise NotImplementedError
+
+    def get_faculties(self):
+        raise NotImplementedError
+
+    def save_rooms(self, rooms):
+        raise NotImplementedError
+
+    def get_rooms(self):
+        raise NotImplementedError
+
+    def save_timetable_config(self, config):
+        raise NotImplementedError
+
+    def get_timetable_config(self):
+        raise NotImplementedError
+
+    def get_all_data(self):
+        """
+        All scheduler input data: classes, subjects (union of
+        subjects_by_class), subjects_by_class, faculties, rooms, batches,
+        faculty_preferences and timetable_config. The timetable is not included.
+        """
+        raise NotImplementedError
+
+    # ==================== TIMETABLE ====================
+
+    def save_timetable(self, timetable, meta=None):
+        raise NotImplementedError
+
+    def get_timetable(self):
+        raise NotImplementedError
+
+    def get_timetable_record(self):
+        """Current timetable as {"id": version token, "timetable", "meta"} (None without one)"""
+        raise NotImplementedError
+
+    def get_timetable_version(self):
+        """Version token of the current timetable, changed by every save"""
+        raise NotImplementedError
+
+    def get_timetable_meta(self):
+        raise NotImplementedError
+
+    # ==================== TIMETABLE HISTORY ====================
+
+    def save_history_entry(self, entry):
+        """
+        Store a timetable version: {kind, base_id, data, meta, stored_cells}.
+        Returns the new entry id, or None on failure.
+        """
+        raise NotImplementedError
+
+    def get_history(self):
+        """Version entries without their data, newest first"""
+        raise NotImplementedError
+
+    def get_history_entry(self, entry_id):
+        """One version entry including its data, or None"""
+        raise NotImplementedError
+
+    def delete_history_entries(self, entry_ids):
+        raise NotImplementedError
+
+    # ==================== BATCH MANAGEMENT ====================
+
+    def save_batches(self, class_name, batch_count):
+        raise NotImplementedError
+
+    def get_batches(self, class_name=None):
+        raise NotImplementedError
+
+    def get_all_batches_with_classes(self):
+        """{class_name: [batch_name, ...]}"""
+        raise NotImplementedError
+
+    # ==================== USER MANAGEMENT ====================
+
+    def create_user(self, username, password_hash, role, email=None):
+        raise NotImplementedError
+
+    def get_user_by_username(self, username):
+        raise NotImplementedError
+
+    def get_user_by_id(self, user_id):
+        raise NotImplementedError
+
+    def update_user_password(self, user_id, new_password_hash):
+        raise NotImplementedError
+
+    def delete_user(self, user_id):
+        raise NotImplementedError
+
+    def get_all_users(self):
+        raise NotImplementedError
+
+    # ==================== HELPERS ====================
+
+    @staticmethod
+    def _union_subjects(subjects_by_class):
+        """Deduplicated list of all subjects from subjects_by_class."""
+        seen = set()
+        out = []
+        for lst in (subjects_by_class or {}).values():
+            for s in lst or []:
+                n = (s.get("name") or "").strip()
+                if n and n not in seen:
+                    seen.add(n)
+                    out.append({"name": n, "short": (s.get("short") or "").strip()})
+        return out
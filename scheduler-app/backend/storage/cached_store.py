@@ -0,0 +1,180 @@
+"""
+Caching storage decorator for scheduler app
+Wraps any backend and serves repeated scheduler-data reads from memory
+"""
+import copy
+import os
+import threading
+import time
+from dotenv import load_dotenv
+
+from storage.base import BaseStore
+
+load_dotenv()
+
+# Seconds a cached read stays valid; other processes' saves show up after at most this long
+STORAGE_CACHE_TTL = float(os.getenv("STORAGE_CACHE_TTL", "30"))
+
+# Reads served from the cache; each is invalidated by the saves listed for it
+CACHED_READS = {
+    "get_classes": ("save_classes",),
+    "get_subjects": ("save_subjects",),
+    "get_faculties": ("save_faculties",),
+    "get_rooms": ("save_rooms",),
+    "get_timetable_config": ("save_timetable_config",),
+    "get_batches": ("save_batches",),
+    "get_all_batches_with_classes": ("save_batches",),
+    "get_all_data": ("save_classes", "save_subjects", "save_faculties", "save_rooms",
+                     "save_timetable_config", "save_batches")
+}
+
+
+class CachedStore(BaseStore):
+    """
+    Read-through cache in front of another backend.
+
+    Scheduler data reads (CACHED_READS) are cached per arguments for
+    STORAGE_CACHE_TTL seconds and dropped by any save they depend on; callers
+    get copies, so mutating a result never changes the cache. Timetable, history
+    and user reads always go to the backend (the timetable has its own
+    version-checked cache, see services.timetable_cache).
+    """
+
+    name = "cached"
+
+    def __init__(self, inner, ttl=None):
+        self.inner = inner
+        self.ttl = STORAGE_CACHE_TTL if ttl is None else ttl
+        self.supports_users = inner.supports_users
+        self._entries = {}  # (method, args) -> (stored_at, value)
+        self._generation = 0  # bumped by every save and invalidate
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        return f"CachedStore({self.inner!r}, ttl={self.ttl})"
+
+    def _read(self, method, *args):
+        key = (method, args)
+        with self._lock:
+            cached = self._entries.get(key)
+            generation = self._generation
+        if cached is not None and time.monotonic() - cached[0] < self.ttl:
+            return copy.deepcopy(cached[1])
+
+        value = getattr(self.inner, method)(*args)
+        with self._lock:
+            # A save that finished during the read may have made value stale: don't keep it
+            if self._generation == generation:
+                self._entries[key] = (time.monotonic(), value)
+        return copy.deepcopy(value)
+
+    def _write(self, method, *args):
+        result = getattr(self.inner, method)(*args)
+        with self._lock:
+            self._generation += 1
+            for key in [key for key in self._entries if method in CACHED_READS[key[0]]]:
+                del self._entries[key]
+        return result
+
+    def invalidate(self):
+        """Drop every cached read"""
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+
+    # ==================== SCHEDULER DATA ====================
+
+    def save_classes(self, classes):
+        return self._write("save_classes", classes)
+
+    def get_classes(self):
+        return self._read("get_classes")
+
+    def save_subjects(self, subjects):
+        return self._write("save_subjects", subjects)
+
+    def get_subjects(self):
+        return self._read("get_subjects")
+
+    def save_faculties(self, faculties):
+        return self._write("save_faculties", faculties)
+
+    def get_faculties(self):
+        return self._read("get_faculties")
+
+    def save_rooms(self, rooms):
+        return self._write("save_rooms", rooms)
+
+    def get_rooms(self):
+        return self._read("get_rooms")
+
+    def save_timetable_config(self, config):
+        return self._write("save_timetable_config", config)
+
+    def get_timetable_config(self):
+        return self._read("get_timetable_config")
+
+    def get_all_data(self):
+        return self._read("get_all_data")
+
+    # ==================== TIMETABLE ====================
+
+    def save_timetable(self, timetable, meta=None):
+        return self.inner.save_timetable(timetable, meta)
+
+    def get_timetable(self):
+        return self.inner.get_timetable()
+
+    def get_timetable_record(self):
+        return self.inner.get_timetable_record()
+
+    def get_timetable_version(self):
+        return self.inner.get_timetable_version()
+
+    def get_timetable_meta(self):
+        return self.inner.get_timetable_meta()
+
+    # ==================== TIMETABLE HISTORY ====================
+
+    def save_history_entry(self, entry):
+        return self.inner.save_history_entry(entry)
+
+    def get_history(self):
+        return self.inner.get_history()
+
+    def get_history_entry(self, entry_id):
+        return self.inner.get_history_entry(entry_id)
+
+    def delete_history_entries(self, entry_ids):
+        return self.inner.delete_history_entries(entry_ids)
+
+    # ==================== BATCH MANAGEMENT ====================
+
+    def save_batches(self, class_name, batch_count):
+        return self._write("save_batches", class_name, batch_count)
+
+    def get_batches(self, class_name=None):
+        return self._read("get_batches", class_name)
+
+    def get_all_batches_with_classes(self):
+        return self._read("get_all_batches_with_classes")
+
+    # ==================== USER MANAGEMENT ====================
+
+    def create_user(self, username, password_hash, role, email=None):
+        return self.inner.create_user(username, password_hash, role, email)
+
+    def get_user_by_username(self, username):
+        return self.inner.get_user_by_username(username)
+
+    def get_user_by_id(self, user_id):
+        return self.inner.get_user_by_id(user_id)
+
+    def update_user_password(self, user_id, new_password_hash):
+        return self.inner.update_user_password(user_id, new_password_hash)
+
+    def delete_user(self, user_id):
+        return self.inner.delete_user(user_id)
+
+    def get_all_users(self):
+        return self.inner.get_all_users()
@@ -1,3 +1,12 @@
+"""
+In-memory storage implementation for scheduler app
+Volatile: data is lost on restart and user accounts are not supported
+"""
+import uuid
+from datetime import datetime, timezone
+
+from storage.base import BaseStore, default_timetable_config
+
 DATA_STORE = {
     "classes": [],
     "subjects": [],
@@ -5,11 +14,167 @@ DATA_STORE = {
     "rooms": [],
     "batches": {},  # {"FEA": ["F1", "F2", "F3"], "SEA": ["S1", "S2"]}
     "faculty_preferences": [],
-    "timetable_config": {
-        "lectures_per_day": 6,
-        "lesson_hours": {},
-        "faculty_choices": {},
-        "subjects_by_class": {}  # {"BE A": [{name, short}], "BE B": [...]}
-    },
-    "timetable": None
+    "timetable_config": default_timetable_config(),  # subjects_by_class: {"BE A": [{name, short}], "BE B": [...]}
+    "timetable": None,  # CompactTimetable JSON payload
+    "timetable_meta": None,  # {"fingerprints": {class: hash}, ...} of the input that produced it
+    "timetable_version": None,  # new token on every save
+    "timetable_history": [],  # version entries, oldest first
+    "timetable_history_seq": 0
 }
+
+# Timetable and history entries: not part of the scheduler data get_all_data returns
+TIMETABLE_KEYS = (
+    "timetable", "timetable_meta", "timetable_version", "timetable_history", "timetable_history_seq"
+)
+
+
+class InMemoryStore(BaseStore):
+    """Storage backend over the process-local DATA_STORE dict"""
+
+    name = "memory"
+    supports_users = False
+
+    def __init__(self, data=None):
+        self.data = DATA_STORE if data is None else data
+
+    # ==================== SCHEDULER DATA ====================
+
+    def save_classes(self, classes):
+        self.data["classes"] = classes
+        return True
+
+    def get_classes(self):
+        return self.data["classes"]
+
+    def save_subjects(self, subjects):
+        self.data["subjects"] = subjects
+        return True
+
+    def get_subjects(self):
+        return self.data["subjects"]
+
+    def save_faculties(self, faculties):
+        self.data["faculties"] = faculties
+        return True
+
+    def get_faculties(self):
+        return self.data["faculties"]
+
+    def save_rooms(self, rooms):
+        self.data["rooms"] = rooms
+        return True
+
+    def get_rooms(self):
+        return self.data["rooms"]
+
+    def save_timetable_config(self, config):
+        self.data["timetable_config"] = config
+        return True
+
+    def get_timetable_config(self):
+        cfg = self.data.get("timetable_config") or {}
+        if "subjects_by_class" not in cfg:
+            cfg = dict(cfg)
+            cfg["subjects_by_class"] = {}
+        return cfg
+
+    def get_all_data(self):
+        # subjects and subjects_by_class come from timetable_config
+        cfg = self.get_timetable_config()
+        sb = cfg.get("subjects_by_class") or {}
+        result = {
+            key: value for key, value in self.data.items()
+            if key not in TIMETABLE_KEYS
+        }
+        result["timetable_config"] = cfg
+        result["subjects"] = self._union_subjects(sb)
+        result["subjects_by_class"] = sb
+        return result
+
+    # ==================== TIMETABLE ====================
+
+    def save_timetable(self, timetable, meta=None):
+        self.data["timetable"] = timetable
+        self.data["timetable_meta"] = meta
+        self.data["timetable_version"] = uuid.uuid4().hex
+        return True
+
+    def get_timetable(self):
+        return self.data.get("timetable")
+
+    def get_timetable_record(self):
+        if self.data.get("timetable") is None:
+            return None
+        return {
+            "id": self.data.get("timetable_version"),
+            "timetable": self.data["timetable"],
+            "meta": self.data.get("timetable_meta")
+        }
+
+    def get_timetable_version(self):
+        if self.data.get("timetable") is None:
+            return None
+        return self.data.get("timetable_version")
+
+    def get_timetable_meta(self):
+        return self.data.get("timetable_meta")
+
+    # ==================== TIMETABLE HISTORY ====================
+
+    def save_history_entry(self, entry):
+        self.data["timetable_history_seq"] += 1
+        entry = dict(entry, id=self.data["timetable_history_seq"],
+                     created_at=datetime.now(timezone.utc).isoformat())
+        self.data["timetable_history"].append(entry)
+        return entry["id"]
+
+    def get_history(self):
+        return [
+            {k: v for k, v in entry.items() if k != "data"}
+            for entry in reversed(self.data["timetable_history"])
+        ]
+
+    def get_history_entry(self, entry_id):
+        return next((entry for entry in self.data["timetable_history"] if entry["id"] == entry_id), None)
+
+    def delete_history_entries(self, entry_ids):
+        entry_ids = set(entry_ids)
+        self.data["timetable_history"] = [
+            entry for entry in self.data["timetable_history"] if entry["id"] not in entry_ids
+        ]
+        return True
+
+    # ==================== BATCH MANAGEMENT ====================
+
+    def save_batches(self, class_name, batch_count):
+        # Batch names use the full class name as prefix
+        self.data["batches"][class_name] = [f"{class_name}{i+1}" for i in range(batch_count)]
+        return True
+
+    def get_batches(self, class_name=None):
+        if class_name:
+            return self.data["batches"].get(class_name, [])
+        return self.data["batches"]
+
+    def get_all_batches_with_classes(self):
+        return self.data["batches"]
+
+    # ==================== USER MANAGEMENT ====================
+
+    def create_user(self, username, password_hash, role, email=None):
+        return None
+
+    def get_user_by_username(self, username):
+        return None
+
+    def get_user_by_id(self, user_id):
+        return None
+
+    def update_user_password(self, user_id, new_password_hash):
+        return False
+
+    def delete_user(self, user_id):
+        return False
+
+    def get_all_users(self):
+        return []
@@ -0,0 +1,129 @@
+"""
+Storage backend registry for scheduler app
+
+The backend is chosen once per process from STORAGE_BACKEND, e.g.
+"memory", "sqlite", "supabase" or "cached:supabase" (decorators before the
+backend, separated by ":"). Without STORAGE_BACKEND the older USE_SUPABASE /
+USE_SQLITE flags are honoured.
+"""
+import os
+import threading
+from dotenv import load_dotenv
+
+load_dotenv()
+
+BACKENDS = {}
+DECORATORS = {}
+
+_STORE = None
+_STORE_LOCK = threading.Lock()
+
+
+def register_backend(name, factory):
+    """Register a backend factory: callable() -> BaseStore"""
+    BACKENDS[name] = factory
+
+
+def register_decorator(name, factory):
+    """Register a decorator factory: callable(inner store) -> BaseStore"""
+    DECORATORS[name] = factory
+
+
+def _memory_store():
+    from storage.in_memory_store import InMemoryStore
+    return InMemoryStore()
+
+
+def _supabase_store():
+    from storage.supabase_store import SupabaseStore, supabase
+    if supabase is None:
+        raise ValueError("Supabase client not initialized - check your .env file")
+    return SupabaseStore()
+
+
+def _sqlite_store():
+    from storage.sqlite_store import SQLiteStore
+    return SQLiteStore()
+
+
+def _cached_store(inner):
+    from storage.cached_store import CachedStore
+    return CachedStore(inner)
+
+
+register_backend("memory", _memory_store)
+register_backend("supabase", _supabase_store)
+register_backend("sqlite", _sqlite_store)
+register_decorator("cached", _cached_store)
+
+
+def default_backend_spec():
+    """Backend spec from the environment"""
+    spec = os.getenv("STORAGE_BACKEND")
+    if spec:
+        return spec.strip().lower()
+    if os.getenv("USE_SUPABASE", "false").lower() == "true":
+        return "supabase"
+    if os.getenv("USE_SQLITE", "false").lower() == "true":
+        return "sqlite"
+    return "memory"
+
+
+def create_store(spec):
+    """
+    Build a store from a spec such as "sqlite" or "cached:supabase".
+
+    Raises:
+        ValueError: unknown backend or decorator name
+    """
+    *decorators, backend = [part.strip() for part in spec.split(":")]
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown storage backend '{backend}', expected one of {sorted(BACKENDS)}")
+    for name in decorators:
+        if name not in DECORATORS:
+            raise ValueError(f"Unknown storage decorator '{name}', expected one of {sorted(DECORATORS)}")
+
+    store = BACKENDS[backend]()
+    for name in reversed(decorators):
+        store = DECORATORS[name](store)
+    return store
+
+
+def _build_store(spec):
+    """create_store, falling back to in-memory storage when the backend fails to initialize"""
+    try:
+        store = create_store(spec)
+        if store.supports_users:
+            print(f"✅ Using '{spec}' storage backend")
+        else:
+            print(f"📝 Using '{spec}' storage backend (set STORAGE_BACKEND=sqlite or supabase for persistence)")
+        return store
+    except Exception as e:
+        print(f"⚠️ Failed to initialize '{spec}' storage, falling back to in-memory storage: {e}")
+        print(f"   Make sure:")
+        print(f"   1. .env file exists in backend/ directory")
+        print(f"   2. SUPABASE_URL and SUPABASE_KEY (or SQLITE_PATH) are set correctly")
+        print(f"   3. Database tables are created (see SUPABASE_SETUP.md)")
+        return create_store("memory")
+
+
+def configure_store(spec=None):
+    """
+    Create the process-wide store from a spec (default: from the
+    environment). A backend that fails to initialize falls back to
+    in-memory storage so the app still starts.
+    """
+    global _STORE
+    with _STORE_LOCK:
+        _STORE = _build_store(spec or default_backend_spec())
+        return _STORE
+
+
+def get_store():
+    """The process-wide store, configured from the environment on first use"""
+    global _STORE
+    if _STORE is None:
+        with _STORE_LOCK:
+            if _STORE is None:
+                _STORE = _build_store(default_backend_spec())
+    return _STORE
@@ -0,0 +1,555 @@
+"""
+SQLite storage implementation for scheduler app
+Local, persistent alternative to Supabase with the same interface as SupabaseStore
+"""
+import json
+import os
+import sqlite3
+import threading
+import uuid
+from datetime import datetime, timezone
+from dotenv import load_dotenv
+
+from storage.base import BaseStore, default_timetable_config
+
+load_dotenv()
+
+SQLITE_PATH = os.getenv("SQLITE_PATH", "scheduler.db")
+
+# Milliseconds a connection waits for a writer's lock before failing
+SQLITE_BUSY_TIMEOUT = int(os.getenv("SQLITE_BUSY_TIMEOUT", "5000"))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS classes (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    created_at TEXT DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS subjects (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    short TEXT,
+    type TEXT DEFAULT 'lecture',
+    duration_slots INTEGER DEFAULT 1,
+    created_at TEXT DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS faculties (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    short TEXT,
+    position TEXT,
+    created_at TEXT DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS rooms (
+    id INTEGER PRIMARY KEY,
+    room TEXT NOT NULL,
+    type TEXT DEFAULT 'classroom',
+    created_at TEXT DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS timetable_config (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    config TEXT NOT NULL,
+    updated_at TEXT
+);
+
+CREATE TABLE IF NOT EXISTS timetables (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    timetable_data TEXT NOT NULL,
+    meta TEXT,
+    version TEXT NOT NULL,
+    updated_at TEXT
+);
+
+CREATE TABLE IF NOT EXISTS timetable_history (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind TEXT NOT NULL CHECK (kind IN ('base', 'delta')),
+    base_id INTEGER,
+    data TEXT NOT NULL,
+    meta TEXT,
+    stored_cells INTEGER,
+    created_at TEXT
+);
+
+CREATE TABLE IF NOT EXISTS batches (
+    id INTEGER PRIMARY KEY,
+    class_name TEXT NOT NULL,
+    batch_name TEXT NOT NULL,
+    batch_number INTEGER NOT NULL,
+    created_at TEXT DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS idx_batches_class ON batches (class_name, batch_number);
+
+CREATE TABLE IF NOT EXISTS users (
+    id INTEGER PRIMARY KEY,
+    username TEXT NOT NULL UNIQUE,
+    password_hash TEXT NOT NULL,
+    role TEXT NOT NULL CHECK (role IN ('hod', 'faculty', 'exam_control')),
+    email TEXT,
+    created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+    updated_at TEXT DEFAULT CURRENT_TIMESTAMP
+);
+"""
+
+
+def _now():
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _public_user(row):
+    """User dict without the password hash"""
+    return {
+        "id": row["id"],
+        "username": row["username"],
+        "role": row["role"],
+        "email": row["email"]
+    }
+
+
+class SQLiteStore(BaseStore):
+    """
+    SQLite database storage implementation.
+
+    The database runs in WAL mode, so readers never block on a writer and see
+    the last committed state. Each thread gets its own connection (sqlite3
+    caches the prepared statements per connection), and every save runs in
+    one transaction.
+    """
+
+    name = "sqlite"
+
+    def __init__(self, path=None):
+        self.path = path or SQLITE_PATH
+        self._local = threading.local()
+        with self._transaction() as conn:
+            conn.executescript(SCHEMA)
+
+    # ==================== CONNECTIONS ====================
+
+    def _connection(self):
+        """This thread's connection, opened on first use"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=SQLITE_BUSY_TIMEOUT / 1000, cached_statements=256)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT}")
+            self._local.conn = conn
+        return conn
+
+    def _transaction(self):
+        """Context manager committing on success and rolling back on error"""
+        return self._connection()
+
+    def _query(self, sql, params=()):
+        return self._connection().execute(sql, params).fetchall()
+
+    def close(self):
+        """Close this thread's connection"""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    # ==================== SCHEDULER DATA ====================
+
+    def _replace_rows(self, sql_delete, sql_insert, rows, delete_params=()):
+        with self._transaction() as conn:
+            conn.execute(sql_delete, delete_params)
+            conn.executemany(sql_insert, rows)
+
+    def save_classes(self, classes):
+        """Save classes to database"""
+        try:
+            rows = [(cls,) for cls in dict.fromkeys(classes or [])]
+            self._replace_rows("DELETE FROM classes", "INSERT INTO classes (name) VALUES (?)", rows)
+            return True
+        except Exception as e:
+            print(f"❌ Error saving classes: {e}")
+            return False
+
+    def get_classes(self):
+        """Get all classes from database"""
+        try:
+            return [row["name"] for row in self._query("SELECT name FROM classes ORDER BY id")]
+        except Exception as e:
+            print(f"Error getting classes: {e}")
+            return []
+
+    def save_subjects(self, subjects):
+        """Save subjects to database with type and duration_slots"""
+        try:
+            rows = [
+                (
+                    subj.get("name", ""),
+                    subj.get("short", ""),
+                    subj.get("type", "lecture"),
+                    subj.get("duration_slots", 1)
+                )
+                for subj in subjects or []
+            ]
+            self._replace_rows(
+                "DELETE FROM subjects",
+                "INSERT INTO subjects (name, short, type, duration_slots) VALUES (?, ?, ?, ?)",
+                rows
+            )
+            return True
+        except Exception as e:
+            print(f"❌ Error saving subjects: {e}")
+            return False
+
+    def get_subjects(self):
+        """Get all subjects from database"""
+        try:
+            return [
+                {
+                    "name": row["name"],
+                    "short": row["short"] or "",
+                    "type": row["type"] or "lecture",
+                    "duration_slots": row["duration_slots"] or 1
+                }
+                for row in self._query("SELECT name, short, type, duration_slots FROM subjects ORDER BY id")
+            ]
+        except Exception as e:
+            print(f"❌ Error getting subjects: {e}")
+            return []
+
+    def save_faculties(self, faculties):
+        """Save faculties to database"""
+        try:
+            rows = [
+                (fac.get("name", ""), fac.get("short", ""), fac.get("position", ""))
+                for fac in faculties or []
+            ]
+            self._replace_rows(
+                "DELETE FROM faculties",
+                "INSERT INTO faculties (name, short, position) VALUES (?, ?, ?)",
+                rows
+            )
+            return True
+        except Exception as e:
+            print(f"Error saving faculties: {e}")
+            return False
+
+    def get_faculties(self):
+        """Get all faculties from database"""
+        try:
+            return [
+                {
+                    "name": row["name"],
+                    "short": row["short"] or "",
+                    "position": row["position"] or ""
+                }
+                for row in self._query("SELECT name, short, position FROM faculties ORDER BY id")
+            ]
+        except Exception as e:
+            print(f"Error getting faculties: {e}")
+            return []
+
+    def save_rooms(self, rooms):
+        """Save rooms to database"""
+        try:
+            rows = [(room.get("room", ""), room.get("type", "classroom")) for room in rooms or []]
+            self._replace_rows("DELETE FROM rooms", "INSERT INTO rooms (room, type) VALUES (?, ?)", rows)
+            return True
+        except Exception as e:
+            print(f"Error saving rooms: {e}")
+            return False
+
+    def get_rooms(self):
+        """Get all rooms from database"""
+        try:
+            return [
+                {"room": row["room"], "type": row["type"] or "classroom"}
+                for row in self._query("SELECT room, type FROM rooms ORDER BY id")
+            ]
+        except Exception as e:
+            print(f"Error getting rooms: {e}")
+            return []
+
+    def save_timetable_config(self, config):
+        """Save timetable configuration"""
+        try:
+            with self._transaction() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO timetable_config (id, config, updated_at) VALUES (1, ?, ?)",
+                    (json.dumps(config), _now())
+                )
+            return True
+        except Exception as e:
+            print(f"Error saving timetable config: {e}")
+            return False
+
+    def get_timetable_config(self):
+        """Get timetable configuration"""
+        try:
+            rows = self._query("SELECT config FROM timetable_config WHERE id = 1")
+            if not rows:
+                return default_timetable_config()
+            cfg = json.loads(rows[0]["config"])
+            if "subjects_by_class" not in cfg:
+                cfg["subjects_by_class"] = {}
+            return cfg
+        except Exception as e:
+            print(f"Error getting timetable config: {e}")
+            return default_timetable_config()
+
+    # ==================== TIMETABLE ====================
+
+    def save_timetable(self, timetable, meta=None):
+        """Save generated timetable (and its metadata, e.g. input fingerprints)"""
+        try:
+            with self._transaction() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO timetables (id, timetable_data, meta, version, updated_at) "
+                    "VALUES (1, ?, ?, ?, ?)",
+                    (json.dumps(timetable), json.dumps(meta) if meta is not None else None,
+                     uuid.uuid4().hex, _now())
+                )
+            return True
+        except Exception as e:
+            print(f"Error saving timetable: {e}")
+            return False
+
+    def get_timetable(self):
+        """Get generated timetable"""
+        try:
+            rows = self._query("SELECT timetable_data FROM timetables WHERE id = 1")
+            return json.loads(rows[0]["timetable_data"]) if rows else None
+        except Exception as e:
+            print(f"Error getting timetable: {e}")
+            return None
+
+    def get_timetable_record(self):
+        """
+        Get the current timetable row in one query.
+
+        Returns:
+            dict or None: {"id", "timetable", "meta"}
+        """
+        try:
+            rows = self._query("SELECT version, timetable_data, meta FROM timetables WHERE id = 1")
+            if not rows:
+                return None
+            row = rows[0]
+            return {
+                "id": row["version"],
+                "timetable": json.loads(row["timetable_data"]),
+                "meta": json.loads(row["meta"]) if row["meta"] else None
+            }
+        except Exception as e:
+            print(f"Error getting timetable: {e}")
+            return None
+
+    def get_timetable_version(self):
+        """Version token of the current timetable (regenerated on every save)"""
+        try:
+            rows = self._query("SELECT version FROM timetables WHERE id = 1")
+            return rows[0]["version"] if rows else None
+        except Exception as e:
+            print(f"Error getting timetable version: {e}")
+            return None
+
+    def get_timetable_meta(self):
+        """Get metadata saved with the current timetable"""
+        try:
+            rows = self._query("SELECT meta FROM timetables WHERE id = 1")
+            return json.loads(rows[0]["meta"]) if rows and rows[0]["meta"] else None
+        except Exception as e:
+            print(f"Error getting timetable metadata: {e}")
+            return None
+
+    # ==================== TIMETABLE HISTORY ====================
+
+    @staticmethod
+    def _history_row(row, with_data=False):
+        entry = {
+            "id": row["id"],
+            "kind": row["kind"],
+            "base_id": row["base_id"],
+            "meta": json.loads(row["meta"]) if row["meta"] else None,
+            "stored_cells": row["stored_cells"],
+            "created_at": row["created_at"]
+        }
+        if with_data:
+            entry["data"] = json.loads(row["data"])
+        return entry
+
+    def save_history_entry(self, entry):
+        """Store a timetable version, returns its id"""
+        try:
+            with self._transaction() as conn:
+                cursor = conn.execute(
+                    "INSERT INTO timetable_history (kind, base_id, data, meta, stored_cells, created_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (entry["kind"], entry.get("base_id"), json.dumps(entry["data"]),
+                     json.dumps(entry.get("meta")), entry.get("stored_cells"), _now())
+                )
+            return cursor.lastrowid
+        except Exception as e:
+            print(f"Error saving timetable version: {e}")
+            return None
+
+    def get_history(self):
+        """Version entries without their data, newest first"""
+        try:
+            rows = self._query(
+                "SELECT id, kind, base_id, meta, stored_cells, created_at "
+                "FROM timetable_history ORDER BY id DESC"
+            )
+            return [self._history_row(row) for row in rows]
+        except Exception as e:
+            print(f"Error getting timetable history: {e}")
+            return []
+
+    def get_history_entry(self, entry_id):
+        """One version entry including its data"""
+        try:
+            rows = self._query("SELECT * FROM timetable_history WHERE id = ?", (entry_id,))
+            return self._history_row(rows[0], with_data=True) if rows else None
+        except Exception as e:
+            print(f"Error getting timetable version: {e}")
+            return None
+
+    def delete_history_entries(self, entry_ids):
+        """Delete version entries by id"""
+        try:
+            with self._transaction() as conn:
+                conn.executemany("DELETE FROM timetable_history WHERE id = ?", [(i,) for i in entry_ids])
+            return True
+        except Exception as e:
+            print(f"Error deleting timetable versions: {e}")
+            return False
+
+    # ==================== BATCH MANAGEMENT ====================
+
+    def save_batches(self, class_name, batch_count):
+        """Save batches for a class with sequential naming based on class name"""
+        try:
+            # SEA → SEA1, SEA2, SEA3
+            rows = [(class_name, f"{class_name}{i+1}", i + 1) for i in range(max(0, batch_count))]
+            self._replace_rows(
+                "DELETE FROM batches WHERE class_name = ?",
+                "INSERT INTO batches (class_name, batch_name, batch_number) VALUES (?, ?, ?)",
+                rows,
+                (class_name,)
+            )
+            return True
+        except Exception as e:
+            print(f"❌ Error saving batches: {e}")
+            return False
+
+    def get_batches(self, class_name=None):
+        """Get batches for a specific class or all batches"""
+        try:
+            if class_name:
+                rows = self._query(
+                    "SELECT * FROM batches WHERE class_name = ? ORDER BY batch_number", (class_name,)
+                )
+            else:
+                rows = self._query("SELECT * FROM batches ORDER BY batch_number")
+            return [dict(row) for row in rows]
+        except Exception as e:
+            print(f"Error getting batches: {e}")
+            return []
+
+    def get_all_batches_with_classes(self):
+        """Get all batches grouped by class"""
+        try:
+            batches_by_class = {}
+            for row in self._query("SELECT class_name, batch_name FROM batches ORDER BY class_name, batch_number"):
+                batches_by_class.setdefault(row["class_name"], []).append(row["batch_name"])
+            return batches_by_class
+        except Exception as e:
+            print(f"Error getting batches by class: {e}")
+            return {}
+
+    def get_all_data(self):
+        """
+        Get all scheduler input data (config, classes, faculties, rooms,
+        batches); the timetable itself is not loaded. subjects = union of
+        subjects_by_class; subjects_by_class is per-class.
+        """
+        config = self.get_timetable_config()
+        subjects_by_class = config.get("subjects_by_class") or {}
+        return {
+            "classes": self.get_classes(),
+            "subjects": self._union_subjects(subjects_by_class),
+            "subjects_by_class": subjects_by_class,
+            "faculties": self.get_faculties(),
+            "rooms": self.get_rooms(),
+            "batches": self.get_all_batches_with_classes(),
+            "faculty_preferences": [],
+            "timetable_config": config
+        }
+
+    # ==================== USER MANAGEMENT ====================
+
+    def create_user(self, username: str, password_hash: str, role: str, email: str = None):
+        """Create a new user in the database"""
+        try:
+            with self._transaction() as conn:
+                cursor = conn.execute(
+                    "INSERT INTO users (username, password_hash, role, email) VALUES (?, ?, ?, ?)",
+                    (username, password_hash, role, email)
+                )
+            return {"id": cursor.lastrowid, "username": username, "role": role, "email": email}
+        except Exception as e:
+            print(f"❌ Error creating user: {e}")
+            return None
+
+    def get_user_by_username(self, username: str):
+        """Get user by username"""
+        try:
+            rows = self._query("SELECT * FROM users WHERE username = ?", (username,))
+            return dict(rows[0]) if rows else None
+        except Exception as e:
+            print(f"Error getting user: {e}")
+            return None
+
+    def get_user_by_id(self, user_id: int):
+        """Get user by ID"""
+        try:
+            rows = self._query("SELECT id, username, role, email FROM users WHERE id = ?", (user_id,))
+            return _public_user(rows[0]) if rows else None
+        except Exception as e:
+            print(f"Error getting user: {e}")
+            return None
+
+    def update_user_password(self, user_id: int, new_password_hash: str):
+        """Update user password"""
+        try:
+            with self._transaction() as conn:
+                conn.execute(
+                    "UPDATE users SET password_hash = ?, updated_at = ? WHERE id = ?",
+                    (new_password_hash, _now(), user_id)
+                )
+            return True
+        except Exception as e:
+            print(f"Error updating password: {e}")
+            return False
+
+    def delete_user(self, user_id: int):
+        """Delete a user"""
+        try:
+            with self._transaction() as conn:
+                conn.execute("DELETE FROM users WHERE id = ?", (user_id,))
+            return True
+        except Exception as e:
+            print(f"Error deleting user: {e}")
+            return False
+
+    def get_all_users(self):
+        """Get all users (for admin purposes)"""
+        try:
+            return [
+                dict(row)
+                for row in self._query("SELECT id, username, role, email, created_at FROM users ORDER BY id")
+            ]
+        except Exception as e:
+            print(f"Error getting users: {e}")
+            return []
@@ -4,9 +4,13 @@ Replaces in-memory storage with persistent database
 """
 from supabase import create_client, Client
 import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
 from dotenv import load_dotenv
 import json
 
+from storage.base import BaseStore, default_timetable_config
+
 load_dotenv()
 
 # Initialize Supabase client
@@ -25,10 +29,30 @@ if SUPABASE_URL and SUPABASE_KEY:
 else:
     print("⚠️ SUPABASE_URL or SUPABASE_KEY not found in environment variables")
 
+# Threads for loading several tables concurrently (see SupabaseStore.get_all_data)
+_LOADER = ThreadPoolExecutor(max_workers=6, thread_name_prefix="supabase-load")
+
+# Rows per upsert/insert/delete request when writing change sets
+SYNC_BATCH_SIZE = 500
+
+# Apply change sets through the apply_changeset Postgres function (one transaction, see SUPABASE_SETUP.md)
+USE_SYNC_RPC = os.getenv("SUPABASE_SYNC_RPC", "false").lower() == "true"
+
+
+def _chunks(items, size=SYNC_BATCH_SIZE):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _now():
+    return datetime.now(timezone.utc).isoformat()
 
-class SupabaseStore:
+
+class SupabaseStore(BaseStore):
     """Supabase database storage implementation"""
     
+    name = "supabase"
+    
     # Table names
     TABLES = {
         "classes": "classes",
@@ -38,23 +62,104 @@ class SupabaseStore:
         "faculty_preferences": "faculty_preferences",
         "timetable_config": "timetable_config",
         "timetable": "timetables",
+        "timetable_history": "timetable_history",
         "users": "users",
         "batches": "batches"
     }
     
+    # ==================== CHANGE SETS ====================
+    
+    @staticmethod
+    def _apply_changeset(table, updates, inserts, delete_ids):
+        """
+        Write a change set: updates (rows with their id), inserts, then deletes,
+        so readers never see a half-empty table. With SUPABASE_SYNC_RPC=true the
+        whole change set is applied by the apply_changeset function in one transaction.
+        """
+        if not (updates or inserts or delete_ids):
+            return
+        if USE_SYNC_RPC:
+            supabase.rpc("apply_changeset", {
+                "target": table,
+                "updates": updates,
+                "inserts": inserts,
+                "delete_ids": delete_ids
+            }).execute()
+            return
+        for chunk in _chunks(updates):
+            supabase.table(table).upsert(chunk).execute()
+        for chunk in _chunks(inserts):
+            supabase.table(table).insert(chunk).execute()
+        for chunk in _chunks(delete_ids):
+            supabase.table(table).delete().in_("id", chunk).execute()
+    
+    @staticmethod
+    def _sync_rows(table_key, rows, key_fields, scope=None):
+        """
+        Make a table (or the rows matching scope) hold exactly `rows`, writing
+        only the difference: rows are matched to existing ones by natural key,
+        changed rows are updated in place, new ones inserted, missing ones
+        (and duplicate keys) deleted.
+        
+        Args:
+            rows: list of row dicts (without id)
+            key_fields: natural key columns, e.g. ("name",)
+            scope: optional {column: value} restricting the rows considered
+        
+        Returns:
+            dict: {"inserted", "updated", "deleted"}
+        """
+        table = SupabaseStore.TABLES[table_key]
+        fields = list(dict.fromkeys(list(key_fields) + [f for row in rows for f in row]))
+        query = supabase.table(table).select(", ".join(["id"] + fields))
+        for column, value in (scope or {}).items():
+            query = query.eq(column, value)
+        current = query.execute().data or []
+        
+        existing = {}
+        delete_ids = []
+        for row in current:
+            key = tuple(row.get(f) for f in key_fields)
+            if key in existing:
+                delete_ids.append(row["id"])
+            else:
+                existing[key] = row
+        
+        updates, inserts, seen = [], [], set()
+        for row in rows:
+            key = tuple(row.get(f) for f in key_fields)
+            if key in seen:
+                continue
+            seen.add(key)
+            old = existing.get(key)
+            if old is None:
+                inserts.append(row)
+            elif any(old.get(f) != value for f, value in row.items()):
+                updates.append(dict(row, id=old["id"]))
+        delete_ids += [row["id"] for key, row in existing.items() if key not in seen]
+        
+        SupabaseStore._apply_changeset(table, updates, inserts, delete_ids)
+        return {"inserted": len(inserts), "updated": len(updates), "deleted": len(delete_ids)}
+    
+    @staticmethod
+    def _save_single_row(table_key, row):
+        """Update the table's only row in place (insert it if missing, drop extra rows)"""
+        table = SupabaseStore.TABLES[table_key]
+        ids = [r["id"] for r in supabase.table(table).select("id").order("id").execute().data or []]
+        if ids:
+            SupabaseStore._apply_changeset(table, [dict(row, id=ids[0])], [], ids[1:])
+        else:
+            SupabaseStore._apply_changeset(table, [], [row], [])
+    
+    # ==================== SCHEDULER DATA ====================
+    
     @staticmethod
     def save_classes(classes):
         """Save classes to database"""
         if not supabase:
             return False
         try:
-            # Delete all existing classes
-            supabase.table(SupabaseStore.TABLES["classes"]).delete().neq("id", 0).execute()
-            
-            # Insert new classes
-            if classes:
-                data = [{"name": cls} for cls in classes]
-                supabase.table(SupabaseStore.TABLES["classes"]).insert(data).execute()
+            SupabaseStore._sync_rows("classes", [{"name": cls} for cls in classes or []], ("name",))
             return True
         except Exception as e:
             print(f"❌ Error saving classes: {e}")
@@ -65,7 +170,7 @@ class SupabaseStore:
     def get_classes():
         """Get all classes from database"""
         try:
-            response = supabase.table(SupabaseStore.TABLES["classes"]).select("*").execute()
+            response = supabase.table(SupabaseStore.TABLES["classes"]).select("name").execute()
             return [row["name"] for row in response.data]
         except Exception as e:
             print(f"Error getting classes: {e}")
@@ -77,21 +182,16 @@ class SupabaseStore:
         if not supabase:
             return False
         try:
-            # Delete all existing subjects
-            supabase.table(SupabaseStore.TABLES["subjects"]).delete().neq("id", 0).execute()
-            
-            # Insert new subjects with type and duration_slots
-            if subjects:
-                data = [
-                    {
-                        "name": subj.get("name", ""),
-                        "short": subj.get("short", ""),
-                        "type": subj.get("type", "lecture"),
-                        "duration_slots": subj.get("duration_slots", 1)
-                    }
-                    for subj in subjects
-                ]
-                supabase.table(SupabaseStore.TABLES["subjects"]).insert(data).execute()
+            data = [
+                {
+                    "name": subj.get("name", ""),
+                    "short": subj.get("short", ""),
+                    "type": subj.get("type", "lecture"),
+                    "duration_slots": subj.get("duration_slots", 1)
+                }
+                for subj in subjects or []
+            ]
+            SupabaseStore._sync_rows("subjects", data, ("name",))
             return True
         except Exception as e:
             print(f"❌ Error saving subjects: {e}")
@@ -103,7 +203,7 @@ class SupabaseStore:
         if not supabase:
             return []
         try:
-            response = supabase.table(SupabaseStore.TABLES["subjects"]).select("*").execute()
+            response = supabase.table(SupabaseStore.TABLES["subjects"]).select("name, short, type, duration_slots").execute()
             return [
                 {
                     "name": row["name"],
@@ -121,20 +221,15 @@ class SupabaseStore:
     def save_faculties(faculties):
         """Save faculties to database"""
         try:
-            # Delete all existing faculties
-            supabase.table(SupabaseStore.TABLES["faculties"]).delete().neq("id", 0).execute()
-            
-            # Insert new faculties
-            if faculties:
-                data = [
-                    {
-                        "name": fac.get("name", ""),
-                        "short": fac.get("short", ""),
-                        "position": fac.get("position", "")
-                    }
-                    for fac in faculties
-                ]
-                supabase.table(SupabaseStore.TABLES["faculties"]).insert(data).execute()
+            data = [
+                {
+                    "name": fac.get("name", ""),
+                    "short": fac.get("short", ""),
+                    "position": fac.get("position", "")
+                }
+                for fac in faculties or []
+            ]
+            SupabaseStore._sync_rows("faculties", data, ("name",))
             return True
         except Exception as e:
             print(f"Error saving faculties: {e}")
@@ -144,7 +239,7 @@ class SupabaseStore:
     def get_faculties():
         """Get all faculties from database"""
         try:
-            response = supabase.table(SupabaseStore.TABLES["faculties"]).select("*").execute()
+            response = supabase.table(SupabaseStore.TABLES["faculties"]).select("name, short, position").execute()
             return [
                 {
                     "name": row["name"],
@@ -161,19 +256,14 @@ class SupabaseStore:
     def save_rooms(rooms):
         """Save rooms to database"""
         try:
-            # Delete all existing rooms
-            supabase.table(SupabaseStore.TABLES["rooms"]).delete().neq("id", 0).execute()
-            
-            # Insert new rooms
-            if rooms:
-                data = [
-                    {
-                        "room": room.get("room", ""),
-                        "type": room.get("type", "classroom")
-                    }
-                    for room in rooms
-                ]
-                supabase.table(SupabaseStore.TABLES["rooms"]).insert(data).execute()
+            data = [
+                {
+                    "room": room.get("room", ""),
+                    "type": room.get("type", "classroom")
+                }
+                for room in rooms or []
+            ]
+            SupabaseStore._sync_rows("rooms", data, ("room",))
             return True
         except Exception as e:
             print(f"Error saving rooms: {e}")
@@ -183,7 +273,7 @@ class SupabaseStore:
     def get_rooms():
         """Get all rooms from database"""
         try:
-            response = supabase.table(SupabaseStore.TABLES["rooms"]).select("*").execute()
+            response = supabase.table(SupabaseStore.TABLES["rooms"]).select("room, type").execute()
             return [
                 {
                     "room": row["room"],
@@ -199,13 +289,10 @@ class SupabaseStore:
     def save_timetable_config(config):
         """Save timetable configuration"""
         try:
-            # Delete existing config
-            supabase.table(SupabaseStore.TABLES["timetable_config"]).delete().neq("id", 0).execute()
-            
-            # Insert new config
-            supabase.table(SupabaseStore.TABLES["timetable_config"]).insert({
-                "config": json.dumps(config)
-            }).execute()
+            SupabaseStore._save_single_row("timetable_config", {
+                "config": json.dumps(config),
+                "updated_at": _now()
+            })
             return True
         except Exception as e:
             print(f"Error saving timetable config: {e}")
@@ -215,38 +302,34 @@ class SupabaseStore:
     def get_timetable_config():
         """Get timetable configuration"""
         try:
-            response = supabase.table(SupabaseStore.TABLES["timetable_config"]).select("*").limit(1).execute()
+            response = supabase.table(SupabaseStore.TABLES["timetable_config"]).select("config").limit(1).execute()
             if response.data:
                 cfg = json.loads(response.data[0]["config"])
                 if "subjects_by_class" not in cfg:
                     cfg["subjects_by_class"] = {}
                 return cfg
-            return {
-                "lectures_per_day": 6,
-                "lesson_hours": {},
-                "faculty_choices": {},
-                "subjects_by_class": {}
-            }
+            return default_timetable_config()
         except Exception as e:
             print(f"Error getting timetable config: {e}")
-            return {
-                "lectures_per_day": 6,
-                "lesson_hours": {},
-                "faculty_choices": {},
-                "subjects_by_class": {}
-            }
+            return default_timetable_config()
     
     @staticmethod
-    def save_timetable(timetable):
-        """Save generated timetable"""
+    def save_timetable(timetable, meta=None):
+        """Save generated timetable (and its metadata, e.g. input fingerprints)"""
         try:
-            # Delete existing timetables
-            supabase.table(SupabaseStore.TABLES["timetable"]).delete().neq("id", 0).execute()
-            
-            # Insert new timetable
-            supabase.table(SupabaseStore.TABLES["timetable"]).insert({
-                "timetable_data": json.dumps(timetable)
-            }).execute()
+            # Replace the current timetable row in place; updated_at versions it
+            row = {"timetable_data": json.dumps(timetable), "updated_at": _now()}
+            if meta is not None:
+                row["meta"] = json.dumps(meta)
+            try:
+                SupabaseStore._save_single_row("timetable", row)
+            except Exception as e:
+                if "meta" not in row:
+                    raise
+                print(f"⚠️ Saving timetable without metadata: {e}")
+                print(f"   Hint: add the 'meta' column to the '{SupabaseStore.TABLES['timetable']}' table (see SUPABASE_SETUP.md)")
+                row.pop("meta")
+                SupabaseStore._save_single_row("timetable", row)
             return True
         except Exception as e:
             print(f"Error saving timetable: {e}")
@@ -256,7 +339,7 @@ class SupabaseStore:
     def get_timetable():
         """Get generated timetable"""
         try:
-            response = supabase.table(SupabaseStore.TABLES["timetable"]).select("*").limit(1).execute()
+            response = supabase.table(SupabaseStore.TABLES["timetable"]).select("timetable_data").limit(1).execute()
             if response.data:
                 return json.loads(response.data[0]["timetable_data"])
             return None
@@ -265,18 +348,124 @@ class SupabaseStore:
             return None
     
     @staticmethod
-    def _union_subjects(subjects_by_class):
-        """Deduplicated list of all subjects from subjects_by_class."""
-        seen = set()
-        out = []
-        for lst in (subjects_by_class or {}).values():
-            for s in lst or []:
-                n = (s.get("name") or "").strip()
-                if n and n not in seen:
-                    seen.add(n)
-                    out.append({"name": n, "short": (s.get("short") or "").strip()})
-        return out
-
+    def get_timetable_record():
+        """
+        Get the current timetable row in one round trip.
+        
+        Returns:
+            dict or None: {"id", "timetable", "meta"}
+        """
+        try:
+            try:
+                response = supabase.table(SupabaseStore.TABLES["timetable"]).select("id, updated_at, timetable_data, meta").order("id").limit(1).execute()
+            except Exception:
+                # Table created before the meta column existed
+                response = supabase.table(SupabaseStore.TABLES["timetable"]).select("id, updated_at, timetable_data").order("id").limit(1).execute()
+            if not response.data:
+                return None
+            row = response.data[0]
+            return {
+                "id": SupabaseStore._version_token(row),
+                "timetable": json.loads(row["timetable_data"]),
+                "meta": json.loads(row["meta"]) if row.get("meta") else None
+            }
+        except Exception as e:
+            print(f"Error getting timetable: {e}")
+            return None
+    
+    @staticmethod
+    def _version_token(row):
+        return f"{row['id']}:{row.get('updated_at')}"
+    
+    @staticmethod
+    def get_timetable_version():
+        """Version token of the current timetable row (its id and updated_at, set on every save)"""
+        try:
+            response = supabase.table(SupabaseStore.TABLES["timetable"]).select("id, updated_at").order("id").limit(1).execute()
+            return SupabaseStore._version_token(response.data[0]) if response.data else None
+        except Exception as e:
+            print(f"Error getting timetable version: {e}")
+            return None
+    
+    @staticmethod
+    def get_timetable_meta():
+        """Get metadata saved with the current timetable"""
+        try:
+            response = supabase.table(SupabaseStore.TABLES["timetable"]).select("meta").limit(1).execute()
+            if response.data and response.data[0].get("meta"):
+                return json.loads(response.data[0]["meta"])
+            return None
+        except Exception as e:
+            print(f"Error getting timetable metadata: {e}")
+            return None
+    
+    
+    # ==================== TIMETABLE HISTORY ====================
+    
+    @staticmethod
+    def _history_row(row):
+        entry = {
+            "id": row["id"],
+            "kind": row["kind"],
+            "base_id": row.get("base_id"),
+            "meta": json.loads(row["meta"]) if row.get("meta") else None,
+            "stored_cells": row.get("stored_cells"),
+            "created_at": row.get("created_at")
+        }
+        if "data" in row:
+            entry["data"] = json.loads(row["data"])
+        return entry
+    
+    @staticmethod
+    def save_history_entry(entry):
+        """Store a timetable version, returns its id"""
+        try:
+            response = supabase.table(SupabaseStore.TABLES["timetable_history"]).insert({
+                "kind": entry["kind"],
+                "base_id": entry.get("base_id"),
+                "data": json.dumps(entry["data"]),
+                "meta": json.dumps(entry.get("meta")),
+                "stored_cells": entry.get("stored_cells"),
+                "created_at": _now()
+            }).execute()
+            return response.data[0]["id"] if response.data else None
+        except Exception as e:
+            print(f"Error saving timetable version: {e}")
+            return None
+    
+    @staticmethod
+    def get_history():
+        """Version entries without their data, newest first"""
+        try:
+            response = supabase.table(SupabaseStore.TABLES["timetable_history"]).select(
+                "id, kind, base_id, meta, stored_cells, created_at"
+            ).order("id", desc=True).execute()
+            return [SupabaseStore._history_row(row) for row in response.data or []]
+        except Exception as e:
+            print(f"Error getting timetable history: {e}")
+            return []
+    
+    @staticmethod
+    def get_history_entry(entry_id):
+        """One version entry including its data"""
+        try:
+            response = supabase.table(SupabaseStore.TABLES["timetable_history"]).select("*").eq("id", entry_id).execute()
+            return SupabaseStore._history_row(response.data[0]) if response.data else None
+        except Exception as e:
+            print(f"Error getting timetable version: {e}")
+            return None
+    
+    @staticmethod
+    def delete_history_entries(entry_ids):
+        """Delete version entries by id"""
+        try:
+            for chunk in _chunks(list(entry_ids)):
+                supabase.table(SupabaseStore.TABLES["timetable_history"]).delete().in_("id", chunk).execute()
+            return True
+        except Exception as e:
+            print(f"Error deleting timetable versions: {e}")
+            return False
+    
     
     # ==================== BATCH MANAGEMENT ====================
     
@@ -286,24 +475,20 @@ class SupabaseStore:
         if not supabase:
             return False
         try:
-            # Delete existing batches for this class
-            supabase.table(SupabaseStore.TABLES["batches"]).delete().eq("class_name", class_name).execute()
-            
             # Use full class name as prefix
             # SEA → SEA1, SEA2, SEA3
             # FEA → FEA1, FEA2, FEA3
             
-            # Create new batches: SEA1, SEA2... or FEA1, FEA2... etc.
-            if batch_count > 0:
-                batches = [
-                    {
-                        "class_name": class_name,
-                        "batch_name": f"{class_name}{i+1}",
-                        "batch_number": i+1
-                    }
-                    for i in range(batch_count)
-                ]
-                supabase.table(SupabaseStore.TABLES["batches"]).insert(batches).execute()
+            # Batches: SEA1, SEA2... or FEA1, FEA2... etc.; only this class's rows change
+            batches = [
+                {
+                    "class_name": class_name,
+                    "batch_name": f"{class_name}{i+1}",
+                    "batch_number": i+1
+                }
+                for i in range(max(0, batch_count))
+            ]
+            SupabaseStore._sync_rows("batches", batches, ("batch_name",), scope={"class_name": class_name})
             return True
         except Exception as e:
             print(f"❌ Error saving batches: {e}")
@@ -330,7 +515,7 @@ class SupabaseStore:
         if not supabase:
             return {}
         try:
-            response = supabase.table(SupabaseStore.TABLES["batches"]).select("*").order("class_name, batch_number").execute()
+            response = supabase.table(SupabaseStore.TABLES["batches"]).select("class_name, batch_name").order("class_name, batch_number").execute()
             batches_by_class = {}
             for batch in response.data:
                 class_name = batch["class_name"]
@@ -344,19 +529,32 @@ class SupabaseStore:
     
     @staticmethod
     def get_all_data():
-        """Get all data. subjects = union of subjects_by_class; subjects_by_class is per-class."""
-        config = SupabaseStore.get_timetable_config()
+        """
+        Get all scheduler input data in one concurrent batch of queries
+        (config, classes, faculties, rooms, batches); the timetable itself is
+        not loaded. subjects = union of subjects_by_class; subjects_by_class is per-class.
+        """
+        futures = {
+            "timetable_config": _LOADER.submit(SupabaseStore.get_timetable_config),
+            "classes": _LOADER.submit(SupabaseStore.get_classes),
+            "faculties": _LOADER.submit(SupabaseStore.get_faculties),
+            "rooms": _LOADER.submit(SupabaseStore.get_rooms),
+            "batches": _LOADER.submit(SupabaseStore.get_all_batches_with_classes)
+        }
+        results = {key: future.result() for key, future in futures.items()}
+        
+        config = results["timetable_config"]
         subjects_by_class = config.get("subjects_by_class") or {}
         subjects = SupabaseStore._union_subjects(subjects_by_class)
         return {
-            "classes": SupabaseStore.get_classes(),
+            "classes": results["classes"],
             "subjects": subjects,
             "subjects_by_class": subjects_by_class,
-            "faculties": SupabaseStore.get_faculties(),
-            "rooms": SupabaseStore.get_rooms(),
+            "faculties": results["faculties"],
+            "rooms": results["rooms"],
+            "batches": results["batches"],
             "faculty_preferences": [],
-            "timetable_config": config,
-            "timetable": SupabaseStore.get_timetable()
+            "timetable_config": config
         }
     
     # ==================== USER MANAGEMENT ====================
@@ -439,6 +637,18 @@ class SupabaseStore:
             print(f"Error updating password: {e}")
             return False
     
+    @staticmethod
+    def delete_user(user_id: int):
+        """Delete a user"""
+        if not supabase:
+            return False
+        try:
+            supabase.table(SupabaseStore.TABLES["users"]).delete().eq("id", user_id).execute()
+            return True
+        except Exception as e:
+            print(f"Error deleting user: {e}")
+            return False
+    
     @staticmethod
     def get_all_users():
         """Get all users (for admin purposes)"""
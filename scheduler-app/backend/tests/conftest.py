@@ -0,0 +1,104 @@
+"""Shared inputs for the scheduler tests"""
+import pytest
+
+
+def make_department(classes=("A", "B"), shared_faculty=False, math_hours=6, physics_hours=4):
+    """
+    Lecture-only department: every class has Math and Physics lesson hours
+    and a Tutorial without fixed hours (filler). "<class> Math" teaches Math
+    and Tutorial, "<class> Physics" teaches Physics; with shared_faculty one
+    "Shared Physics" faculty teaches Physics to every class instead.
+
+    Returns:
+        (data, config) as for generate_timetable_csp
+    """
+    subjects = [{"name": "Math"}, {"name": "Physics"}, {"name": "Tutorial"}]
+    physics = ["Shared Physics"] if shared_faculty else [f"{c} Physics" for c in classes]
+    faculty_choices = {f"{c} Math": {c: ["Math", "Tutorial"]} for c in classes}
+    for name in physics:
+        faculty_choices[name] = {c: ["Physics"] for c in classes if shared_faculty or name == f"{c} Physics"}
+    data = {
+        "classes": list(classes),
+        "subjects": subjects,
+        "faculties": [{"name": f"{c} Math"} for c in classes] + [{"name": name} for name in physics],
+        "rooms": [{"room": f"R{i + 1}", "type": "classroom"} for i in range(len(classes))],
+        "preferences": []
+    }
+    config = {
+        "lectures_per_day": 6,
+        "subjects_by_class": {c: subjects for c in classes},
+        "lesson_hours": {
+            c: [{"subject": "Math", "hours": math_hours}, {"subject": "Physics", "hours": physics_hours}]
+            for c in classes
+        },
+        "faculty_choices": faculty_choices
+    }
+    return data, config
+
+
+def make_lab_department(labs=3, batches=3, classes=("A", "B")):
+    """
+    Classes that share no faculty, each with a 2-slot lab run by all its
+    batches at once (one lab room per batch), plus a lecture subject.
+
+    Returns:
+        (data, config) as for generate_timetable_csp
+    """
+    subjects = [{"name": "Math"}, {"name": "Physics Lab", "type": "lab", "duration_slots": 2}]
+    data = {
+        "classes": list(classes),
+        "subjects": subjects,
+        "faculties": [{"name": f"{c} {role}"} for c in classes for role in ("Lecturer", "Lab")],
+        "rooms": [{"room": f"R{i + 1}", "type": "classroom"} for i in range(len(classes))]
+                 + [{"room": f"LAB{i + 1}", "type": "lab"} for i in range(labs)],
+        "preferences": [],
+        "batches": {c: [f"{c}{i + 1}" for i in range(batches)] for c in classes}
+    }
+    config = {
+        "lectures_per_day": 6,
+        "subjects_by_class": {c: subjects for c in classes},
+        "lesson_hours": {
+            c: [{"subject": "Math", "hours": 10}, {"subject": "Physics Lab", "hours": 6}] for c in classes
+        },
+        "faculty_choices": {
+            **{f"{c} Lecturer": {c: ["Math"]} for c in classes},
+            **{f"{c} Lab": {c: ["Physics Lab"]} for c in classes}
+        },
+        "solver_profile": "fast",
+        "solver_options": {"max_time_in_seconds": 20}
+    }
+    return data, config
+
+
+def cells(timetable, class_name, subject=None):
+    """Filled (day, slot, entry) cells of one class, optionally of one subject"""
+    return [
+        (day, slot, entry)
+        for day, day_data in timetable[class_name].items()
+        for slot, entry in day_data.items()
+        if entry and (subject is None or entry["subject"] == subject)
+    ]
+
+
+def faculty_clashes(timetable):
+    """(faculty, day, slot) booked by more than one class"""
+    seen, clashes = set(), []
+    for class_data in timetable.values():
+        for day, day_data in class_data.items():
+            for slot, entry in day_data.items():
+                if entry and entry.get("faculty") not in (None, "TBD"):
+                    key = (entry["faculty"], day, slot)
+                    if key in seen:
+                        clashes.append(key)
+                    seen.add(key)
+    return clashes
+
+
+@pytest.fixture
+def department():
+    return make_department
+
+
+@pytest.fixture
+def lab_department():
+    return make_lab_department
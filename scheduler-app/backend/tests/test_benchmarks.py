@@ -0,0 +1,18 @@
+"""Benchmark runner: scheduler names are checked before anything runs"""
+import pytest
+
+from benchmarks import runner
+
+
+def test_unknown_scheduler_fails_before_any_case(monkeypatch):
+    monkeypatch.setattr(runner, "_run_case", lambda *args: pytest.fail("a case ran"))
+
+    with pytest.raises(ValueError, match="warp"):
+        runner.run_benchmarks(sizes=(2,), schedulers=["heuristic", "warp"])
+
+
+def test_greedy_runs_the_heuristic_under_its_own_name():
+    report = runner.run_benchmarks(sizes=(2,), schedulers=["greedy"])
+
+    [row] = report["results"]
+    assert row["scheduler"] == "greedy" and row["classes"] == 2 and row["objective"] is not None
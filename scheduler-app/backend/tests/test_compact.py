@@ -0,0 +1,117 @@
+"""CompactTimetable encoding, queries and deltas"""
+import json
+
+import pytest
+
+from scheduler.compact import CompactTimetable
+from scheduler.csp_scheduler import generate_timetable_csp
+from scheduler.utils import count_subject_hours, get_faculty_timetable, get_room_timetable
+
+
+def sample_timetable():
+    lab = {
+        "subject": "ML Lab", "faculty": "Prof X", "room": "LAB1",
+        "block": {"start": "L1", "length": 2},
+        "batches": [{"batch": "A1", "room": "LAB1"}, {"batch": "A2", "room": "LAB2"}]
+    }
+    return {
+        "BE A": {
+            "Monday": {"L1": lab, "L2": lab, "L3": {"subject": "AI", "faculty": "Prof Y", "room": "301"}},
+            "Tuesday": {"L1": None, "L2": {"subject": "AI", "faculty": "Prof Y"}, "L3": None}
+        },
+        "BE B": {
+            "Monday": {"L1": None, "L2": {"subject": "AI", "faculty": "Prof Z", "room": "302"}, "L3": None},
+            "Tuesday": {"L1": {"subject": "ML", "faculty": "Prof X", "room": "302"}, "L2": None, "L3": None}
+        }
+    }
+
+
+def test_round_trip_is_lossless():
+    timetable = sample_timetable()
+    compact = CompactTimetable.from_dict(timetable)
+
+    assert compact.to_dict() == timetable
+    assert compact.nbytes < len(json.dumps(timetable))
+
+
+def test_json_payload_round_trip():
+    compact = CompactTimetable.from_dict(sample_timetable())
+    payload = json.loads(json.dumps(compact.to_json_dict()))
+
+    assert CompactTimetable.is_payload(payload)
+    assert CompactTimetable.load(payload).to_dict() == sample_timetable()
+    assert CompactTimetable.load(sample_timetable()).to_dict() == sample_timetable()
+
+
+def test_queries():
+    compact = CompactTimetable.from_dict(sample_timetable())
+
+    assert compact.subject_hours("BE A", "ai") == 2
+    assert compact.subject_hours("BE A", "ML Lab") == 2
+    assert set(compact.faculty_view("prof x")["Monday"]) == {"L1", "L2"}
+    assert compact.room_view("302") == get_room_timetable(sample_timetable(), "302")
+
+
+def test_index_queries():
+    compact = CompactTimetable.from_dict(sample_timetable())
+    index = json.loads(json.dumps(compact.build_index()))
+
+    assert set(index["faculty"]) == {"prof x", "prof y", "prof z"}
+    assert len(index["subject"]["ai"]) == 3
+    for name in ("Prof X", "prof y", "Nobody"):
+        assert compact.faculty_view(name, index) == compact.faculty_view(name)
+    assert compact.room_view("302", index) == compact.room_view("302")
+    assert get_faculty_timetable(compact, "Prof Z", index) == get_faculty_timetable(sample_timetable(), "Prof Z")
+
+
+def test_room_view_includes_batch_rooms():
+    compact = CompactTimetable.from_dict(sample_timetable())
+    expected = {"Monday": {
+        slot: {"subject": "ML Lab", "class": "BE A", "faculty": "Prof X", "batches": ["A2"]} for slot in ("L1", "L2")
+    }}
+
+    assert compact.room_view("LAB2") == expected
+    assert compact.room_view("lab2", compact.build_index()) == expected
+    assert get_room_timetable(sample_timetable(), "LAB2") == expected
+
+
+def test_utils_accept_both_forms():
+    timetable = sample_timetable()
+    compact = CompactTimetable.from_dict(timetable)
+
+    assert get_faculty_timetable(compact, "Prof Y") == get_faculty_timetable(timetable, "Prof Y")
+    assert count_subject_hours(compact, "BE B", "AI") == count_subject_hours(timetable, "BE B", "AI") == 1
+
+
+def test_solver_builds_compact_timetable(department):
+    data, config = department()
+
+    compact = generate_timetable_csp(data, config, compact=True)
+
+    assert isinstance(compact, CompactTimetable)
+    assert compact.classes == data["classes"]
+    assert compact.subject_hours("A", "Math") == 6 and compact.subject_hours("B", "Physics") == 4
+
+
+def test_delta_round_trip():
+    base = CompactTimetable.from_dict(sample_timetable())
+    changed = sample_timetable()
+    changed["BE A"]["Tuesday"]["L1"] = {"subject": "ML", "faculty": "Prof Q", "room": "303"}
+    changed["BE B"]["Monday"]["L2"] = None
+    changed["BE A"]["Monday"]["L1"]["batches"][1]["room"] = "LAB3"
+    target = CompactTimetable.from_dict(changed)
+
+    delta = json.loads(json.dumps(target.delta_from(base)))
+
+    assert len(delta["cells"]) == 4  # the lab block covers two cells
+    assert base.apply_delta(delta).to_dict() == changed
+    assert base.to_dict() == sample_timetable()  # apply_delta leaves the base untouched
+    assert target.delta_from(target)["cells"] == []
+
+
+def test_delta_needs_same_axes():
+    base = CompactTimetable.from_dict(sample_timetable())
+    other = CompactTimetable.from_dict({"BE C": sample_timetable()["BE A"]})
+
+    with pytest.raises(ValueError):
+        other.delta_from(base)
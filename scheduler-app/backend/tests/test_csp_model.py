@@ -0,0 +1,59 @@
+"""Sparse CP-SAT model: variables only for legal (class, subject, faculty) triples"""
+from scheduler.csp_scheduler import generate_timetable_csp, _build_problem, _build_model
+
+from tests.conftest import cells, faculty_clashes
+
+
+def names(problem, triples):
+    return {
+        (problem["classes"][c], problem["subjects"][subj]["name"], problem["faculties"][f]["name"])
+        for c, subj, f in triples
+    }
+
+
+def test_only_legal_triples_get_variables(department):
+    data, config = department()
+    problem = _build_problem(data, config)
+
+    model, assignments, _ = _build_model(problem)
+
+    assert names(problem, problem["triples"]) == {
+        ("A", "Math", "A Math"), ("A", "Tutorial", "A Math"), ("A", "Physics", "A Physics"),
+        ("B", "Math", "B Math"), ("B", "Tutorial", "B Math"), ("B", "Physics", "B Physics")
+    }
+    assert {(c, subj, f) for c, _, _, subj, f in assignments} == set(problem["triples"])
+    assert len(assignments) == len(problem["triples"]) * len(problem["days"]) * len(problem["slots"])
+
+
+def test_subject_nobody_chose_is_open_to_every_faculty(department):
+    data, config = department()
+    data["subjects"].append({"name": "Chemistry"})
+    config["subjects_by_class"]["A"] = data["subjects"]
+    problem = _build_problem(data, config)
+
+    chemistry = (0, 3)
+    assert problem["allowed_faculties"][chemistry] == list(range(len(data["faculties"])))
+    assert not any((0, 3, f) in problem["preferred"] for f in problem["allowed_faculties"][chemistry])
+
+
+def test_timetable_keeps_hours_and_faculty_choices(department):
+    data, config = department()
+
+    timetable = generate_timetable_csp(data, config)
+
+    for class_name in data["classes"]:
+        assert len(cells(timetable, class_name, "Math")) == 6
+        assert len(cells(timetable, class_name, "Physics")) == 4
+        assert {entry["faculty"] for _, _, entry in cells(timetable, class_name, "Physics")} == {f"{class_name} Physics"}
+        assert len(cells(timetable, class_name)) >= 15
+    assert faculty_clashes(timetable) == []
+
+
+def test_sessions_and_faculty_names_are_computed_once(lab_department):
+    data, config = lab_department(classes=("A",))
+    config["lesson_hours"]["A"][1]["hours"] = 5
+    problem = _build_problem(data, config)
+
+    assert problem["sessions"] == {(0, 0): 10, (0, 1): 3}
+    assert problem["faculty_names"] == ["A Lecturer", "A Lab"]
+    assert _build_problem(dict(data, faculties=[]), config)["faculty_names"] == ["TBD"]
@@ -0,0 +1,45 @@
+"""Decomposition: faculty-independent classes are solved apart and merged back"""
+from scheduler.csp_scheduler import generate_timetable_csp, _build_problem
+from scheduler.decomposition import split_components, _merge_reports
+
+from tests.conftest import cells, faculty_clashes
+
+
+def test_components_follow_shared_faculty(department):
+    independent = _build_problem(*department(classes=("A", "B", "C")))
+    shared = _build_problem(*department(classes=("A", "B", "C"), shared_faculty=True))
+
+    assert split_components(independent) == [[0], [1], [2]]
+    assert split_components(shared) == [[0, 1, 2]]
+
+
+def test_decomposed_solve_is_merged_in_class_order(department):
+    data, config = department(classes=("C", "A", "B"))
+    config["solver_profile"] = "fast"
+    report = {}
+
+    timetable = generate_timetable_csp(data, config, report)
+
+    assert list(timetable) == ["C", "A", "B"]
+    assert report["decomposition"] == {"components": 3, "classes": [["C"], ["A"], ["B"]]}
+    assert report["status"] == "OPTIMAL" and report["objective"] is not None
+    for class_name in data["classes"]:
+        assert len(cells(timetable, class_name, "Math")) == 6
+        assert len(cells(timetable, class_name, "Physics")) == 4
+    assert faculty_clashes(timetable) == []
+
+
+def test_merged_report():
+    problem = {"classes": ["A", "B"]}
+    optimal = {"status": "OPTIMAL", "objective": 10, "best_bound": 12, "num_variables": 5, "build_time": 0.5}
+    feasible = dict(optimal, status="FEASIBLE", objective=7)
+    fallback = {"status": "INFEASIBLE", "objective": None, "best_bound": None, "fallback": True}
+
+    merged = _merge_reports("fast", {}, [optimal, feasible], [[0], [1]], problem)
+    assert merged["status"] == "FEASIBLE"
+    assert (merged["objective"], merged["best_bound"], merged["num_variables"]) == (17, 24, 10)
+    assert merged["build_time"] == 1.0 and not merged["fallback"]
+
+    merged = _merge_reports("fast", {}, [optimal, fallback], [[0], [1]], problem)
+    assert merged["status"] == "INFEASIBLE" and merged["fallback"]
+    assert merged["objective"] is None and merged["best_bound"] is None
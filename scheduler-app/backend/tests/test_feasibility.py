@@ -0,0 +1,114 @@
+"""Feasibility analyzer: cheap necessary conditions and minimal conflicts"""
+from scheduler.csp_scheduler import generate_timetable_csp, _build_problem
+from scheduler.feasibility import analyze_feasibility, check_feasibility, check_session_lengths
+from services import timetable_service
+from storage import registry
+from storage.in_memory_store import InMemoryStore
+
+
+def errors(issues):
+    return sorted(issue["check"] for issue in issues if issue["severity"] == "error")
+
+
+def one_teacher_department(classes=("A", "B", "C")):
+    """
+    Every class is taught Math (6 hours) and a Tutorial filler only by "X",
+    so each class alone passes every cheap check, but X cannot fill 50% of
+    three classes' weeks.
+    """
+    subjects = [{"name": "Math"}, {"name": "Tutorial"}]
+    data = {
+        "classes": list(classes), "subjects": subjects, "faculties": [{"name": "X"}],
+        "rooms": [{"room": f"R{i + 1}", "type": "classroom"} for i in range(len(classes))], "preferences": []
+    }
+    config = {
+        "lectures_per_day": 6, "subjects_by_class": {c: subjects for c in classes},
+        "lesson_hours": {c: [{"subject": "Math", "hours": 6}] for c in classes},
+        "faculty_choices": {"X": {c: ["Math", "Tutorial"] for c in classes}}
+    }
+    return data, config
+
+
+def test_feasible_department(department):
+    data, config = department()
+
+    analysis = analyze_feasibility(data, config)
+
+    assert analysis["feasible"] is True and analysis["issues"] == []
+    assert analysis["explanation"] == "The config can be scheduled."
+
+
+def test_cheap_checks(department):
+    data, config = department(classes=("A",), math_hours=12)
+    config["lesson_hours"]["A"].append({"subject": "Art", "hours": 2})
+    config["lesson_hours"]["Z"] = []
+
+    issues = check_feasibility(_build_problem(data, config), config)
+
+    assert errors(issues) == ["daily_limit"]
+    assert [issue["check"] for issue in issues if issue["severity"] == "warning"] == ["lesson_hours", "lesson_hours"]
+
+    data, config = department(classes=("A",), math_hours=32)
+    assert "class_hours" in errors(check_feasibility(_build_problem(data, config), config))
+
+
+def test_shared_faculty_demand(department):
+    data, config = department(classes=tuple("ABCDEFGH"), shared_faculty=True)
+
+    analysis = analyze_feasibility(data, config)
+
+    assert analysis["feasible"] is False and analysis["conflict"] is None
+    assert errors(analysis["issues"]) == ["faculty_demand"]
+    assert "Shared Physics" in analysis["explanation"]
+
+
+def test_minimal_conflict_when_cheap_checks_pass():
+    data, config = one_teacher_department()
+    problem = _build_problem(data, config)
+    assert errors(check_feasibility(problem, config)) == []
+
+    analysis = analyze_feasibility(data, config)
+
+    assert analysis["feasible"] is False and analysis["minimal"]
+    assert analysis["conflict"] and all(issue["check"] == "conflict" for issue in analysis["conflict"])
+    assert any("50% coverage" in issue["message"] for issue in analysis["conflict"])
+    assert analysis["explanation"].startswith("These requirements cannot all hold together")
+
+    # Two classes fit X's week, so the conflict needs all three
+    assert analyze_feasibility(*one_teacher_department(("A", "B")))["feasible"] is True
+    assert {issue["message"].split(":")[0] for issue in analysis["conflict"]} == {"A", "B", "C"}
+
+
+def test_solver_skips_a_config_that_fails_the_cheap_checks(department):
+    data, config = department(math_hours=32)
+    report = {}
+
+    generate_timetable_csp(data, config, report)
+
+    assert report["fallback"]
+    assert errors(report["feasibility"]["issues"]) == errors(check_feasibility(_build_problem(data, config), config))
+
+
+def test_lesson_hours_must_fill_whole_sessions(lab_department):
+    data, config = lab_department(classes=("A",))
+    config["lesson_hours"]["A"][1]["hours"] = 5
+    problem = _build_problem(data, config)
+
+    [issue] = check_session_lengths(problem)
+    assert issue["check"] == "lesson_hours" and issue["severity"] == "error"
+    assert "4 or 6" in issue["suggestion"]
+    assert issue in check_feasibility(problem, config)
+
+    report = {}
+    generate_timetable_csp(data, dict(config, heuristic_fallback=False), report)
+    assert report["status"] == "INFEASIBLE" and report["fallback"]
+    assert issue in report["feasibility"]["issues"]
+
+
+def test_config_check_before_saving(lab_department, monkeypatch):
+    data, config = lab_department(classes=("A",))
+    monkeypatch.setattr(registry, "_STORE", InMemoryStore(data=dict(data, timetable_config=config)))
+
+    assert timetable_service.check_lesson_hours(config) == []
+    config["lesson_hours"]["A"][1]["hours"] = 3
+    assert [issue["check"] for issue in timetable_service.check_lesson_hours(config)] == ["lesson_hours"]
@@ -0,0 +1,64 @@
+"""DSatur construction heuristic and its use as the CP-SAT fallback"""
+from scheduler import validate_timetable, generate_timetable_greedy
+from scheduler.csp_scheduler import generate_timetable_csp
+from scheduler.heuristic_scheduler import generate_timetable_heuristic
+
+from tests.conftest import cells, faculty_clashes
+
+
+def test_heuristic_keeps_the_hard_rules(department):
+    data, config = department(classes=("A", "B", "C"), shared_faculty=True)
+    report = {}
+
+    timetable = generate_timetable_heuristic(data, config, report)
+
+    assert report["status"] == "COMPLETE" and report["unplaced"] == []
+    assert report["placed"] > 0 and not report["fallback"]
+    assert faculty_clashes(timetable) == []
+    result = validate_timetable(timetable, data["faculties"], config["lesson_hours"])
+    assert result["valid"], result["conflicts"]
+    for class_name in data["classes"]:
+        assert {entry["faculty"] for _, _, entry in cells(timetable, class_name, "Physics")} == {"Shared Physics"}
+        assert len(cells(timetable, class_name)) >= 15
+
+
+def test_heuristic_places_lab_blocks(lab_department):
+    data, config = lab_department(classes=("A",))
+
+    timetable = generate_timetable_heuristic(data, config)
+
+    labs = cells(timetable, "A", "Physics Lab")
+    assert len(labs) == 6 and len({day for day, _, _ in labs}) == 3
+    assert all(len({batch["room"] for batch in entry["batches"]}) == 3 for _, _, entry in labs)
+
+
+def test_unplaceable_sessions_are_reported(department):
+    data, config = department(classes=("A",), math_hours=28)
+    report = {}
+
+    generate_timetable_heuristic(data, config, report)
+
+    assert report["status"] == "PARTIAL"
+    assert [(u["class"], u["subject"]) for u in report["unplaced"]] == [("A", "Math")]
+
+
+def test_seed_is_deterministic(department):
+    data, config = department(shared_faculty=True)
+
+    first = generate_timetable_heuristic(data, config, seed=3)
+
+    assert generate_timetable_heuristic(data, config, seed=3) == first
+    assert generate_timetable_greedy(data, config) == generate_timetable_heuristic(data, config)
+
+
+def test_csp_falls_back_to_the_heuristic(department):
+    data, config = department(classes=("A",), math_hours=28)
+    config["solver_profile"] = "fast"
+    report = {}
+
+    timetable = generate_timetable_csp(data, config, report)
+
+    assert report["status"] == "INFEASIBLE" and report["fallback"]
+    assert report["heuristic"]["scheduler"] == "heuristic"
+    assert report["heuristic"]["status"] == "PARTIAL"
+    assert len(cells(timetable, "A", "Physics")) == 4
@@ -0,0 +1,107 @@
+"""ETag / 304 handling and compressed representations"""
+import gzip
+import json
+
+import pytest
+from flask import Flask, jsonify
+
+from services import timetable_service
+from storage import registry
+from storage.in_memory_store import InMemoryStore
+from utils.http_cache import conditional, compress_response
+
+
+@pytest.fixture
+def client():
+    app = Flask(__name__)
+    app.after_request(compress_response)
+    state = {"version": 1, "calls": 0}
+
+    @app.route("/versioned")
+    @conditional(lambda: state["version"])
+    def versioned():
+        state["calls"] += 1
+        return jsonify({"version": state["version"], "rows": list(range(500))})
+
+    @app.route("/hashed")
+    @conditional()
+    def hashed():
+        return jsonify({"rows": list(range(500))})
+
+    client = app.test_client()
+    client.state = state
+    return client
+
+
+def test_compressed_representation_has_its_own_etag(client):
+    plain = client.get("/versioned")
+    compressed = client.get("/versioned", headers={"Accept-Encoding": "gzip"})
+
+    assert compressed.headers["Content-Encoding"] == "gzip"
+    assert compressed.headers["ETag"] == plain.headers["ETag"][:-1] + '-gz"'
+    assert json.loads(gzip.decompress(compressed.data)) == plain.json
+    assert "Accept-Encoding" in compressed.headers["Vary"]
+
+
+@pytest.mark.parametrize("encoding", [None, "gzip"])
+def test_not_modified_echoes_the_matched_etag(client, encoding):
+    headers = {"Accept-Encoding": encoding} if encoding else {}
+    etag = client.get("/versioned", headers=headers).headers["ETag"]
+    calls = client.state["calls"]
+
+    response = client.get("/versioned", headers=dict(headers, **{"If-None-Match": etag}))
+
+    assert response.status_code == 304
+    assert response.headers["ETag"] == etag
+    assert "Accept-Encoding" in response.headers["Vary"]
+    assert client.state["calls"] == calls  # answered without running the view
+
+
+def test_weak_and_listed_tags_match(client):
+    plain = client.get("/versioned").headers["ETag"]
+    compressed = client.get("/versioned", headers={"Accept-Encoding": "gzip"}).headers["ETag"]
+
+    weak = client.get("/versioned", headers={"If-None-Match": f"W/{compressed}", "Accept-Encoding": "gzip"})
+    listed = client.get("/versioned", headers={"If-None-Match": f"{plain}, {compressed}", "Accept-Encoding": "gzip"})
+
+    assert weak.status_code == listed.status_code == 304
+    assert weak.headers["ETag"] == listed.headers["ETag"] == compressed
+
+
+def test_new_version_invalidates_the_etag(client):
+    etag = client.get("/versioned").headers["ETag"]
+    client.state["version"] = 2
+
+    response = client.get("/versioned", headers={"If-None-Match": etag})
+
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+    assert response.json["version"] == 2
+
+
+def test_body_hash_etag_without_version(client):
+    etag = client.get("/hashed").headers["ETag"]
+
+    assert client.get("/hashed", headers={"If-None-Match": etag}).status_code == 304
+
+
+class RecordCountingStore(InMemoryStore):
+    """Backend counting full timetable reads"""
+
+    records = 0
+
+    def get_timetable_record(self):
+        self.records += 1
+        return super().get_timetable_record()
+
+
+def test_uncached_version_lookup_does_not_load_the_timetable(monkeypatch):
+    store = RecordCountingStore(data={"timetable": None, "timetable_meta": None, "timetable_version": 0})
+    monkeypatch.setattr(registry, "_STORE", store)
+    monkeypatch.setattr(timetable_service, "TIMETABLE_CACHE", None)
+
+    assert timetable_service.get_timetable_version() is None
+    store.save_timetable({"format": "compact-v1"})
+
+    assert timetable_service.get_timetable_version() == store.get_timetable_record()["id"]
+    assert store.records == 1
@@ -0,0 +1,127 @@
+"""Background generation jobs: completion, cancel vs. accept and what gets saved"""
+import time
+
+import pytest
+
+from scheduler.csp_scheduler import generate_timetable_csp
+from services import job_service
+from services.solve_cache import SolveCache
+
+from tests.conftest import make_department
+
+
+def held_solve(data, config, report=None, progress_callback=None, stop_event=None, **options):
+    """Real solve that, when config["hold"] is set, stays running until stopped"""
+    timetable = generate_timetable_csp(data, config, report, **options)
+    if config.get("hold"):
+        progress_callback({"solutions": 1, "objective": report.get("objective"), "best_bound": None, "elapsed": 0})
+        stop_event.wait(30)
+    return timetable
+
+
+@pytest.fixture
+def jobs(monkeypatch):
+    """job_service over the test department; returns (config, saved timetables)"""
+    data, config = make_department()
+    config["solver_profile"] = "fast"
+    saved = []
+    monkeypatch.setattr(job_service, "load_scheduler_input", lambda solver_profile=None: (data, config))
+    monkeypatch.setattr(job_service, "save_timetable", lambda timetable, *meta: saved.append(timetable))
+    monkeypatch.setattr(job_service, "generate_timetable_csp", held_solve)
+    monkeypatch.setattr(job_service, "SOLVE_CACHE", None)
+    monkeypatch.setattr(job_service, "_EXECUTOR", None)
+    monkeypatch.setattr(job_service, "_MANAGER", None)
+    yield config, saved
+    if job_service._EXECUTOR is not None:
+        job_service._EXECUTOR.shutdown(wait=True, cancel_futures=True)
+        job_service._MANAGER.shutdown()
+
+
+def wait_for(job_id, statuses, timeout=60):
+    deadline = time.time() + timeout
+    while job_service.get_job(job_id)["status"] not in statuses:
+        assert time.time() < deadline, job_service.get_job(job_id)
+        time.sleep(0.05)
+    return job_service.get_job(job_id)
+
+
+def wait_for_progress(job_id, timeout=60):
+    deadline = time.time() + timeout
+    while not job_service.get_job_progress(job_id):
+        assert time.time() < deadline, job_service.get_job(job_id)
+        time.sleep(0.05)
+
+
+def test_finished_job_is_saved(jobs):
+    _, saved = jobs
+
+    job_id = job_service.submit_generation_job()
+    job = wait_for(job_id, ("completed", "failed"))
+
+    assert job["status"] == "completed" and job["error"] is None
+    assert job["report"]["profile"] == "fast"
+    assert len(saved) == 1 and saved[0].to_dict() == job_service.get_job_result(job_id)
+    assert job_service.cancel_job(job_id) is False
+
+
+def test_cancelled_job_is_not_saved(jobs):
+    config, saved = jobs
+    config["hold"] = True
+
+    job_id = job_service.submit_generation_job()
+    wait_for_progress(job_id)
+    assert job_service.cancel_job(job_id)
+    job = wait_for(job_id, ("cancelled", "completed", "failed"))
+
+    assert job["status"] == "cancelled"
+    assert saved == [] and job_service.get_job_result(job_id) is None
+    assert job_service.cancel_job(job_id) is False
+
+
+def test_accepted_job_keeps_its_solution(jobs):
+    config, saved = jobs
+    config["hold"] = True
+
+    job_id = job_service.submit_generation_job()
+    wait_for_progress(job_id)
+    assert job_service.accept_job(job_id)
+    job = wait_for(job_id, ("cancelled", "completed", "failed"))
+
+    assert job["status"] == "completed" and job["accepted"]
+    assert len(saved) == 1 and saved[0].to_dict() == job_service.get_job_result(job_id)
+    assert job_service.accept_job(job_id) is False
+
+
+def test_job_fails_when_its_timetable_cannot_be_saved(jobs, monkeypatch):
+    def failed_save(timetable, *meta):
+        raise RuntimeError("Could not save the timetable")
+    monkeypatch.setattr(job_service, "save_timetable", failed_save)
+
+    job_id = job_service.submit_generation_job()
+    job = wait_for(job_id, ("completed", "failed"))
+
+    assert job["status"] == "failed" and job["error"] == "Could not save the timetable"
+    assert job_service.get_job_result(job_id) is None
+
+
+def test_incremental_job_bypasses_the_solve_cache(jobs, monkeypatch, tmp_path):
+    config, saved = jobs
+    data, _ = job_service.load_scheduler_input()
+    cache = SolveCache(directory=str(tmp_path))
+    cache.put(data, config, {"stale": {}}, {"status": "OPTIMAL"})
+    monkeypatch.setattr(job_service, "SOLVE_CACHE", cache)
+    monkeypatch.setattr(job_service, "build_warm_start", lambda data, config: None)
+
+    job_id = job_service.submit_generation_job(incremental=True)
+    job = wait_for(job_id, ("completed", "failed"))
+
+    assert job["status"] == "completed" and "cache" not in job["report"]
+    assert len(saved) == 1 and "stale" not in job_service.get_job_result(job_id)
+    assert cache.get(data, config)[0] == {"stale": {}}
+
+
+def test_unknown_job():
+    assert job_service.get_job("missing") is None
+    assert job_service.get_job_result("missing") is None
+    assert job_service.cancel_job("missing") is False
+    assert job_service.accept_job("missing") is False
@@ -0,0 +1,70 @@
+"""Large neighborhood search: neighborhoods, fixed sub-solves and the driver loop"""
+import threading
+
+from scheduler import validate_timetable
+from scheduler.csp_scheduler import _build_problem, _build_model
+from scheduler.heuristic_scheduler import schedule_problem
+from scheduler.lns import solve_lns, _Neighborhoods, _solve_neighborhood
+from scheduler.local_search import evaluate_sessions
+from scheduler.solver_profiles import resolve_solver_profile
+
+
+def test_neighborhoods(department):
+    problem = _build_problem(*department(classes=("A", "B", "C"), shared_faculty=True))
+    _, assignments, _ = _build_model(problem)
+    search = _Neighborhoods(problem, assignments, seed=1)
+    current = set(schedule_problem(problem)[0])
+
+    day, free = search.neighborhood("day", current)
+    assert free and {key[1] for key in free} == {problem["days"].index(day)}
+
+    _, free = search.neighborhood("classes", current)
+    assert len({key[0] for key in free}) == search.class_count == 2
+
+    search.update("classes", "rejected", "UNKNOWN", 2.0, 2.0)
+    assert search.class_count == 1 and search.weights["classes"] < 1.0
+    search.update("day", "improved", "OPTIMAL", 0.1, 2.0)
+    assert search.weights["day"] > 1.0
+
+
+def test_sub_solve_only_changes_the_neighborhood(department):
+    data, config = department(shared_faculty=True)
+    problem = _build_problem(data, config)
+    model, assignments, _ = _build_model(problem)
+    _, profile = resolve_solver_profile({"solver_profile": "fast"})
+    current = set(schedule_problem(problem)[0])
+    free = {key for key in assignments if key[1] == 0}
+
+    new, objective, status = _solve_neighborhood(model, problem, assignments, profile, current, free, 5, None)
+
+    assert status == "OPTIMAL"
+    assert {key for key in new if key[1] != 0} == {key for key in current if key[1] != 0}
+    assert evaluate_sessions(problem, new) == (0, objective)
+    assert objective >= evaluate_sessions(problem, current)[1]
+
+
+def test_lns_keeps_the_timetable_valid(department):
+    data, config = department(classes=("A", "B", "C"), shared_faculty=True)
+    config["solver_profile"] = "fast"
+    report = {}
+
+    timetable = solve_lns(data, config, report, time_limit=10)
+
+    assert report["status"] == "COMPLETE" and report["violations"] == 0
+    assert report["objective"] >= report["initial_objective"]
+    assert report["objective"] <= report["upper_bound"]
+    assert all(step["objective_after"] >= step["objective_before"] for step in report["history"])
+    result = validate_timetable(timetable, data["faculties"], config["lesson_hours"])
+    assert result["valid"], result["conflicts"]
+
+
+def test_stop_event_ends_the_search(department):
+    data, config = department(shared_faculty=True)
+    stop = threading.Event()
+    stop.set()
+    report = {}
+
+    solve_lns(data, config, report, time_limit=30, stop_event=stop)
+
+    assert report["iterations"] == 0 and report["wall_time"] < 30
+    assert report["objective"] == report["initial_objective"]
@@ -0,0 +1,65 @@
+"""Tabu-search repair: reading timetables back into sessions and removing violations"""
+from scheduler import validate_timetable
+from scheduler.csp_scheduler import generate_timetable_csp, _build_problem
+from scheduler.local_search import repair_timetable, sessions_from_timetable
+
+from tests.conftest import cells, faculty_clashes
+
+
+def test_sessions_from_timetable(lab_department):
+    data, config = lab_department(classes=("A",))
+    problem = _build_problem(data, config)
+    lab = {"subject": "physics lab", "faculty": "A Lab", "room": "LAB1"}
+    timetable = {"A": {"Monday": {"L1": lab, "L2": lab, "L3": {"subject": "Art", "faculty": "X"},
+                                  "L4": {"subject": "Math", "faculty": "Nobody"}, "L5": None, "L6": lab}}}
+
+    sessions, dropped = sessions_from_timetable(problem, timetable)
+
+    subjects = {subject["name"]: i for i, subject in enumerate(problem["subjects"])}
+    faculties = {faculty["name"]: i for i, faculty in enumerate(problem["faculties"])}
+    assert dropped == 1
+    assert sessions == [
+        (0, 0, 0, subjects["Physics Lab"], faculties["A Lab"]),
+        (0, 0, 3, subjects["Math"], faculties["A Lecturer"]),
+        (0, 0, 4, subjects["Physics Lab"], faculties["A Lab"])  # moved to end on the last slot
+    ]
+
+
+def test_repair_from_empty_timetable(department):
+    data, config = department(classes=("A", "B", "C"), shared_faculty=True)
+    report = {}
+
+    timetable = repair_timetable({}, data, config, report, time_limit=3)
+
+    assert report["violations_before"] > 0
+    assert report["status"] == "COMPLETE" and report["violations"] == 0
+    result = validate_timetable(timetable, data["faculties"], config["lesson_hours"])
+    assert result["valid"], result["conflicts"]
+
+
+def test_repair_removes_a_clash(department):
+    data, config = department(shared_faculty=True)
+    timetable = generate_timetable_csp(data, config)
+    day, slot, entry = cells(timetable, "A", "Physics")[0]
+    moved_day, moved_slot, _ = cells(timetable, "B", "Physics")[0]
+    timetable["B"][moved_day][moved_slot] = None
+    timetable["B"][day][slot] = dict(entry)
+    assert faculty_clashes(timetable)
+    report = {}
+
+    repaired = repair_timetable(timetable, data, config, report, time_limit=3)
+
+    assert report["violations_before"] > 0 and report["violations"] == 0
+    assert faculty_clashes(repaired) == []
+    assert all(len(cells(repaired, c, "Physics")) == 4 for c in data["classes"])
+
+
+def test_feasible_timetable_is_not_made_worse(department):
+    data, config = department()
+    timetable = generate_timetable_csp(data, config)
+    report = {}
+
+    repair_timetable(timetable, data, config, report, time_limit=1)
+
+    assert report["violations_before"] == report["violations"] == 0
+    assert report["objective"] >= report["objective_before"]
@@ -0,0 +1,67 @@
+"""Portfolio solver: strategy selection, the objective bound and the race result"""
+from scheduler import validate_timetable
+from scheduler.csp_scheduler import generate_timetable_csp, _build_problem
+from scheduler.portfolio import (
+    PORTFOLIO_STRATEGIES, solve_portfolio, default_strategies, objective_upper_bound
+)
+
+
+def test_strategy_selection():
+    names = [strategy["name"] for strategy in PORTFOLIO_STRATEGIES]
+
+    assert [s["name"] for s in default_strategies()] == names
+    assert [s["name"] for s in default_strategies({"portfolio_strategies": ["heuristic", "warp"]})] == ["heuristic"]
+    assert [s["name"] for s in default_strategies({"portfolio_strategies": ["warp"]})] == names
+
+
+def test_upper_bound_holds_and_is_tight(department):
+    data, config = department()
+    report = {}
+
+    generate_timetable_csp(data, config, report)
+
+    # Per class: 10 required cells plus 10 Tutorial cells (two a day), all with a chosen faculty
+    assert objective_upper_bound(_build_problem(data, config)) == 10 * 2 * 20
+    assert report["objective"] == 400
+
+
+def test_race_stops_at_the_bound(department):
+    data, config = department(shared_faculty=True)
+    report = {}
+
+    timetable = solve_portfolio(data, config, report, time_limit=20)
+
+    assert report["status"] == "COMPLETE" and report["violations"] == 0
+    assert report["optimal"] and report["objective"] == report["upper_bound"]
+    assert report["wall_time"] < 20
+    assert report["winner"] in {strategy["name"] for strategy in PORTFOLIO_STRATEGIES}
+    assert set(report["strategies"]) <= {strategy["name"] for strategy in PORTFOLIO_STRATEGIES}
+    result = validate_timetable(timetable, data["faculties"], config["lesson_hours"])
+    assert result["valid"], result["conflicts"]
+
+
+def test_single_strategy(department):
+    data, config = department()
+    config["portfolio_strategies"] = ["heuristic"]
+    report = {}
+
+    solve_portfolio(data, config, report, time_limit=10)
+
+    assert report["winner"] == "heuristic" and list(report["strategies"]) == ["heuristic"]
+    assert report["violations"] == 0
+
+
+def test_incumbents_are_reported_and_can_end_the_race(department):
+    data, config = department(shared_faculty=True)
+    seen = []
+
+    def on_progress(info):
+        seen.append(info)
+        return True
+
+    timetable = solve_portfolio(data, config, {}, time_limit=20, progress_callback=on_progress, stream_solutions=True)
+
+    assert len(seen) == 1 and seen[0]["solutions"] == 1
+    assert seen[0]["objective"] is not None and seen[0]["best_bound"] >= seen[0]["objective"]
+    assert seen[0]["timetable"]["classes"] == data["classes"] and seen[0]["timetable"]["cells"]
+    assert set(timetable) == set(data["classes"])
@@ -0,0 +1,151 @@
+"""Rooms and lab batches: capacity per room type, one room per batch, no double-booking"""
+import pytest
+
+from scheduler.csp_scheduler import generate_timetable_csp, _build_problem
+from scheduler.decomposition import split_components, partition_rooms
+from scheduler.feasibility import check_feasibility
+
+from tests.conftest import cells
+
+
+def room_bookings(timetable):
+    """[(day, slot, room), ...] with one booking per batch (or per cell without batches)"""
+    bookings = []
+    for class_data in timetable.values():
+        for day, day_data in class_data.items():
+            for slot, entry in day_data.items():
+                if not entry:
+                    continue
+                rooms = [batch["room"] for batch in entry.get("batches") or []] or [entry.get("room")]
+                bookings.extend((day, slot, room) for room in rooms if room and room != "TBD")
+    return bookings
+
+
+@pytest.mark.parametrize("decompose", [True, False])
+def test_classes_keep_distinct_home_rooms(department, decompose):
+    data, config = department(classes=("A", "B", "C"))
+    config["decompose"] = decompose
+
+    timetable = generate_timetable_csp(data, config)
+
+    bookings = room_bookings(timetable)
+    assert len(bookings) == len(set(bookings))
+    home_rooms = [{entry["room"] for _, _, entry in cells(timetable, c)} for c in data["classes"]]
+    assert all(len(rooms) == 1 for rooms in home_rooms)
+    assert len(set.union(*home_rooms)) == 3
+
+
+def test_room_capacity_limits_parallel_classes(department):
+    data, config = department()
+    data["rooms"] = data["rooms"][:1]
+    report = {}
+
+    timetable = generate_timetable_csp(data, config, report)
+
+    assert report["status"] in ("OPTIMAL", "FEASIBLE") and "decomposition" not in report
+    bookings = room_bookings(timetable)
+    assert len(bookings) == len(set(bookings))
+    assert {room for _, _, room in bookings} == {"R1"}
+
+
+def test_lab_subjects_get_lab_rooms(department):
+    data, config = department()
+    for class_name in data["classes"]:
+        config["subjects_by_class"][class_name] = [
+            dict(subject, type="lab") if subject["name"] == "Physics" else subject
+            for subject in config["subjects_by_class"][class_name]
+        ]
+    data["rooms"].append({"room": "LAB1", "type": "lab"})
+
+    timetable = generate_timetable_csp(data, config)
+
+    for class_name in data["classes"]:
+        assert {entry["room"] for _, _, entry in cells(timetable, class_name, "Physics")} == {"LAB1"}
+        assert "LAB1" not in {entry["room"] for _, _, entry in cells(timetable, class_name, "Math")}
+    bookings = room_bookings(timetable)
+    assert len(bookings) == len(set(bookings))
+
+
+def test_rooms_are_partitioned_between_components(department):
+    data, config = department()
+    data["rooms"].append({"room": "R3", "type": "classroom"})
+    problem = _build_problem(data, config)
+    components = split_components(problem)
+
+    shares = partition_rooms(problem, components)
+
+    assert sorted(len(share) for share in shares) == [1, 2]
+    assert sorted(shares[0] + shares[1]) == [0, 1, 2]
+
+    problem = _build_problem(dict(data, rooms=data["rooms"][:1]), config)
+    assert partition_rooms(problem, components) is None
+
+
+@pytest.mark.parametrize("decompose", [True, False])
+def test_batches_get_distinct_labs(lab_department, decompose):
+    data, config = lab_department(labs=3, batches=3)
+    config["decompose"] = decompose
+    report = {}
+
+    timetable = generate_timetable_csp(data, config, report)
+
+    assert report["status"] in ("OPTIMAL", "FEASIBLE")
+    bookings = room_bookings(timetable)
+    assert len(bookings) == len(set(bookings))
+    for class_name in data["classes"]:
+        labs = [entry for _, _, entry in cells(timetable, class_name, "Physics Lab")]
+        assert labs and all(len({b["room"] for b in entry["batches"]}) == 3 for entry in labs)
+        assert all([b["batch"] for b in entry["batches"]] == data["batches"][class_name] for entry in labs)
+
+
+def test_components_competing_for_labs_are_solved_whole(lab_department):
+    data, config = lab_department(labs=3, batches=3)
+    problem = _build_problem(data, config)
+    components = split_components(problem)
+
+    assert len(components) == 2
+    assert partition_rooms(problem, components) is None
+
+
+def test_room_shares_cover_peak_demand(lab_department):
+    data, config = lab_department(labs=7, batches=3)
+    problem = _build_problem(data, config)
+    components = split_components(problem)
+    labs = set(problem["rooms_by_type"]["lab"])
+
+    shares = partition_rooms(problem, components)
+
+    assert shares is not None
+    lab_shares = [set(share) & labs for share in shares]
+    assert all(len(share) >= 3 for share in lab_shares)
+    assert not lab_shares[0] & lab_shares[1]
+
+
+def test_more_batches_than_labs_is_infeasible(lab_department):
+    data, config = lab_department(labs=2, batches=3)
+
+    issues = check_feasibility(_build_problem(data, config), config)
+    assert any(issue["check"] == "rooms" and issue["severity"] == "error" for issue in issues)
+
+    # Without the cheap checks the model itself must refuse to share a lab
+    config["feasibility_check"] = False
+    config["heuristic_fallback"] = False
+    report = {}
+    generate_timetable_csp(data, config, report)
+    assert report["status"] == "INFEASIBLE"
+
+
+def test_labs_are_contiguous_blocks(lab_department):
+    data, config = lab_department()
+
+    timetable = generate_timetable_csp(data, config)
+
+    slots = list(next(iter(timetable["A"].values())))
+    for class_name in data["classes"]:
+        lab_days = {}
+        for day, slot, entry in cells(timetable, class_name, "Physics Lab"):
+            lab_days.setdefault(day, []).append(slots.index(slot))
+            assert entry["faculty"] == f"{class_name} Lab"
+        assert len(lab_days) == 3
+        assert all(len(positions) == 2 and max(positions) == min(positions) + 1 for positions in lab_days.values())
+        assert len(cells(timetable, class_name, "Math")) == 10
@@ -0,0 +1,98 @@
+"""Solve cache: one key per input and solving strategy, results kept in memory and on disk"""
+import pytest
+
+from services.solve_cache import SolveCache, solver_input_key
+
+from tests.conftest import make_department
+
+
+STRATEGIES = [
+    {},
+    {"portfolio": True},
+    {"lns": True},
+    {"decompose": False},
+    {"symmetry_breaking": True},
+    {"heuristic_fallback": False},
+    {"feasibility_check": False},
+    {"solver_profile": "thorough"}
+]
+
+
+def test_ordering_does_not_change_the_key():
+    data, config = make_department()
+    reordered = dict(data, classes=list(reversed(data["classes"])), rooms=list(reversed(data["rooms"])))
+    reordered_config = dict(config, lesson_hours={
+        c: list(reversed(lessons)) for c, lessons in config["lesson_hours"].items()
+    })
+
+    assert solver_input_key(data, config) == solver_input_key(reordered, reordered_config)
+
+
+def test_solver_input_changes_the_key():
+    data, config = make_department()
+    key = solver_input_key(data, config)
+
+    assert solver_input_key(*make_department(math_hours=5)) != key
+    assert solver_input_key(data, dict(config, solver_profile="thorough")) != key
+    assert solver_input_key(data, dict(config, solver_options={"max_time_in_seconds": 3})) != key
+
+
+def test_strategies_get_separate_keys():
+    data, config = make_department()
+    keys = [solver_input_key(data, dict(config, **strategy)) for strategy in STRATEGIES]
+
+    assert len(set(keys)) == len(STRATEGIES)
+
+
+def test_strategy_defaults_do_not_change_the_key():
+    data, config = make_department()
+    explicit = dict(config, portfolio=False, lns=False, decompose=True, symmetry_breaking=False,
+                    heuristic_fallback=True, feasibility_check=True)
+
+    assert solver_input_key(data, config) == solver_input_key(data, explicit)
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return SolveCache(max_entries=2, directory=str(tmp_path), max_disk_entries=8)
+
+
+def test_memory_and_disk_tiers(tmp_path, cache):
+    data, config = make_department()
+    cache.put(data, config, {"A": {}}, {"status": "OPTIMAL", "cache": "memory"})
+
+    timetable, report = cache.get(data, config)
+    assert timetable == {"A": {}} and report == {"status": "OPTIMAL", "cache": "memory"}
+
+    other_process = SolveCache(directory=str(tmp_path))
+    assert other_process.get(data, config)[1]["cache"] == "disk"
+    assert other_process.get(data, config)[1]["cache"] == "memory"
+
+
+def test_cached_result_is_only_served_for_its_strategy(cache):
+    data, config = make_department()
+    cache.put(data, dict(config, portfolio=True), {"A": {}}, {"status": "COMPLETE"})
+
+    assert cache.get(data, config) is None
+    assert cache.get(data, dict(config, lns=True)) is None
+    timetable, report = cache.get(data, dict(config, portfolio=True))
+    assert timetable == {"A": {}} and report["cache"] == "memory"
+
+
+def test_fallbacks_are_not_cached(cache):
+    data, config = make_department()
+    cache.put(data, config, {"A": {}}, {"status": "FALLBACK", "fallback": True})
+
+    assert cache.get(data, config) is None
+
+
+def test_memory_tier_is_bounded(tmp_path, cache):
+    inputs = [make_department(math_hours=hours) for hours in (4, 5, 6)]
+    for data, config in inputs:
+        cache.put(data, config, {"A": {}}, {})
+
+    assert len(cache._entries) == 2
+    assert cache.get(*inputs[0])[1]["cache"] == "disk"
+
+    cache.clear()
+    assert cache.get(*inputs[1]) is None
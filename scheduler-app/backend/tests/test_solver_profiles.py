@@ -0,0 +1,53 @@
+"""Solver profiles: resolution, overrides and the per-run report"""
+from ortools.sat.python import cp_model
+
+from scheduler.csp_scheduler import generate_timetable_csp
+from scheduler.solver_profiles import (
+    SOLVER_PROFILES, DEFAULT_PROFILE, resolve_solver_profile, apply_solver_profile
+)
+
+
+def test_default_and_unknown_profiles():
+    assert resolve_solver_profile() == (DEFAULT_PROFILE, SOLVER_PROFILES[DEFAULT_PROFILE])
+    assert resolve_solver_profile({"solver_profile": " Thorough "})[0] == "thorough"
+    assert resolve_solver_profile({"solver_profile": "warp"})[0] == DEFAULT_PROFILE
+
+
+def test_overrides_are_cast_and_do_not_leak():
+    name, profile = resolve_solver_profile({
+        "solver_profile": "fast",
+        "solver_options": {"max_time_in_seconds": "2", "num_workers": 1.0, "relative_gap_limit": None,
+                           "unknown_option": 3}
+    })
+
+    assert name == "fast"
+    assert profile["max_time_in_seconds"] == 2.0 and profile["num_workers"] == 1
+    assert profile["relative_gap_limit"] == SOLVER_PROFILES["fast"]["relative_gap_limit"]
+    assert "unknown_option" not in profile
+    assert SOLVER_PROFILES["fast"]["max_time_in_seconds"] == 5.0
+
+
+def test_profile_is_applied_to_the_solver():
+    solver = cp_model.CpSolver()
+    _, profile = resolve_solver_profile({"solver_profile": "thorough", "solver_options": {"num_workers": 2}})
+
+    apply_solver_profile(solver, profile)
+
+    assert solver.parameters.num_workers == 2
+    assert solver.parameters.max_time_in_seconds == 120.0
+    assert solver.parameters.relative_gap_limit == 0.0
+    assert solver.parameters.linearization_level == 2
+
+
+def test_run_report(department):
+    data, config = department()
+    config.update(solver_profile="fast", solver_options={"max_time_in_seconds": 10})
+    report = {}
+
+    generate_timetable_csp(data, config, report)
+
+    assert report["profile"] == "fast"
+    assert report["parameters"]["max_time_in_seconds"] == 10.0
+    assert report["status"] in ("OPTIMAL", "FEASIBLE") and not report["fallback"]
+    assert report["objective"] is not None and report["best_bound"] >= report["objective"]
+    assert report["num_variables"] > 0
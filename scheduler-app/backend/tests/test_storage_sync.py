@@ -0,0 +1,242 @@
+"""Storage backends: saves replace exactly the given rows, caches never serve stale data"""
+import threading
+
+import pytest
+
+from storage.cached_store import CachedStore
+from storage.in_memory_store import InMemoryStore
+from storage.sqlite_store import SQLiteStore
+
+
+# ==================== SQLITE ====================
+
+@pytest.fixture
+def sqlite_store(tmp_path):
+    store = SQLiteStore(str(tmp_path / "scheduler.db"))
+    yield store
+    store.close()
+
+
+def test_sqlite_saves_replace_rows(sqlite_store, tmp_path):
+    sqlite_store.save_classes(["BE A", "BE B", "BE A"])
+    sqlite_store.save_rooms([{"room": "301", "type": "classroom"}, {"room": "LAB1", "type": "lab"}])
+    sqlite_store.save_classes(["BE B", "BE C"])
+    sqlite_store.save_rooms([{"room": "LAB1", "type": "lab"}])
+
+    reopened = SQLiteStore(sqlite_store.path)
+    assert reopened.get_classes() == ["BE B", "BE C"]
+    assert reopened.get_rooms() == [{"room": "LAB1", "type": "lab"}]
+    reopened.close()
+
+
+def test_sqlite_batches_are_scoped_per_class(sqlite_store):
+    sqlite_store.save_batches("BE A", 3)
+    sqlite_store.save_batches("BE B", 2)
+    sqlite_store.save_batches("BE A", 2)
+
+    assert sqlite_store.get_all_batches_with_classes() == {"BE A": ["BE A1", "BE A2"], "BE B": ["BE B1", "BE B2"]}
+
+
+def test_sqlite_timetable_version_changes_on_save(sqlite_store):
+    sqlite_store.save_timetable({"format": "compact-v1"}, {"fingerprints": {"BE A": "x"}})
+    first = sqlite_store.get_timetable_version()
+    sqlite_store.save_timetable({"format": "compact-v1"}, {"fingerprints": {"BE A": "y"}})
+
+    record = sqlite_store.get_timetable_record()
+    assert record["id"] == sqlite_store.get_timetable_version() != first
+    assert record["meta"] == {"fingerprints": {"BE A": "y"}}
+
+
+def test_sqlite_connections_are_per_thread(sqlite_store):
+    sqlite_store.save_classes(["BE A"])
+    seen = []
+    thread = threading.Thread(target=lambda: seen.append(sqlite_store.get_classes()))
+    thread.start()
+    thread.join()
+
+    assert seen == [["BE A"]]
+
+
+# ==================== SUPABASE ====================
+
+class FakeTable:
+    """The subset of the supabase-py query builder SupabaseStore._sync_rows uses"""
+
+    def __init__(self, client, name):
+        self.client, self.name = client, name
+        self.filters, self.action, self.payload = [], "select", None
+
+    def select(self, columns):
+        self.columns = [c.strip() for c in columns.split(",")]
+        return self
+
+    def eq(self, column, value):
+        self.filters.append(lambda row: row.get(column) == value)
+        return self
+
+    def in_(self, column, values):
+        self.filters.append(lambda row: row.get(column) in values)
+        return self
+
+    def upsert(self, rows):
+        self.action, self.payload = "upsert", rows
+        return self
+
+    def insert(self, rows):
+        self.action, self.payload = "insert", rows
+        return self
+
+    def delete(self):
+        self.action = "delete"
+        return self
+
+    def execute(self):
+        rows = self.client.tables.setdefault(self.name, [])
+        self.client.calls.append((self.name, self.action, len(self.payload or [])))
+        if self.action == "select":
+            data = [{c: row.get(c) for c in self.columns} for row in rows if all(f(row) for f in self.filters)]
+        elif self.action == "insert":
+            for row in self.payload:
+                self.client.next_id += 1
+                rows.append(dict(row, id=self.client.next_id))
+            data = self.payload
+        elif self.action == "upsert":
+            for row in self.payload:
+                next(existing for existing in rows if existing["id"] == row["id"]).update(row)
+            data = self.payload
+        else:
+            self.client.tables[self.name] = [row for row in rows if not all(f(row) for f in self.filters)]
+            data = []
+        return type("Response", (), {"data": data})()
+
+
+class FakeSupabase:
+    def __init__(self):
+        self.tables, self.calls, self.next_id = {}, [], 0
+
+    def table(self, name):
+        return FakeTable(self, name)
+
+
+@pytest.fixture
+def supabase_client(monkeypatch):
+    pytest.importorskip("supabase")
+    from storage import supabase_store
+
+    client = FakeSupabase()
+    monkeypatch.setattr(supabase_store, "supabase", client)
+    monkeypatch.setattr(supabase_store, "USE_SYNC_RPC", False)
+    return client
+
+
+def test_supabase_sync_writes_only_the_difference(supabase_client):
+    from storage.supabase_store import SupabaseStore
+
+    SupabaseStore._sync_rows("rooms", [{"room": "301", "type": "classroom"}, {"room": "LAB1", "type": "lab"}], ("room",))
+    ids = {row["room"]: row["id"] for row in supabase_client.tables["rooms"]}
+    supabase_client.calls.clear()
+
+    counts = SupabaseStore._sync_rows(
+        "rooms",
+        [{"room": "LAB1", "type": "classroom"}, {"room": "302", "type": "classroom"}, {"room": "302", "type": "lab"}],
+        ("room",)
+    )
+
+    assert counts == {"inserted": 1, "updated": 1, "deleted": 1}
+    rows = {row["room"]: row for row in supabase_client.tables["rooms"]}
+    assert set(rows) == {"LAB1", "302"}
+    assert rows["LAB1"]["id"] == ids["LAB1"] and rows["LAB1"]["type"] == "classroom"
+    assert [action for _, action, _ in supabase_client.calls] == ["select", "upsert", "insert", "delete"]
+
+
+def test_supabase_sync_without_changes_only_reads(supabase_client):
+    from storage.supabase_store import SupabaseStore
+
+    rows = [{"room": "301", "type": "classroom"}]
+    SupabaseStore._sync_rows("rooms", rows, ("room",))
+    supabase_client.calls.clear()
+
+    assert SupabaseStore._sync_rows("rooms", rows, ("room",)) == {"inserted": 0, "updated": 0, "deleted": 0}
+    assert [action for _, action, _ in supabase_client.calls] == ["select"]
+
+
+def test_supabase_sync_respects_scope(supabase_client):
+    from storage.supabase_store import SupabaseStore
+
+    SupabaseStore.save_batches("BE A", 3)
+    SupabaseStore.save_batches("BE B", 2)
+    SupabaseStore.save_batches("BE A", 1)
+
+    names = sorted(row["batch_name"] for row in supabase_client.tables["batches"])
+    assert names == ["BE A1", "BE B1", "BE B2"]
+
+
+# ==================== CACHING AND MEMORY ====================
+
+class CountingStore(InMemoryStore):
+    """Backend counting get_classes calls"""
+
+    def __init__(self):
+        super().__init__(data={"classes": ["BE A"]})
+        self.reads = 0
+
+    def get_classes(self):
+        self.reads += 1
+        return super().get_classes()
+
+
+def test_cached_store_serves_reads_until_a_save():
+    inner = CountingStore()
+    store = CachedStore(inner, ttl=60)
+
+    assert store.get_classes() == store.get_classes() == ["BE A"]
+    assert inner.reads == 1
+
+    store.save_classes(["BE B"])
+    assert store.get_classes() == ["BE B"] and inner.reads == 2
+
+
+class SlowStore(InMemoryStore):
+    """Backend whose get_classes blocks until released"""
+
+    def __init__(self):
+        super().__init__(data={"classes": ["old"]})
+        self.release = threading.Event()
+
+    def get_classes(self):
+        classes = list(self.data["classes"])
+        self.release.wait(5)
+        return classes
+
+
+def test_cached_store_drops_a_read_that_raced_a_save():
+    inner = SlowStore()
+    store = CachedStore(inner, ttl=60)
+    reader = threading.Thread(target=store.get_classes)
+    reader.start()
+
+    store.save_classes(["new"])
+    inner.release.set()
+    reader.join()
+
+    assert store.get_classes() == ["new"]
+
+
+def test_cached_store_returns_copies():
+    store = CachedStore(InMemoryStore(data={"classes": ["BE A"]}), ttl=60)
+    store.get_classes().append("BE B")
+
+    assert store.get_classes() == ["BE A"]
+
+
+def test_all_data_excludes_timetable_and_history():
+    store = InMemoryStore(data={
+        "classes": ["BE A"], "subjects": [], "faculties": [], "rooms": [], "batches": {},
+        "timetable": {"format": "compact-v1"}, "timetable_meta": {}, "timetable_version": "v1",
+        "timetable_history": [{"id": 1, "data": {}}], "timetable_history_seq": 1
+    })
+
+    data = store.get_all_data()
+
+    assert data["classes"] == ["BE A"]
+    assert not any(key.startswith("timetable_history") or key in ("timetable", "timetable_version") for key in data)
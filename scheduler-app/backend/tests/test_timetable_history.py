@@ -0,0 +1,119 @@
+"""Timetable history: base + delta versions, rebasing, pruning and rollback"""
+import copy
+
+import pytest
+
+from services import timetable_history
+from services.timetable_history import record_version, load_version, list_versions, diff_versions
+from services.timetable_service import save_timetable, rollback_timetable, get_compact_timetable
+from scheduler.compact import CompactTimetable
+from storage import registry
+from storage.in_memory_store import InMemoryStore
+
+from tests.test_compact import sample_timetable
+
+
+@pytest.fixture
+def store(monkeypatch):
+    store = InMemoryStore(data={
+        "timetable": None, "timetable_meta": None, "timetable_version": 0,
+        "timetable_history": [], "timetable_history_seq": 0
+    })
+    monkeypatch.setattr(registry, "_STORE", store)
+    monkeypatch.setattr(timetable_history, "_BASES", type(timetable_history._BASES)())
+    return store
+
+
+def changed(cells=1):
+    """sample_timetable with the first `cells` empty cells of BE B filled"""
+    timetable = sample_timetable()
+    empty = [(day, slot) for day, slots in timetable["BE B"].items() for slot, entry in slots.items() if not entry]
+    for day, slot in empty[:cells]:
+        timetable["BE B"][day][slot] = {"subject": "ML", "faculty": "Prof Q", "room": "303"}
+    return timetable
+
+
+def test_later_versions_are_deltas(store):
+    first = record_version(CompactTimetable.from_dict(sample_timetable()), {"fingerprints": {"BE A": "x"}})
+    second = record_version(CompactTimetable.from_dict(changed()), summary={"source": "solver"})
+
+    entries = {entry["id"]: entry for entry in store.get_history()}
+    assert entries[first]["kind"] == "base"
+    assert entries[second]["kind"] == "delta" and entries[second]["base_id"] == first
+    assert store.get_history_entry(second)["stored_cells"] == 1
+
+    compact, version = load_version(second)
+    assert compact.to_dict() == changed()
+    assert version["summary"] == {"source": "solver"}
+    assert load_version(first)[0].to_dict() == sample_timetable()
+    assert load_version(first)[1]["fingerprints"] == {"BE A": "x"}
+    assert diff_versions(first, second)["changed"] == 1
+
+
+def test_new_base_on_large_changes_and_new_axes(store, monkeypatch):
+    monkeypatch.setattr(timetable_history, "TIMETABLE_HISTORY_REBASE", 0.2)
+    record_version(CompactTimetable.from_dict(sample_timetable()))
+
+    large = record_version(CompactTimetable.from_dict(changed(cells=4)))
+    renamed = copy.deepcopy(sample_timetable())
+    renamed["BE C"] = renamed.pop("BE B")
+    axes = record_version(CompactTimetable.from_dict(renamed))
+
+    kinds = {entry["id"]: entry["kind"] for entry in store.get_history()}
+    assert kinds[large] == kinds[axes] == "base"
+    assert load_version(axes)[0].to_dict() == renamed
+
+
+def test_prune_keeps_bases_of_kept_deltas(store, monkeypatch):
+    monkeypatch.setattr(timetable_history, "TIMETABLE_HISTORY_LIMIT", 2)
+    base = record_version(CompactTimetable.from_dict(sample_timetable()))
+    ids = [record_version(CompactTimetable.from_dict(changed(cells))) for cells in (1, 2, 3)]
+
+    assert [entry["id"] for entry in store.get_history()] == [ids[2], ids[1], base]
+    assert [version["id"] for version in list_versions()] == [ids[2], ids[1]]
+    assert load_version(ids[0]) == (None, None)
+    assert load_version(ids[2])[0].to_dict() == changed(3)
+
+
+def test_rollback_saves_a_new_version(store):
+    save_timetable(sample_timetable())
+    first = list_versions()[0]["id"]
+    save_timetable(changed())
+
+    restored = rollback_timetable(first)
+
+    assert restored == sample_timetable()
+    assert get_compact_timetable().to_dict() == sample_timetable()
+    latest = list_versions()[0]
+    assert latest["summary"] == {"source": "rollback", "rollback_of": first}
+    assert rollback_timetable(999) is None
+
+
+class FailingStore(InMemoryStore):
+    """Backend whose timetable saves fail once fail is set"""
+
+    fail = False
+
+    def save_timetable(self, timetable, meta=None):
+        return False if self.fail else super().save_timetable(timetable, meta)
+
+
+def test_failed_save_records_no_version(monkeypatch):
+    store = FailingStore(data={
+        "timetable": None, "timetable_meta": None, "timetable_version": 0,
+        "timetable_history": [], "timetable_history_seq": 0
+    })
+    monkeypatch.setattr(registry, "_STORE", store)
+    monkeypatch.setattr(timetable_history, "_BASES", type(timetable_history._BASES)())
+    monkeypatch.setattr(timetable_history, "TIMETABLE_HISTORY_LIMIT", 1)
+    save_timetable(sample_timetable())
+    first = list_versions()[0]["id"]
+    store.fail = True
+
+    with pytest.raises(RuntimeError):
+        save_timetable(changed(), summary={"source": "solver"})
+    with pytest.raises(RuntimeError):
+        rollback_timetable(first)
+
+    assert [entry["id"] for entry in store.get_history()] == [first]
+    assert get_compact_timetable().to_dict() == sample_timetable()
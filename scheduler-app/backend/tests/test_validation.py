@@ -0,0 +1,95 @@
+"""validate_timetable: clashes, lesson hours and per-day repetition"""
+from scheduler import validate_timetable
+from scheduler.compact import CompactTimetable
+from scheduler.csp_scheduler import generate_timetable_csp
+
+
+def lecture(subject, faculty, room):
+    return {"subject": subject, "faculty": faculty, "room": room}
+
+
+def lab_entry(rooms, faculty="F"):
+    return {
+        "subject": "Physics Lab", "faculty": faculty, "room": rooms[0],
+        "batches": [{"batch": f"B{i + 1}", "room": room} for i, room in enumerate(rooms)]
+    }
+
+
+def of_type(result, kind, key="conflicts"):
+    return [issue for issue in result[key] if issue["type"] == kind]
+
+
+def test_faculty_and_room_clashes():
+    timetable = {
+        "A": {"Monday": {"L1": lecture("Math", "Prof X", "301"), "L2": lecture("AI", "Prof Y", "302")}},
+        "B": {"Monday": {"L1": lecture("ML", "Prof X", "302"), "L2": lecture("ML", "Prof Z", "302")}}
+    }
+
+    result = validate_timetable(timetable)
+
+    assert not result["valid"]
+    assert of_type(result, "faculty_conflict") == [
+        {"type": "faculty_conflict", "faculty": "Prof X", "day": "Monday", "slot": "L1", "classes": ["B", "A"]}
+    ]
+    assert [(c["room"], c["slot"]) for c in of_type(result, "room_conflict")] == [("302", "L2")]
+    assert validate_timetable(CompactTimetable.from_dict(timetable))["conflicts"] == result["conflicts"]
+
+
+def test_batches_sharing_a_lab_clash():
+    timetable = {
+        "A": {"Monday": {"L1": lab_entry(["LAB3", "LAB3", "LAB3"]), "L2": None}},
+        "B": {"Monday": {"L1": None, "L2": lab_entry(["LAB1", "LAB2"], faculty="G")}}
+    }
+
+    result = validate_timetable(timetable)
+
+    clashes = of_type(result, "room_conflict")
+    assert not result["valid"]
+    assert len(clashes) == 2
+    assert all(c["room"] == "LAB3" and c["slot"] == "L1" for c in clashes)
+
+
+def test_distinct_batch_labs_are_valid():
+    timetable = {
+        "A": {"Monday": {"L1": lab_entry(["LAB1", "LAB2"])}},
+        "B": {"Monday": {"L1": lab_entry(["LAB3", "LAB4"], faculty="G")}}
+    }
+
+    assert validate_timetable(timetable)["valid"]
+
+
+def test_lesson_hours():
+    timetable = {"A": {"Monday": {
+        "L1": lecture("Math", "Prof X", "301"), "L2": lecture("math", "Prof X", "301"),
+        "L3": lecture("AI", "Prof Y", "301"), "L4": None
+    }}}
+    lesson_hours = {"A": [{"subject": "Math", "hours": 1}, {"subject": "AI", "hours": 2}],
+                    "Z": [{"subject": "Math", "hours": 9}]}
+
+    result = validate_timetable(timetable, lesson_hours=lesson_hours)
+
+    assert of_type(result, "lesson_hours_shortfall") == [
+        {"type": "lesson_hours_shortfall", "class": "A", "subject": "AI", "required": 2, "scheduled": 1}
+    ]
+    assert [(w["subject"], w["scheduled"]) for w in of_type(result, "lesson_hours_overrun", "warnings")] == [("Math", 2)]
+
+
+def test_blocks_count_once_per_day():
+    block = {"subject": "ML Lab", "faculty": "Prof X", "room": "LAB1", "block": {"start": "L1", "length": 2}}
+    day = {"L1": block, "L2": block, "L3": lecture("AI", "Prof Y", "301"),
+           "L4": lecture("AI", "Prof Y", "301"), "L5": lecture("AI", "Prof Y", "301")}
+
+    result = validate_timetable({"A": {"Monday": day}}, max_daily_sessions=2)
+
+    repetition = of_type(result, "subject_repetition", "warnings")
+    assert [(w["subject"], w["sessions"]) for w in repetition] == [("AI", 3)]
+
+
+def test_solver_output_validates(department):
+    data, config = department()
+
+    timetable = generate_timetable_csp(data, config)
+
+    result = validate_timetable(timetable, data["faculties"], config["lesson_hours"])
+    assert result["valid"] and result["conflicts"] == []
+    assert result["stats"]["classes"] == 2 and result["stats"]["total_slots"] == 60
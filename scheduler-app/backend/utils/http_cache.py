@@ -0,0 +1,208 @@
+"""
+Conditional GET (ETag / 304) and response compression helpers.
+
+Read endpoints derive a strong ETag from the version of the data they
+serve; a request whose If-None-Match matches gets 304 Not Modified without
+loading or serializing anything. Compression is negotiated from
+Accept-Encoding (brotli when the optional `brotli` package is installed,
+otherwise gzip) in an after_request hook registered by create_app, and the
+compressed body of versioned responses is kept so repeated requests skip
+re-serializing and re-compressing.
+"""
+import gzip
+import hashlib
+import threading
+from collections import OrderedDict
+from functools import wraps
+
+from flask import request, make_response
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+MIN_COMPRESS_SIZE = 1024
+COMPRESSIBLE_TYPES = ("application/json", "text/html", "text/plain", "text/css", "application/javascript")
+MAX_CACHED_BODIES = 32
+
+# Compressed variants get a suffix so each representation has its own strong ETag
+ENCODING_SUFFIXES = {"br": "-br", "gzip": "-gz"}
+
+_BODY_CACHE = OrderedDict()  # (etag, None) -> (body, mimetype); (etag, encoding) -> compressed body
+_BODY_CACHE_LOCK = threading.Lock()
+
+
+def make_etag(*parts):
+    """Strong ETag (quoted) for the given version parts"""
+    digest = hashlib.sha256("|".join(str(part) for part in parts).encode("utf-8")).hexdigest()
+    return f'"{digest[:32]}"'
+
+
+def _base_etag(etag):
+    """ETag without the weak prefix and compression suffix"""
+    etag = etag.strip()
+    if etag.startswith("W/"):
+        etag = etag[2:]
+    for suffix in ENCODING_SUFFIXES.values():
+        if etag.endswith(f'{suffix}"'):
+            return etag[:-len(suffix) - 1] + '"'
+    return etag
+
+
+def _matches(etag):
+    """
+    The If-None-Match tag matching etag in any encoding (None if none does),
+    as the strong ETag of that representation, so a 304 echoes the ETag the
+    client's cached (possibly compressed) response carried. A tag in the
+    encoding negotiated for this request wins over the others.
+    """
+    header = request.headers.get("If-None-Match")
+    if not header:
+        return None
+    if header.strip() == "*":
+        return etag
+    matched = []
+    for tag in header.split(","):
+        if _base_etag(tag) == etag:
+            tag = tag.strip()
+            matched.append(tag[2:] if tag.startswith("W/") else tag)
+    if not matched:
+        return None
+    suffix = ENCODING_SUFFIXES.get(_negotiate_encoding(), "")
+    return next((tag for tag in matched if tag.endswith(f'{suffix}"')), matched[0])
+
+
+def _cache_get(key):
+    with _BODY_CACHE_LOCK:
+        body = _BODY_CACHE.get(key)
+        if body is not None:
+            _BODY_CACHE.move_to_end(key)
+        return body
+
+
+def _cache_put(key, body):
+    with _BODY_CACHE_LOCK:
+        _BODY_CACHE[key] = body
+        while len(_BODY_CACHE) > MAX_CACHED_BODIES:
+            _BODY_CACHE.popitem(last=False)
+
+
+def _not_modified(etag):
+    response = make_response("", 304)
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "no-cache"
+    response.vary.add("Accept-Encoding")
+    return response
+
+
+def conditional(version_func=None):
+    """
+    Decorator adding ETag / 304 handling to a GET view.
+
+    Args:
+        version_func: callable(*view_args) returning the version token of the
+                      data the view serves (None when there is none). The ETag
+                      is derived from it and the request path, so a matching
+                      request is answered before the view runs. Without it,
+                      the ETag is a hash of the response body.
+    """
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            etag = None
+            if version_func is not None:
+                version = version_func(*args, **kwargs)
+                if version is not None:
+                    etag = make_etag(request.path, version)
+                    matched = _matches(etag)
+                    if matched:
+                        return _not_modified(matched)
+                    # Same version, same body: skip loading and serializing
+                    cached = _cache_get((etag, None))
+                    if cached is not None:
+                        response = make_response(cached[0])
+                        response.mimetype = cached[1]
+                        return _tag(response, etag, cacheable=True)
+
+            response = make_response(func(*args, **kwargs))
+            if response.status_code != 200:
+                return response
+
+            if etag is None:
+                etag = make_etag(request.path, hashlib.sha256(response.get_data()).hexdigest())
+                matched = _matches(etag)
+                if matched:
+                    return _not_modified(matched)
+                return _tag(response, etag)
+
+            _cache_put((etag, None), (response.get_data(), response.mimetype))
+            return _tag(response, etag, cacheable=True)
+        return wrapper
+    return decorator
+
+
+def _tag(response, etag, cacheable=False):
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "no-cache"
+    # Versioned bodies are identical per ETag, so their compressed form can be reused
+    response.cacheable_body = cacheable
+    return response
+
+
+def _negotiate_encoding():
+    accepted = {}
+    for item in request.headers.get("Accept-Encoding", "").split(","):
+        name, _, params = item.strip().partition(";")
+        quality = 1.0
+        if params.strip().startswith("q="):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                quality = 0.0
+        if name:
+            accepted[name.lower()] = quality
+
+    if brotli is not None and accepted.get("br", 0) > 0:
+        return "br"
+    if accepted.get("gzip", 0) > 0:
+        return "gzip"
+    return None
+
+
+def _compress(data, encoding):
+    if encoding == "br":
+        return brotli.compress(data, quality=5)
+    return gzip.compress(data, compresslevel=6)
+
+
+def compress_response(response):
+    """after_request hook: compress eligible responses for clients that accept it"""
+    if (response.status_code != 200 or response.direct_passthrough or response.is_streamed
+            or "Content-Encoding" in response.headers
+            or response.mimetype not in COMPRESSIBLE_TYPES):
+        return response
+
+    response.vary.add("Accept-Encoding")
+    encoding = _negotiate_encoding()
+    if encoding is None:
+        return response
+
+    data = response.get_data()
+    if len(data) < MIN_COMPRESS_SIZE:
+        return response
+
+    etag = response.headers.get("ETag")
+    key = (etag, encoding) if etag and getattr(response, "cacheable_body", False) else None
+    compressed = _cache_get(key) if key is not None else None
+    if compressed is None:
+        compressed = _compress(data, encoding)
+        if key is not None:
+            _cache_put(key, compressed)
+
+    response.set_data(compressed)
+    response.headers["Content-Encoding"] = encoding
+    if etag:
+        response.headers["ETag"] = etag[:-1] + ENCODING_SUFFIXES[encoding] + '"'
+    return response
@@ -675,7 +675,11 @@ if (saveDataBtn) {
                     body: JSON.stringify({ class_name: selectedClass, subjects })
                 });
                 const subRes = await subResp.json();
-                if (!subResp.ok || !subRes.success) {
+                if (subRes.issues) {
+                    // The new session lengths do not fit the class's lesson hours
+                    alert(`Data saved, but subjects for this class could not be saved. ${subRes.message}:\n`
+                        + subRes.issues.map(issue => `${issue.message}. ${issue.suggestion}`).join("\n"));
+                } else if (!subResp.ok || !subRes.success) {
                     alert("Data saved, but subjects for this class could not be saved.");
                 } else {
                     // Update cache with saved subjects
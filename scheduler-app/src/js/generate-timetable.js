@@ -410,6 +410,9 @@ async function saveLessons() {
         const result = await response.json();
         if (result.success) {
             alert(`Lessons for ${selectedClass} saved successfully!`);
+        } else if (result.issues) {
+            // Lesson hours that do not fill whole sessions (see duration_slots)
+            alert(`${result.message}:\n${result.issues.map(issue => `${issue.message}. ${issue.suggestion}`).join("\n")}`);
         } else {
             alert("Failed to save lessons");
         }
@@ -611,7 +614,8 @@ function setupGenerateTimetableButton() {
                     "http://localhost:5000/api/hod/generate-timetable",
                     {
                         method: "POST",
-                        headers: getAuthHeaders()
+                        headers: getAuthHeaders(),
+                        body: JSON.stringify({ stream: true })
                     }
                 );
 
@@ -622,17 +626,106 @@ function setupGenerateTimetableButton() {
                     return;
                 }
 
+                generateBtn.disabled = true;
+                // Improving solutions as they are found; polling if the stream is unavailable
+                const job = await streamGenerationJob(result.job_id, solution => {
+                    console.log(`Generating timetable... objective ${solution.objective} after ${solution.elapsed}s`);
+                }) || await waitForGenerationJob(result.job_id);
+                generateBtn.disabled = false;
+
+                if (!job || job.status !== "completed") {
+                    alert(`Failed to generate timetable${job && job.error ? ": " + job.error : ""}`);
+                    return;
+                }
+
                 alert("Timetable generated successfully!");
                 window.location.href = "view-timetable.html";
 
             } catch (error) {
                 console.error(error);
+                generateBtn.disabled = false;
                 alert("Scheduler service not reachable");
             }
         });
     }
 }
 
+// --- STREAM GENERATION JOB SOLUTIONS ---
+// The stream endpoint needs the Authorization header, which EventSource cannot
+// send, so the server-sent events are read from a fetch response body instead.
+// Resolves with the final job (the "status" event), or null if the stream failed.
+async function streamGenerationJob(jobId, onSolution) {
+    try {
+        const response = await fetch(
+            `http://localhost:5000/api/hod/generate-timetable/jobs/${jobId}/stream`,
+            {
+                method: "GET",
+                headers: getAuthHeaders()
+            }
+        );
+        if (!response.ok || !response.body) {
+            return null;
+        }
+
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = "";
+        while (true) {
+            const { value, done } = await reader.read();
+            if (done) {
+                return null;
+            }
+            buffer += decoder.decode(value, { stream: true });
+
+            // Events are separated by a blank line: "event: <name>\ndata: <json>\n\n"
+            let end;
+            while ((end = buffer.indexOf("\n\n")) !== -1) {
+                const lines = buffer.slice(0, end).split("\n");
+                buffer = buffer.slice(end + 2);
+                const event = (lines.find(line => line.startsWith("event:")) || "event: message").slice(6).trim();
+                const data = lines.filter(line => line.startsWith("data:")).map(line => line.slice(5).trim()).join("\n");
+                if (event === "solution" && onSolution) {
+                    onSolution(JSON.parse(data));
+                } else if (event === "status") {
+                    reader.cancel();
+                    return JSON.parse(data);
+                }
+            }
+        }
+    } catch (error) {
+        console.error("Error streaming generation job:", error);
+        return null;
+    }
+}
+
+// --- POLL GENERATION JOB UNTIL IT FINISHES ---
+async function waitForGenerationJob(jobId) {
+    while (true) {
+        await new Promise(resolve => setTimeout(resolve, 1000));
+
+        const response = await fetch(
+            `http://localhost:5000/api/hod/generate-timetable/jobs/${jobId}`,
+            {
+                method: "GET",
+                headers: getAuthHeaders()
+            }
+        );
+        const result = await response.json();
+
+        if (!response.ok || !result.success) {
+            return null;
+        }
+
+        const job = result.job;
+        if (job.latest && job.latest.objective !== undefined) {
+            console.log(`Generating timetable... objective ${job.latest.objective} after ${job.elapsed}s`);
+        }
+        if (["completed", "failed", "cancelled"].includes(job.status)) {
+            return job;
+        }
+    }
+}
+
 
 // --- TIME SETTINGS MANAGEMENT ---
 let lectureCounter = 0;